@@ -0,0 +1,140 @@
+"""
+Camada de cache do projeto
+==========================
+
+Tudo que o movibes guarda em cache passa por aqui. Três ideias:
+
+1. Chaves versionadas por TAGS
+   Cada valor é associado a tags (ex: 'evento:42', 'planos'). Cada tag tem
+   um número de versão guardado no próprio cache, e a versão das tags entra
+   na chave. Invalidar uma tag = gravar uma nova versão; as chaves antigas
+   deixam de ser lidas e expiram sozinhas. Não é preciso saber quais chaves
+   existem para invalidá-las.
+
+2. Invalidação por sinais
+   apps.core.signals invalida as tags quando Evento, Inscricao,
+   AssinaturaPremium e TipoPlano mudam (após o commit). As versões vivem no
+   cache configurado: precisa ser compartilhado entre workers ('file' ou
+   'redis') para a invalidação valer em todos os processos.
+
+3. Proteção contra stampede (single-flight)
+   Em um cache miss, só quem conseguir o lock (cache.add) recalcula; os
+   demais esperam um pouco pelo valor em vez de irem todos ao banco.
+
+Uso:
+    from apps.core import cache as core_cache
+
+    planos = core_cache.obter_ou_calcular(
+        'planos_ativos', calcular=lambda: list(...), tags=['planos'], timeout=600
+    )
+    core_cache.invalidar_tags('planos')
+"""
+
+import hashlib
+import time
+
+from django.core.cache import caches
+
+from .instrumentacao import registrar_cache
+
+ALIAS = 'default'
+
+# Prefixo das chaves de versão de tag
+PREFIXO_TAG = 'tag'
+
+# Quanto tempo quem não conseguiu o lock espera pelo valor (segundos)
+ESPERA_LOCK = 2.0
+INTERVALO_ESPERA = 0.05
+
+_AUSENTE = object()
+
+
+def _backend():
+    return caches[ALIAS]
+
+
+def _chave_tag(tag):
+    return f'{PREFIXO_TAG}:{tag}'
+
+
+def versoes_tags(*tags):
+    """
+    Versão atual de cada tag, em uma única ida ao cache (get_many).
+    Tags sem versão recebem uma nova (primeira leitura ou cache limpo).
+    """
+    if not tags:
+        return {}
+
+    backend = _backend()
+    chaves = {_chave_tag(tag): tag for tag in tags}
+    encontradas = backend.get_many(list(chaves))
+
+    versoes = {}
+    for chave, tag in chaves.items():
+        versao = encontradas.get(chave)
+        if versao is None:
+            # add() não sobrescreve se outro processo criou no meio-tempo
+            backend.add(chave, time.time_ns(), timeout=None)
+            versao = backend.get(chave)
+        versoes[tag] = versao
+    return versoes
+
+
+def versao_tags(*tags):
+    """ Uma única string que muda sempre que qualquer uma das tags muda. """
+    versoes = versoes_tags(*tags)
+    return '.'.join(str(versoes[tag]) for tag in sorted(versoes))
+
+
+def invalidar_tags(*tags):
+    """ Publica novas versões: tudo que dependia dessas tags deixa de valer. """
+    if tags:
+        agora = time.time_ns()
+        _backend().set_many({_chave_tag(tag): agora for tag in tags}, timeout=None)
+
+
+def chave(nome, *partes, tags=()):
+    """
+    Monta a chave final: nome + partes + hash das versões das tags.
+    Ex: chave('evento_detail', 42, tags=['evento:42']) -> 'evento_detail:42:v<hash>'
+    """
+    base = ':'.join([nome, *(str(parte) for parte in partes)])
+    if not tags:
+        return base
+    versao = hashlib.md5(versao_tags(*tags).encode()).hexdigest()[:12]
+    return f'{base}:v{versao}'
+
+
+def obter_ou_calcular(nome, calcular, partes=(), tags=(), timeout=300):
+    """
+    Retorna o valor em cache ou chama `calcular()` e guarda o resultado.
+    Apenas um processo/thread recalcula cada chave por vez (single-flight).
+    """
+    backend = _backend()
+    chave_final = chave(nome, *partes, tags=tags)
+
+    valor = backend.get(chave_final, _AUSENTE)
+    registrar_cache(valor is not _AUSENTE)
+    if valor is not _AUSENTE:
+        return valor
+
+    chave_lock = f'{chave_final}:lock'
+    if backend.add(chave_lock, 1, timeout=int(ESPERA_LOCK * 5)):
+        try:
+            valor = calcular()
+            backend.set(chave_final, valor, timeout)
+            return valor
+        finally:
+            backend.delete(chave_lock)
+
+    # Outro processo está calculando: espera o valor aparecer
+    limite = time.monotonic() + ESPERA_LOCK
+    while time.monotonic() < limite:
+        time.sleep(INTERVALO_ESPERA)
+        valor = backend.get(chave_final, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+
+    # Quem tinha o lock demorou demais: calcula por conta própria
+    return calcular()
+
@@ -0,0 +1,106 @@
+"""
+Compressão de respostas (Brotli e gzip)
+=======================================
+
+Compressores incrementais usados pelo CompressaoMiddleware, para respostas
+inteiras e em streaming (sync e async).
+
+- Brotli (br): ~15-25% menor que gzip em HTML. Qualidade moderada
+  (COMPRESSION_BROTLI_QUALITY, padrão 5): as respostas são dinâmicas e
+  comprimidas a cada request; 11 é para estáticos pré-comprimidos.
+- gzip: compatível com tudo. Aceita preenchimento aleatório no cabeçalho
+  (o "Heal The Breach" que o GZipMiddleware do Django usa): o tamanho da
+  resposta varia a cada request, sem alterar o conteúdo - ver BREACH no
+  middleware.
+"""
+
+import re
+import secrets
+import zlib
+from gzip import GzipFile
+
+import brotli
+from django.conf import settings
+from django.utils.text import StreamingBuffer
+
+# "br;q=0" recusa explicitamente; sem q vale 1
+_RE_CODIFICACAO = re.compile(r'\s*([a-z*]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?', re.IGNORECASE)
+
+
+def codificacoes_aceitas(accept_encoding):
+    """ Conjunto de codificações com q > 0 no header Accept-Encoding. """
+    aceitas = set()
+    for item in accept_encoding.split(','):
+        match = _RE_CODIFICACAO.match(item)
+        if not match:
+            continue
+        try:
+            qualidade = float(match.group(2)) if match.group(2) is not None else 1.0
+        except ValueError:
+            continue
+        if qualidade > 0:
+            aceitas.add(match.group(1).lower())
+    return aceitas
+
+
+class CompressorBrotli:
+    codificacao = 'br'
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(
+            mode=brotli.MODE_TEXT, quality=settings.COMPRESSION_BROTLI_QUALITY,
+        )
+
+    def comprimir(self, dados, flush=False):
+        saida = self._compressor.process(dados)
+        return saida + self._compressor.flush() if flush else saida
+
+    def finalizar(self):
+        return self._compressor.finish()
+
+
+class CompressorGzip:
+    codificacao = 'gzip'
+
+    def __init__(self, max_bytes_aleatorios=None):
+        self._buffer = StreamingBuffer()
+        # Nome de arquivo de tamanho aleatório no cabeçalho gzip (HTB)
+        nome = b'a' * secrets.randbelow(max_bytes_aleatorios) if max_bytes_aleatorios else None
+        self._arquivo = GzipFile(filename=nome, mode='wb', compresslevel=6, fileobj=self._buffer, mtime=0)
+
+    def comprimir(self, dados, flush=False):
+        self._arquivo.write(dados)
+        if flush:
+            self._arquivo.flush(zlib.Z_SYNC_FLUSH)
+        return self._buffer.read()
+
+    def finalizar(self):
+        self._arquivo.close()
+        return self._buffer.read()
+
+
+def criar_compressor(codificacao, max_bytes_aleatorios=None):
+    if codificacao == 'br':
+        return CompressorBrotli()
+    return CompressorGzip(max_bytes_aleatorios)
+
+
+def comprimir(dados, compressor):
+    return compressor.comprimir(dados) + compressor.finalizar()
+
+
+def comprimir_sequencia(sequencia, compressor):
+    # flush a cada pedaço: o navegador recebe (e renderiza) o que já foi gerado
+    for pedaco in sequencia:
+        saida = compressor.comprimir(pedaco, flush=True)
+        if saida:
+            yield saida
+    yield compressor.finalizar()
+
+
+async def acomprimir_sequencia(sequencia, compressor):
+    async for pedaco in sequencia:
+        saida = compressor.comprimir(pedaco, flush=True)
+        if saida:
+            yield saida
+    yield compressor.finalizar()
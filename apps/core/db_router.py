@@ -0,0 +1,157 @@
+"""
+Roteamento de leituras para a réplica
+=====================================
+
+Se DATABASE_REPLICA_URL estiver definida, settings.py cria o alias
+'replica'. As leituras só vão para ela em trechos marcados:
+
+    @use_replica                      # views (apenas GET/HEAD)
+    def home(request): ...
+
+    with replica_para(request):       # trechos fora de views marcadas
+        ...                           # (ex: context processors)
+
+Todo o resto - e toda escrita - continua no banco principal.
+
+Read-your-writes: após um POST (ou outro método não seguro) o
+ReplicaStickinessMiddleware grava um cookie assinado; enquanto ele tiver
+menos de REPLICA_STICKY_SECONDS segundos, as leituras desse usuário ficam
+no principal, para que ele veja o que acabou de gravar mesmo com atraso
+de replicação.
+"""
+
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+REPLICA_ALIAS = 'replica'
+PRIMARIO_ALIAS = 'default'
+
+COOKIE_PRIMARIO = 'movibes_primario'
+SALT_COOKIE_PRIMARIO = 'apps.core.db_router.primario'
+
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+
+_usar_replica = contextvars.ContextVar('usar_replica', default=False)
+
+
+def replica_configurada():
+    """
+    True se há uma réplica em outro banco. Uma réplica que aponta para o
+    próprio principal (o espelho TEST['MIRROR'] dos testes, ou a mesma URL
+    nas duas variáveis) não conta: as leituras ficam na conexão do
+    principal, que enxerga a transação em andamento.
+    """
+    if REPLICA_ALIAS not in settings.DATABASES:
+        return False
+    replica = connections[REPLICA_ALIAS].settings_dict
+    primario = connections[PRIMARIO_ALIAS].settings_dict
+    return any(replica.get(chave) != primario.get(chave) for chave in ('NAME', 'HOST', 'PORT'))
+
+
+def fixado_no_primario(request):
+    """ True se o usuário escreveu algo há menos de REPLICA_STICKY_SECONDS. """
+    return request.get_signed_cookie(
+        COOKIE_PRIMARIO, default=None, salt=SALT_COOKIE_PRIMARIO,
+        max_age=settings.REPLICA_STICKY_SECONDS,
+    ) is not None
+
+
+def pode_usar_replica(request):
+    return (
+        replica_configurada()
+        and request.method in METODOS_SEGUROS
+        and not fixado_no_primario(request)
+    )
+
+
+@contextmanager
+def usando_replica(ativo=True):
+    """ Leituras dentro do bloco vão para a réplica (se configurada). """
+    token = _usar_replica.set(ativo)
+    try:
+        yield
+    finally:
+        _usar_replica.reset(token)
+
+
+def replica_para(request):
+    """ usando_replica(), mas só se o request permitir (método seguro, sem cookie). """
+    return usando_replica(pode_usar_replica(request))
+
+
+def use_replica(view):
+    """ Decorator de view: leituras na réplica em GET/HEAD fora da janela de escrita. """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def _aview(request, *args, **kwargs):
+            # O contextvar é copiado para as threads do ORM async
+            with replica_para(request):
+                return await view(request, *args, **kwargs)
+        return _aview
+
+    @wraps(view)
+    def _view(request, *args, **kwargs):
+        with replica_para(request):
+            return view(request, *args, **kwargs)
+    return _view
+
+
+class ReplicaRouter:
+    """
+    Leituras vão para a réplica apenas dentro de usando_replica();
+    escritas sempre para o principal.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _usar_replica.get() and replica_configurada():
+            return REPLICA_ALIAS
+        return PRIMARIO_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return PRIMARIO_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica e principal têm os mesmos dados
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Depois de um request que escreve (POST, PUT, PATCH, DELETE), fixa o
+    usuário no banco principal por REPLICA_STICKY_SECONDS segundos.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.fixar(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.fixar(request, await self.get_response(request))
+
+    @staticmethod
+    def fixar(request, response):
+        if request.method not in METODOS_SEGUROS and replica_configurada():
+            response.set_signed_cookie(
+                COOKIE_PRIMARIO, '1', salt=SALT_COOKIE_PRIMARIO,
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+                secure=settings.SESSION_COOKIE_SECURE,
+            )
+        return response
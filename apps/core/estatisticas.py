@@ -0,0 +1,23 @@
+"""
+Estatísticas simples para os comandos de benchmark e carga.
+"""
+
+
+def percentil(valores, p):
+    """ Percentil p (0-100) por posição na lista ordenada. """
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def resumo_latencias(latencias_ms, duracao_s):
+    """ p50/p95/p99 (ms) e requests/s de uma lista de latências. """
+    return {
+        'requests': len(latencias_ms),
+        'rps': len(latencias_ms) / duracao_s if duracao_s > 0 else 0.0,
+        'p50': percentil(latencias_ms, 50),
+        'p95': percentil(latencias_ms, 95),
+        'p99': percentil(latencias_ms, 99),
+    }
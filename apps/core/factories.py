@@ -0,0 +1,140 @@
+"""
+Fábricas de dados para testes
+=============================
+
+Funções simples que criam objetos válidos com o mínimo de argumentos; tudo
+que não for informado recebe um valor padrão realista. Usadas pelos testes
+de orçamento de consultas (apps.core.testing) e por qualquer teste que
+precise de usuários, eventos e interações.
+
+    aluno = criar_aluno()
+    evento = criar_evento(participantes=10)
+    profissional = criar_profissional(com_assinatura=True)
+"""
+
+import itertools
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import F
+from django.utils import timezone
+
+from apps.events.models import CategoriaEvento, Evento, Inscricao, InteracaoPresenca
+from apps.users.models import (
+    Aluno,
+    AssinaturaPremium,
+    Avaliacao,
+    Profissional,
+    SolicitacaoConexao,
+    TipoPlano,
+    Usuario,
+)
+
+SENHA_PADRAO = 'senha-de-teste-123'
+
+_sequencia = itertools.count(1)
+
+
+def _proximo():
+    return next(_sequencia)
+
+
+def criar_usuario(**campos):
+    n = _proximo()
+    campos.setdefault('email', f'usuario{n}@exemplo.com')
+    campos.setdefault('first_name', 'Usuário')
+    campos.setdefault('last_name', str(n))
+    campos.setdefault('cadastro_completo', True)
+    campos.setdefault('perfil_escolhido', True)
+    return Usuario.objects.create_user(password=SENHA_PADRAO, **campos)
+
+
+def criar_aluno(premium=False, **campos):
+    """ Usuário com perfil de aluno; premium=True cria uma assinatura ativa. """
+    usuario = criar_usuario(**campos)
+    Aluno.objects.create(usuario=usuario, cidade='Fortaleza', bairro='Meireles')
+    if premium:
+        criar_assinatura(usuario, tipo_usuario='aluno')
+    return usuario
+
+
+def criar_profissional(com_assinatura=True, **campos):
+    """ Usuário com perfil profissional; sem assinatura o middleware o redireciona. """
+    usuario = criar_usuario(**campos)
+    Profissional.objects.create(usuario=usuario, especialidade='Personal trainer')
+    if com_assinatura:
+        criar_assinatura(usuario, tipo_usuario='profissional')
+    return usuario
+
+
+def criar_staff(**campos):
+    campos.setdefault('is_staff', True)
+    campos.setdefault('is_superuser', True)
+    return criar_usuario(**campos)
+
+
+def obter_plano(tipo_usuario, periodicidade='mensal'):
+    plano = TipoPlano.objects.filter(
+        tipo_usuario=tipo_usuario, periodicidade=periodicidade, ativo=True
+    ).first()
+    if plano is None:
+        plano = TipoPlano.objects.create(
+            nome=f'Plano {tipo_usuario} {periodicidade}', tipo_usuario=tipo_usuario,
+            periodicidade=periodicidade, valor=Decimal('29.90'), ativo=True,
+        )
+    return plano
+
+
+def criar_assinatura(usuario, tipo_usuario='aluno', dias=30, **campos):
+    agora = timezone.now()
+    plano = campos.pop('tipo_plano', None) or obter_plano(tipo_usuario)
+    campos.setdefault('status', 'ativa')
+    campos.setdefault('data_inicio', agora - timedelta(days=1))
+    campos.setdefault('data_expiracao', agora + timedelta(days=dias))
+    campos.setdefault('valor_pago', plano.valor)
+    return AssinaturaPremium.objects.create(usuario=usuario, tipo_plano=plano, **campos)
+
+
+def obter_categoria(nome='Corrida'):
+    categoria, _ = CategoriaEvento.objects.get_or_create(nome=nome)
+    return categoria
+
+
+def criar_evento(criador=None, participantes=0, passado=False, **campos):
+    """ Evento futuro (ou passado) com `participantes` alunos inscritos. """
+    n = _proximo()
+    delta = timedelta(days=7)
+    campos.setdefault('nome_evento', f'Evento {n}')
+    campos.setdefault('descricao_do_evento', 'Treino em grupo na orla.')
+    campos.setdefault('status', 'confirmado')
+    campos.setdefault('vagas_restantes', 20)
+    campos.setdefault('data_e_hora', timezone.now() + (-delta if passado else delta))
+    campos.setdefault('localizacao_cidade', 'Fortaleza')
+    campos.setdefault('localizacao_bairro_endereco', 'Meireles')
+    campos.setdefault('categoria', obter_categoria())
+    evento = Evento.objects.create(id_criador=criador or criar_profissional(), **campos)
+
+    for _ in range(participantes):
+        criar_inscricao(criar_aluno(), evento)
+    return evento
+
+
+def criar_inscricao(usuario_aluno, evento):
+    return Inscricao.objects.create(id_aluno=usuario_aluno.aluno, id_evento=evento)
+
+
+def criar_curtida(autor, inscricao, **campos):
+    curtida = InteracaoPresenca.objects.create(autor=autor, inscricao_alvo=inscricao, **campos)
+    # O contador é mantido por apps.events.curtidas, que o create() não usa
+    Inscricao.objects.filter(pk=inscricao.pk).update(curtidas_count=F('curtidas_count') + 1)
+    return curtida
+
+
+def criar_solicitacao(solicitante, solicitado, **campos):
+    return SolicitacaoConexao.objects.create(solicitante=solicitante, solicitado=solicitado, **campos)
+
+
+def criar_avaliacao(usuario_aluno, usuario_profissional, nota=5, **campos):
+    return Avaliacao.objects.create(
+        autor=usuario_aluno.aluno, profissional_avaliado=usuario_profissional.profissional, nota=nota, **campos
+    )
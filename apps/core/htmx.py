@@ -0,0 +1,43 @@
+"""
+Utilitários para respostas HTMX.
+
+render_parcial / arender_parcial: respondem a uma ação HTMX com o partial
+principal (o que o hx-target troca) seguido de fragmentos out-of-band
+(`oob`): templates que renderizam elementos com hx-swap-oob e o mesmo id
+que já existe na página (contadores de participantes e vagas, badges de
+notificação...). Um clique atualiza tudo o que dependia dele, sem o
+usuário recarregar a página. Os fragmentos recebem o mesmo contexto do
+partial principal mais `oob=True`; ids que não existem na página atual são
+ignorados pelo HTMX.
+
+arender_parcial é a versão para views async. O template roda em uma
+thread (sync_to_async): acessos preguiçosos ao banco dentro dele (ex:
+`user.profissional`) são permitidos lá e proibidos no event loop. Os
+context processors NÃO rodam - o partial recebe no contexto tudo que usa,
+e um clique HTMX não paga as contagens do menu (ver
+apps.users.context_processors). Pelo mesmo motivo o {% csrf_token %} não
+está disponível: as ações HTMX recebem o token pelo hx-headers do <body>
+no base.html.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+
+def _renderizar(template, contexto, oob, request=None):
+    contexto = contexto or {}
+    partes = [render_to_string(template, contexto, request=request)]
+    if oob:
+        contexto_oob = {**contexto, 'oob': True}
+        partes.extend(render_to_string(fragmento, contexto_oob, request=request) for fragmento in oob)
+    return ''.join(partes)
+
+
+def render_parcial(request, template, contexto=None, oob=(), status=200):
+    return HttpResponse(_renderizar(template, contexto, oob, request), status=status)
+
+
+async def arender_parcial(template, contexto=None, status=200, oob=()):
+    html = await sync_to_async(_renderizar)(template, contexto, oob)
+    return HttpResponse(html, status=status)
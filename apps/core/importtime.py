@@ -0,0 +1,80 @@
+"""
+Tempo de import no boot
+=======================
+
+Roda um interpretador novo com `python -X importtime` executando o boot
+do Django (django.setup(), opcionalmente carregando o URLconf - que é o
+que um worker faz antes de atender o primeiro request) e interpreta a
+saída: tempo próprio e acumulado de cada módulo importado.
+
+Usado pelo comando `profile_imports` e pelo teste de orçamento de boot
+(settings.BOOT_IMPORT_BUDGET_MS).
+"""
+
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+
+CODIGO_BOOT = 'import django; django.setup()'
+CODIGO_BOOT_URLS = CODIGO_BOOT + '; from django.urls import get_resolver; get_resolver().url_patterns'
+
+
+class Import:
+    """ Uma linha do -X importtime. Tempos em microssegundos. """
+
+    def __init__(self, modulo, proprio_us, acumulado_us, profundidade):
+        self.modulo = modulo
+        self.proprio_us = proprio_us
+        self.acumulado_us = acumulado_us
+        self.profundidade = profundidade
+
+    @property
+    def pacote(self):
+        return self.modulo.split('.', 1)[0]
+
+
+def medir(codigo=CODIGO_BOOT):
+    """ Executa `codigo` em um processo novo e devolve a lista de Import. """
+    ambiente = dict(os.environ)
+    # Em testes (override_settings) settings.SETTINGS_MODULE é None; o
+    # manage.py já deixou a variável no ambiente
+    if settings.SETTINGS_MODULE:
+        ambiente.setdefault('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        capture_output=True, text=True, env=ambiente, cwd=settings.BASE_DIR, check=False,
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(f'O boot falhou:\n{resultado.stderr[-2000:]}')
+    return analisar(resultado.stderr)
+
+
+def analisar(saida):
+    """ Converte a saída do -X importtime (stderr) em uma lista de Import. """
+    imports = []
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:'):
+            continue
+        campos = linha[len('import time:'):].split('|', 2)
+        if len(campos) != 3 or not campos[0].strip().isdigit():
+            continue  # cabeçalho
+        proprio, acumulado, nome = campos
+        recuo = len(nome) - len(nome.lstrip())
+        imports.append(Import(nome.strip(), int(proprio), int(acumulado), (recuo - 1) // 2))
+    return imports
+
+
+def total_ms(imports):
+    """ Tempo total de import: soma dos acumulados de primeiro nível. """
+    return sum(item.acumulado_us for item in imports if item.profundidade == 0) / 1000
+
+
+def por_pacote(imports):
+    """ Tempo próprio somado por pacote de topo (django, allauth, apps, ...), em ms. """
+    totais = defaultdict(int)
+    for item in imports:
+        totais[item.pacote] += item.proprio_us
+    return {pacote: us / 1000 for pacote, us in sorted(totais.items(), key=lambda par: -par[1])}
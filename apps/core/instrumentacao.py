@@ -0,0 +1,99 @@
+"""
+Medições do request em andamento
+=================================
+
+Estado compartilhado entre o ServerTimingMiddleware (apps.core.middleware)
+e as partes instrumentadas (banco, templates, apps.core.cache). Fica em um
+contextvar: cada request (thread ou tarefa async) tem a sua medição, e fora
+de um request amostrado nada é registrado.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+_medicao_atual = contextvars.ContextVar('medicao_atual', default=None)
+
+
+class Medicao:
+    """ Contadores de um request. Tempos em milissegundos. """
+
+    __slots__ = ('inicio', 'db_consultas', 'db_ms', 'template_ms', 'cache_acertos',
+                 'cache_falhas', '_templates_abertos')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.db_consultas = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.cache_acertos = 0
+        self.cache_falhas = 0
+        self._templates_abertos = 0
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.inicio) * 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        """ execute_wrapper: conta e cronometra cada consulta. """
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_consultas += 1
+            self.db_ms += (time.perf_counter() - inicio) * 1000
+
+
+def medicao_atual():
+    return _medicao_atual.get()
+
+
+@contextmanager
+def medindo(medicao):
+    token = _medicao_atual.set(medicao)
+    try:
+        yield medicao
+    finally:
+        _medicao_atual.reset(token)
+
+
+def registrar_cache(acerto):
+    """ Chamado por apps.core.cache a cada leitura (acerto ou falha). """
+    medicao = _medicao_atual.get()
+    if medicao is not None:
+        if acerto:
+            medicao.cache_acertos += 1
+        else:
+            medicao.cache_falhas += 1
+
+
+def cronometrar_render(render):
+    """
+    Envolve Template.render do backend de templates do Django. Renders
+    aninhados (ex: template renderizado dentro de outro) contam uma vez só.
+    """
+    @wraps(render)
+    def _render(self, *args, **kwargs):
+        medicao = _medicao_atual.get()
+        if medicao is None or medicao._templates_abertos:
+            return render(self, *args, **kwargs)
+
+        medicao._templates_abertos += 1
+        inicio = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            medicao.template_ms += (time.perf_counter() - inicio) * 1000
+            medicao._templates_abertos -= 1
+
+    _render._cronometrado = True
+    return _render
+
+
+def instalar_cronometro_templates():
+    """ Aplica cronometrar_render uma única vez por processo. """
+    from django.template.backends.django import Template
+
+    if not getattr(Template.render, '_cronometrado', False):
+        Template.render = cronometrar_render(Template.render)
@@ -0,0 +1,157 @@
+"""
+Benchmark de conexões com o banco
+=================================
+
+Simula requests concorrentes (threads, como os workers gthread do
+gunicorn) e mede, para cada modo de conexão:
+
+- latência de cada "request" (p50/p95/p99), incluindo abrir a conexão;
+- churn: quantas conexões novas foram abertas (sinal connection_created)
+  e, no PostgreSQL, quantos backends distintos atenderam (pg_backend_pid);
+- erros de conexão (ex: conexão ociosa derrubada pelo servidor).
+
+Cada "request" dispara request_started/request_finished, como o handler
+do Django faz - é aí que CONN_MAX_AGE, CONN_HEALTH_CHECKS e a devolução
+ao pool entram em ação.
+
+Os modos rodam em subprocessos com as variáveis de ambiente de
+settings.py (DB_POOL, DB_CONN_MAX_AGE):
+    sem_persistencia -> DB_CONN_MAX_AGE=0 (uma conexão por request)
+    persistente      -> DB_CONN_MAX_AGE=600 + health checks
+    pool             -> DB_POOL=true (psycopg 3, só PostgreSQL)
+
+Uso:
+    python manage.py benchmark_db_connections
+    python manage.py benchmark_db_connections --threads 32 --requests 200 --modos persistente pool
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import OperationalError, connection
+from django.db.backends.signals import connection_created
+
+from apps.core.estatisticas import percentil
+
+MODOS = {
+    'sem_persistencia': {'DB_POOL': 'false', 'DB_CONN_MAX_AGE': '0'},
+    'persistente': {'DB_POOL': 'false', 'DB_CONN_MAX_AGE': '600'},
+    'pool': {'DB_POOL': 'true'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Mede churn de conexões e latência p99 com e sem pool de conexões.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16,
+                            help='Requests simultâneos (padrão: 16)')
+        parser.add_argument('--requests', type=int, default=100,
+                            help='Requests por thread (padrão: 100)')
+        parser.add_argument('--modos', nargs='+', choices=list(MODOS), default=list(MODOS),
+                            help='Modos a comparar (padrão: todos)')
+        parser.add_argument('--interno', action='store_true',
+                            help='Roda com a configuração atual e imprime JSON (uso interno)')
+
+    def handle(self, *args, **options):
+        if options['interno']:
+            resultado = self._medir(options['threads'], options['requests'])
+            self.stdout.write(json.dumps(resultado))
+            return
+
+        postgres = connection.vendor == 'postgresql'
+        self.stdout.write(
+            f'{options["threads"]} threads x {options["requests"]} requests | banco: {connection.vendor}\n'
+        )
+        self.stdout.write(
+            f'{"modo":<18}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}'
+            f'{"conexões":>10}{"backends":>10}{"erros":>7}'
+        )
+
+        for modo in options['modos']:
+            if modo == 'pool' and not postgres:
+                self.stdout.write(f'{modo:<18}  (ignorado: o pool nativo exige PostgreSQL)')
+                continue
+
+            r = self._rodar_modo(modo, options)
+            backends = r['backends'] if r['backends'] is not None else '-'
+            self.stdout.write(
+                f'{modo:<18}{r["rps"]:>9.1f}{r["p50"]:>9.2f}{r["p95"]:>9.2f}{r["p99"]:>9.2f}'
+                f'{r["conexoes"]:>10}{backends:>10}{r["erros"]:>7}'
+            )
+
+    def _rodar_modo(self, modo, options):
+        env = {**os.environ, **MODOS[modo]}
+        comando = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_db_connections',
+            '--interno', '--threads', str(options['threads']), '--requests', str(options['requests']),
+        ]
+        processo = subprocess.run(comando, env=env, capture_output=True, text=True)
+        if processo.returncode != 0:
+            raise CommandError(f'Modo {modo} falhou:\n{processo.stderr}')
+        return json.loads(processo.stdout.strip().splitlines()[-1])
+
+    def _medir(self, threads, requests_por_thread):
+        postgres = connection.vendor == 'postgresql'
+        sql = 'SELECT pg_backend_pid()' if postgres else 'SELECT 1'
+
+        lock = threading.Lock()
+        latencias = []
+        backends = set()
+        contagem = {'conexoes': 0, 'erros': 0}
+
+        def ao_conectar(sender, connection, **kwargs):
+            with lock:
+                contagem['conexoes'] += 1
+
+        def trabalhador():
+            minhas = []
+            meus_backends = set()
+            erros = 0
+            for _ in range(requests_por_thread):
+                request_started.send(sender=self.__class__)
+                inicio = time.perf_counter()
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(sql)
+                        meus_backends.add(cursor.fetchone()[0])
+                except OperationalError:
+                    erros += 1
+                finally:
+                    minhas.append((time.perf_counter() - inicio) * 1000)
+                    request_finished.send(sender=self.__class__)
+            connection.close()
+
+            with lock:
+                latencias.extend(minhas)
+                backends.update(meus_backends)
+                contagem['erros'] += erros
+
+        connection_created.connect(ao_conectar)
+        try:
+            inicio = time.perf_counter()
+            workers = [threading.Thread(target=trabalhador) for _ in range(threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            duracao = time.perf_counter() - inicio
+        finally:
+            connection_created.disconnect(ao_conectar)
+
+        return {
+            'rps': len(latencias) / duracao if duracao else 0.0,
+            'p50': percentil(latencias, 50),
+            'p95': percentil(latencias, 95),
+            'p99': percentil(latencias, 99),
+            'conexoes': contagem['conexoes'],
+            'backends': len(backends) if postgres else None,
+            'erros': contagem['erros'],
+        }
@@ -0,0 +1,104 @@
+"""
+Comparação de workers do Gunicorn: sync x gthread x uvicorn
+===========================================================
+
+Roda o `loadtest` uma vez para cada tipo de worker, subindo um gunicorn
+local com o gunicorn.conf.py de produção, e mostra as jornadas lado a lado.
+
+Para uma comparação justa, use a mesma capacidade de concorrência:
+    sync     N workers            (N requests ao mesmo tempo)
+    gthread  N/T workers x T threads
+    uvicorn  N/T workers          (ASGI; as views async não têm limite de
+                                   requests por worker, as síncronas rodam
+                                   no pool de threads do asgiref)
+
+O ganho do ASGI aparece com muitos usuários virtuais nas jornadas HTMX
+async (inscrever, poll_notif).
+
+Uso:
+    python manage.py seed_scale
+    python manage.py benchmark_gunicorn --concorrencia 8 --threads 4 --duracao 60
+    python manage.py benchmark_gunicorn --classes gthread uvicorn \\
+        --cenarios inscrever poll_notif --usuarios-virtuais 200 --fracao-anonimos 0
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from .loadtest import CENARIOS
+
+CLASSES = ['sync', 'gthread', 'uvicorn']
+
+
+class Command(BaseCommand):
+    help = 'Compara workers sync, gthread e uvicorn (ASGI) do gunicorn com o loadtest.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8001',
+                            help='Endereço do gunicorn de teste (padrão: porta 8001)')
+        parser.add_argument('--classes', nargs='+', choices=CLASSES, default=['gthread', 'uvicorn'],
+                            help='Tipos de worker comparados (padrão: gthread uvicorn)')
+        parser.add_argument('--concorrencia', type=int, default=8,
+                            help='Requests simultâneos por servidor (padrão: 8)')
+        parser.add_argument('--threads', type=int, default=4, help='Threads por worker gthread (padrão: 4)')
+        parser.add_argument('--cenarios', nargs='+', choices=list(CENARIOS), default=list(CENARIOS))
+        parser.add_argument('--usuarios-virtuais', type=int, default=20)
+        parser.add_argument('--fracao-anonimos', type=float, default=0.2)
+        parser.add_argument('--duracao', type=float, default=30)
+        parser.add_argument('--aquecimento', type=float, default=3)
+
+    def handle(self, *args, **options):
+        por_worker = max(1, options['concorrencia'] // options['threads'])
+        perfis = {
+            'sync': {'gunicorn_workers': options['concorrencia'], 'gunicorn_threads': 1},
+            'gthread': {'gunicorn_workers': por_worker, 'gunicorn_threads': options['threads']},
+            'uvicorn': {'gunicorn_workers': por_worker, 'gunicorn_threads': 1},
+        }
+
+        resultados = {}
+        with tempfile.TemporaryDirectory() as diretorio:
+            for classe in options['classes']:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n=== {classe} ==='))
+                arquivo = Path(diretorio) / f'{classe}.json'
+                call_command(
+                    'loadtest',
+                    url=options['url'],
+                    cenarios=options['cenarios'],
+                    usuarios_virtuais=options['usuarios_virtuais'],
+                    fracao_anonimos=options['fracao_anonimos'],
+                    duracao=options['duracao'],
+                    aquecimento=options['aquecimento'],
+                    iniciar_gunicorn=True,
+                    gunicorn_worker_class=classe,
+                    salvar=str(arquivo),
+                    stdout=self.stdout,
+                    **perfis[classe],
+                )
+                resultados[classe] = json.loads(arquivo.read_text(encoding='utf-8'))['cenarios']
+
+        self.imprimir(resultados)
+
+    def imprimir(self, resultados):
+        classes = list(resultados)
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{" x ".join(classes)}'))
+        self.stdout.write(
+            f'{"jornada":<14}'
+            + ''.join(f'{"req/s " + classe:>16}' for classe in classes)
+            + ''.join(f'{"p95 " + classe:>14}' for classe in classes)
+            + f'{"erros":>10}'
+        )
+
+        cenarios = [cenario for cenario in resultados[classes[0]]
+                    if all(cenario in resultados[classe] for classe in classes)]
+        for cenario in cenarios:
+            linhas = [resultados[classe][cenario] for classe in classes]
+            self.stdout.write(
+                f'{cenario:<14}'
+                + ''.join(f'{r["rps"]:>16.1f}' for r in linhas)
+                + ''.join(f'{r["p95"]:>14.1f}' for r in linhas)
+                + f'{"/".join(str(r["erros"]) for r in linhas):>10}'
+            )
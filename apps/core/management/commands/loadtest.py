@@ -0,0 +1,338 @@
+"""
+Teste de carga HTTP das jornadas principais
+===========================================
+
+Dispara usuários virtuais (threads, cada uma com sua sessão HTTP) contra
+um servidor rodando de verdade - de preferência gunicorn, como em
+produção - e mede cada jornada:
+
+    feed           GET  /                              (lista de eventos)
+    filtro_htmx    GET  /?categorias=..&cidade=..       (HX-Request, só a lista)
+    evento         GET  /evento/<id>/
+    inscrever      POST /subscribe-event/<id>/          (HTMX, evento gratuito)
+    pagar          POST /evento/<id>/processar-pagamento/
+    notificacoes   GET  /notificacoes/
+    poll_notif     GET  /notificacoes/contagem/            (HTMX, polling do badge)
+
+Os usuários virtuais são alunos gerados pelo `seed_scale`: as sessões são
+criadas direto no SessionStore configurado (sem passar pelo login), então
+o servidor precisa usar o mesmo banco e o mesmo SESSION_MODE.
+
+Relatório: requests/s, p50/p95/p99 e erros por jornada. --salvar grava um
+baseline JSON; --comparar mostra a variação em relação a um baseline.
+
+Uso:
+    python manage.py seed_scale
+    python manage.py loadtest --iniciar-gunicorn --duracao 60 --salvar baseline.json
+    python manage.py loadtest --url http://127.0.0.1:8000 --comparar baseline.json
+"""
+
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+from importlib import import_module
+
+import requests
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.middleware.csrf import CSRF_ALLOWED_CHARS
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from apps.core.estatisticas import resumo_latencias
+from apps.events.models import CategoriaEvento, Evento
+from apps.users.models import Usuario
+
+from .seed_scale import DOMINIO
+
+# nome: (peso, exige login)
+CENARIOS = {
+    'feed': (30, False),
+    'filtro_htmx': (20, False),
+    'evento': (25, False),
+    'inscrever': (10, True),
+    'pagar': (5, True),
+    'notificacoes': (10, True),
+    'poll_notif': (15, True),
+}
+
+
+class UsuarioVirtual:
+    """ Uma sessão HTTP (cookies de sessão e CSRF) que executa as jornadas. """
+
+    def __init__(self, base_url, dados, rng, sessao_django=None):
+        self.base_url = base_url.rstrip('/')
+        self.dados = dados
+        self.rng = rng
+        self.http = requests.Session()
+        self.autenticado = sessao_django is not None
+
+        # Token CSRF próprio: o cookie e o header com o mesmo valor passam no CsrfViewMiddleware
+        self.csrf = get_random_string(32, CSRF_ALLOWED_CHARS)
+        self.http.cookies.set(settings.CSRF_COOKIE_NAME, self.csrf)
+        if sessao_django:
+            self.http.cookies.set(settings.SESSION_COOKIE_NAME, sessao_django)
+
+        pesos = {nome: peso for nome, (peso, exige_login) in CENARIOS.items()
+                 if self.autenticado or not exige_login}
+        self.cenarios = [nome for nome in pesos if nome in dados['cenarios']]
+        self.pesos = [pesos[nome] for nome in self.cenarios]
+
+    def proximo(self):
+        return self.rng.choices(self.cenarios, weights=self.pesos)[0]
+
+    def executar(self, cenario):
+        """ Executa um cenário; retorna (latência em ms, sucesso). """
+        metodo, caminho, headers, params = getattr(self, f'_{cenario}')()
+        headers = {'X-CSRFToken': self.csrf, 'Referer': self.base_url + '/', **headers}
+
+        inicio = time.perf_counter()
+        try:
+            resposta = self.http.request(
+                metodo, self.base_url + caminho, params=params, headers=headers,
+                allow_redirects=False, timeout=30,
+            )
+            sucesso = resposta.status_code < 400
+        except requests.RequestException:
+            sucesso = False
+        return (time.perf_counter() - inicio) * 1000, sucesso
+
+    def _feed(self):
+        return 'GET', reverse('home'), {}, None
+
+    def _filtro_htmx(self):
+        params = {
+            'categorias': self.rng.sample(self.dados['categorias'], k=min(2, len(self.dados['categorias']))),
+            'cidade': self.rng.choice(self.dados['cidades']),
+        }
+        return 'GET', reverse('home'), {'HX-Request': 'true'}, params
+
+    def _evento(self):
+        return 'GET', reverse('evento_detail', args=[self.rng.choice(self.dados['eventos'])]), {}, None
+
+    def _inscrever(self):
+        evento = self.rng.choice(self.dados['eventos_gratuitos'])
+        return 'POST', reverse('subscribe_event', args=[evento]), {'HX-Request': 'true'}, None
+
+    def _pagar(self):
+        evento = self.rng.choice(self.dados['eventos_pagos'])
+        return 'POST', reverse('processar_pagamento', args=[evento]), {}, None
+
+    def _notificacoes(self):
+        return 'GET', reverse('listar_notificacoes'), {}, None
+
+    def _poll_notif(self):
+        return 'GET', reverse('contagem_notificacoes'), {'HX-Request': 'true'}, None
+
+
+class Command(BaseCommand):
+    help = 'Teste de carga HTTP das jornadas principais, com p50/p95/p99 e baseline JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Servidor alvo')
+        parser.add_argument('--usuarios-virtuais', type=int, default=20,
+                            help='Usuários simultâneos (padrão: 20)')
+        parser.add_argument('--fracao-anonimos', type=float, default=0.2,
+                            help='Fração de usuários virtuais sem login (padrão: 0.2)')
+        parser.add_argument('--duracao', type=float, default=30, help='Segundos de medição (padrão: 30)')
+        parser.add_argument('--aquecimento', type=float, default=3,
+                            help='Segundos iniciais descartados (padrão: 3)')
+        parser.add_argument('--cenarios', nargs='+', choices=list(CENARIOS), default=list(CENARIOS))
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--salvar', metavar='ARQUIVO', help='Grava o resultado como baseline JSON')
+        parser.add_argument('--comparar', metavar='ARQUIVO', help='Compara com um baseline JSON')
+        parser.add_argument('--tolerancia', type=float, default=0.10,
+                            help='Variação aceita de p95 e req/s na comparação (padrão: 0.10)')
+        parser.add_argument('--falhar-em-regressao', action='store_true',
+                            help='Sai com erro se alguma jornada regredir além da tolerância')
+        parser.add_argument('--iniciar-gunicorn', action='store_true',
+                            help='Sobe um gunicorn local na porta de --url durante o teste')
+        parser.add_argument('--gunicorn-workers', type=int, default=4)
+        parser.add_argument('--gunicorn-worker-class', default='uvicorn', choices=['sync', 'gthread', 'uvicorn'])
+        parser.add_argument('--gunicorn-threads', type=int, default=4,
+                            help='Threads por worker (só gthread; padrão: 4)')
+
+    def handle(self, *args, **options):
+        if settings.SESSION_MODE == 'cache' and settings.CACHE_BACKEND == 'locmem':
+            raise CommandError('SESSION_MODE=cache com CACHE_BACKEND=locmem: as sessões criadas aqui '
+                               'não seriam vistas pelo servidor. Use outro modo de sessão ou de cache.')
+
+        rng = random.Random(options['seed'])
+        dados = self.carregar_dados(options['cenarios'])
+        usuarios = self.criar_usuarios_virtuais(options, dados, rng)
+
+        servidor = self.iniciar_gunicorn(options) if options['iniciar_gunicorn'] else None
+        try:
+            self.aguardar_servidor(options['url'])
+            resultado = self.rodar(usuarios, options['duracao'], options['aquecimento'])
+        finally:
+            if servidor is not None:
+                servidor.terminate()
+                servidor.wait(timeout=30)
+
+        relatorio = {
+            'criado_em': timezone.now().isoformat(),
+            'url': options['url'],
+            'usuarios_virtuais': options['usuarios_virtuais'],
+            'duracao': options['duracao'],
+            'cenarios': resultado,
+        }
+        self.imprimir(relatorio)
+
+        if options['salvar']:
+            with open(options['salvar'], 'w', encoding='utf-8') as arquivo:
+                json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+            self.stdout.write(f'Baseline salvo em {options["salvar"]}')
+
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as arquivo:
+                baseline = json.load(arquivo)
+            regressoes = self.comparar(baseline, relatorio, options['tolerancia'])
+            if regressoes and options['falhar_em_regressao']:
+                raise CommandError(f'Regressão em: {", ".join(regressoes)}')
+
+    # ------------------------------------------------------------------
+
+    def carregar_dados(self, cenarios):
+        agora = timezone.now()
+        futuros = Evento.objects.filter(data_e_hora__gte=agora).order_by('-participantes_confirmados', 'pk')
+        dados = {
+            'cenarios': set(cenarios),
+            'eventos': list(Evento.objects.order_by('-participantes_confirmados', 'pk')
+                            .values_list('pk', flat=True)[:1000]),
+            'eventos_gratuitos': list(futuros.filter(eh_pago=False).values_list('pk', flat=True)[:500]),
+            'eventos_pagos': list(futuros.filter(eh_pago=True, preco__isnull=False)
+                                  .values_list('pk', flat=True)[:500]),
+            'categorias': [str(pk) for pk in CategoriaEvento.objects.values_list('pk', flat=True)],
+            'cidades': list(Evento.objects.order_by().values_list('localizacao_cidade', flat=True)
+                            .distinct()[:20]) or ['Fortaleza'],
+        }
+        if not dados['eventos']:
+            raise CommandError('Nenhum evento cadastrado. Rode `seed_scale` antes.')
+
+        # Jornadas sem dados para exercitar ficam de fora
+        for cenario, chave in [('inscrever', 'eventos_gratuitos'), ('pagar', 'eventos_pagos')]:
+            if not dados[chave]:
+                dados['cenarios'].discard(cenario)
+        return dados
+
+    def criar_usuarios_virtuais(self, options, dados, rng):
+        total = options['usuarios_virtuais']
+        autenticados = total - round(total * options['fracao_anonimos'])
+
+        alunos = list(
+            Usuario.objects.filter(email__endswith=f'@{DOMINIO}', aluno__isnull=False, is_active=True)
+            .order_by('pk')[:autenticados]
+        )
+        if len(alunos) < autenticados:
+            raise CommandError(f'São necessários {autenticados} alunos do seed_scale; há {len(alunos)}.')
+
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        backend = settings.AUTHENTICATION_BACKENDS[0]
+        usuarios = []
+        for numero in range(total):
+            sessao = None
+            if numero < autenticados:
+                aluno = alunos[numero]
+                sessao_django = store()
+                sessao_django[SESSION_KEY] = aluno._meta.pk.value_to_string(aluno)
+                sessao_django[BACKEND_SESSION_KEY] = backend
+                sessao_django[HASH_SESSION_KEY] = aluno.get_session_auth_hash()
+                sessao_django.save()
+                sessao = sessao_django.session_key
+            usuarios.append(UsuarioVirtual(options['url'], dados, random.Random(rng.random()), sessao))
+        return usuarios
+
+    def iniciar_gunicorn(self, options):
+        # Mesma configuração de produção (gunicorn.conf.py), com os parâmetros do teste
+        ambiente = {
+            **os.environ,
+            'GUNICORN_BIND': options['url'].split('://', 1)[-1].rstrip('/'),
+            'GUNICORN_WORKERS': str(options['gunicorn_workers']),
+            'GUNICORN_WORKER_CLASS': options['gunicorn_worker_class'],
+            'GUNICORN_THREADS': str(options['gunicorn_threads']),
+            'GUNICORN_ACCESSLOG': '',
+        }
+        self.stdout.write(
+            f'Iniciando gunicorn: {options["gunicorn_workers"]} workers {options["gunicorn_worker_class"]}'
+            + (f' x {options["gunicorn_threads"]} threads' if options['gunicorn_worker_class'] == 'gthread' else '')
+        )
+        return subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py'], cwd=settings.BASE_DIR, env=ambiente)
+
+    def aguardar_servidor(self, url, limite=30):
+        fim = time.monotonic() + limite
+        while time.monotonic() < fim:
+            try:
+                requests.get(url.rstrip('/') + reverse('healthz'), timeout=2).raise_for_status()
+                return
+            except requests.RequestException:
+                time.sleep(0.5)
+        raise CommandError(f'O servidor em {url} não respondeu em {limite}s.')
+
+    def rodar(self, usuarios, duracao, aquecimento):
+        lock = threading.Lock()
+        medicoes = {cenario: [] for cenario in CENARIOS}
+        erros = dict.fromkeys(CENARIOS, 0)
+
+        inicio_medicao = time.monotonic() + aquecimento
+        fim = inicio_medicao + duracao
+
+        def loop(usuario):
+            minhas = []
+            while (agora := time.monotonic()) < fim:
+                cenario = usuario.proximo()
+                latencia, sucesso = usuario.executar(cenario)
+                if agora >= inicio_medicao:
+                    minhas.append((cenario, latencia, sucesso))
+            with lock:
+                for cenario, latencia, sucesso in minhas:
+                    medicoes[cenario].append(latencia)
+                    erros[cenario] += not sucesso
+
+        self.stdout.write(f'{len(usuarios)} usuários virtuais | aquecimento {aquecimento}s | medição {duracao}s')
+        threads = [threading.Thread(target=loop, args=(usuario,)) for usuario in usuarios]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        resultado = {}
+        for cenario, latencias in medicoes.items():
+            if latencias:
+                resultado[cenario] = {**resumo_latencias(latencias, duracao), 'erros': erros[cenario]}
+        todas = [latencia for latencias in medicoes.values() for latencia in latencias]
+        resultado['total'] = {**resumo_latencias(todas, duracao), 'erros': sum(erros.values())}
+        return resultado
+
+    def imprimir(self, relatorio):
+        self.stdout.write(f'\n{"jornada":<14}{"req":>8}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"erros":>7}')
+        for cenario, r in relatorio['cenarios'].items():
+            self.stdout.write(
+                f'{cenario:<14}{r["requests"]:>8}{r["rps"]:>9.1f}{r["p50"]:>9.1f}'
+                f'{r["p95"]:>9.1f}{r["p99"]:>9.1f}{r["erros"]:>7}'
+            )
+
+    def comparar(self, baseline, atual, tolerancia):
+        """ Variação de req/s e p95 por jornada; retorna as que regrediram. """
+        self.stdout.write(f'\nComparação com o baseline de {baseline.get("criado_em", "?")}:')
+        self.stdout.write(f'{"jornada":<14}{"req/s":>12}{"p95":>12}')
+
+        regressoes = []
+        for cenario, r in atual['cenarios'].items():
+            antes = baseline['cenarios'].get(cenario)
+            if not antes or not antes['rps'] or not antes['p95']:
+                continue
+            var_rps = r['rps'] / antes['rps'] - 1
+            var_p95 = r['p95'] / antes['p95'] - 1
+            regrediu = var_rps < -tolerancia or var_p95 > tolerancia
+            if regrediu:
+                regressoes.append(cenario)
+
+            linha = f'{cenario:<14}{var_rps:>+11.1%} {var_p95:>+11.1%}'
+            self.stdout.write(self.style.ERROR(linha) if regrediu else linha)
+        return regressoes
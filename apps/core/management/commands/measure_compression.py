@@ -0,0 +1,118 @@
+"""
+Economia de bytes da compressão de HTML
+=======================================
+
+Busca as páginas principais pela pilha completa de middlewares (em
+processo, django.test.Client) com três Accept-Encoding - identity, gzip e
+"br, gzip" (navegador moderno) - e mostra o tamanho de cada resposta, a
+codificação escolhida pelo CompressaoMiddleware e o custo de CPU da
+compressão.
+
+Páginas que usam o token CSRF saem em gzip com preenchimento (BREACH)
+mesmo quando o navegador aceita br - ver CompressaoMiddleware.
+
+Uso:
+    python manage.py measure_compression
+    python manage.py measure_compression --email aluno@exemplo.com --repeticoes 50
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from apps.core import compressao
+from apps.events.models import Evento
+from apps.users.models import Usuario
+
+ACCEPT_ENCODINGS = {
+    'identity': 'identity',
+    'gzip': 'gzip',
+    'navegador': 'br, gzip',
+}
+
+
+class Command(BaseCommand):
+    help = 'Mede bytes economizados pela compressão Brotli/gzip nas páginas principais.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email',
+                            help='Usuário autenticado (padrão: primeiro aluno com cadastro completo)')
+        parser.add_argument('--repeticoes', type=int, default=20,
+                            help='Repetições para medir o tempo de compressão (padrão: 20)')
+
+    def handle(self, *args, **options):
+        usuario = self._usuario(options['email'])
+        evento = Evento.objects.order_by('-participantes_confirmados', 'pk').first()
+        if evento is None:
+            raise CommandError('Nenhum evento cadastrado. Rode `seed_scale` antes.')
+
+        paginas = [
+            ('home (anônimo)', False, reverse('home'), {}),
+            ('home', True, reverse('home'), {}),
+            ('home HTMX', True, reverse('home'), {'HTTP_HX_REQUEST': 'true'}),
+            ('evento_detail', True, reverse('evento_detail', args=[evento.pk]), {}),
+            ('perfil público', True, reverse('public_profile', args=[evento.id_criador_id]), {}),
+            ('notificações', True, reverse('listar_notificacoes'), {}),
+            ('poll badge HTMX', True, reverse('contagem_notificacoes'), {'HTTP_HX_REQUEST': 'true'}),
+        ]
+
+        anonimo = Client()
+        autenticado = Client()
+        autenticado.force_login(usuario)
+
+        self.stdout.write(f'Usuário: {usuario.email}\n')
+        self.stdout.write(
+            f'{"página":<18}{"original":>10}{"gzip":>10}{"navegador":>11}{"cod.":>6}'
+            f'{"economia":>10}{"br ms":>8}{"gzip ms":>9}'
+        )
+
+        total_original = total_navegador = 0
+        for nome, logado, url, extra in paginas:
+            client = autenticado if logado else anonimo
+            tamanhos = {}
+            for rotulo, accept in ACCEPT_ENCODINGS.items():
+                resposta = client.get(url, HTTP_ACCEPT_ENCODING=accept, **extra)
+                if resposta.status_code != 200:
+                    self.stderr.write(f'  aviso: {nome} respondeu {resposta.status_code}')
+                tamanhos[rotulo] = len(resposta.content)
+                if rotulo == 'identity':
+                    original = resposta.content
+                if rotulo == 'navegador':
+                    codificacao = resposta.get('Content-Encoding', '-')
+
+            br_ms = self._tempo(original, 'br', options['repeticoes'])
+            gzip_ms = self._tempo(original, 'gzip', options['repeticoes'])
+            economia = 1 - tamanhos['navegador'] / tamanhos['identity'] if tamanhos['identity'] else 0
+            total_original += tamanhos['identity']
+            total_navegador += tamanhos['navegador']
+
+            self.stdout.write(
+                f'{nome:<18}{tamanhos["identity"]:>10}{tamanhos["gzip"]:>10}{tamanhos["navegador"]:>11}'
+                f'{codificacao:>6}{economia:>10.1%}{br_ms:>8.2f}{gzip_ms:>9.2f}'
+            )
+
+        if total_original:
+            self.stdout.write(self.style.SUCCESS(
+                f'\nTotal: {total_original} -> {total_navegador} bytes '
+                f'({1 - total_navegador / total_original:.1%} a menos)'
+            ))
+
+    @staticmethod
+    def _tempo(conteudo, codificacao, repeticoes):
+        """ Tempo médio (ms) para comprimir o corpo inteiro com o compressor do middleware. """
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            compressao.comprimir(conteudo, compressao.criar_compressor(codificacao))
+        return (time.perf_counter() - inicio) * 1000 / repeticoes
+
+    def _usuario(self, email):
+        usuarios = Usuario.objects.filter(is_active=True)
+        if email:
+            usuario = usuarios.filter(email=email).first()
+        else:
+            usuario = usuarios.filter(cadastro_completo=True, aluno__isnull=False).order_by('pk').first()
+        if usuario is None:
+            raise CommandError('Usuário não encontrado. Informe --email ou rode `seed_scale` antes.')
+        return usuario
@@ -0,0 +1,75 @@
+"""
+Perfil de imports do boot
+=========================
+
+Mede, com `python -X importtime` em um processo novo, quanto o boot do
+Django leva importando módulos - o custo pago por todo worker do gunicorn
+(sem preload), todo comando de manage.py e todo container que sobe.
+
+Mostra o total, os pacotes mais caros e os módulos com maior tempo
+acumulado. Com --orcamento-ms, termina com erro se o total passar do
+limite (útil no CI; o teste apps.core.tests.BootImportTests faz o mesmo
+com settings.BOOT_IMPORT_BUDGET_MS).
+
+Uso:
+    python manage.py profile_imports
+    python manage.py profile_imports --urls --top 40
+    python manage.py profile_imports --filtro apps --repeticoes 5
+    python manage.py profile_imports --orcamento-ms 800
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import importtime
+
+
+class Command(BaseCommand):
+    help = 'Perfil de tempo de import do boot do Django (python -X importtime).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--urls', action='store_true',
+                            help='Inclui o carregamento do URLconf (views, forms, admin)')
+        parser.add_argument('--top', type=int, default=25,
+                            help='Módulos listados por tempo acumulado (padrão: 25)')
+        parser.add_argument('--filtro', metavar='PREFIXO',
+                            help='Lista só módulos que começam com PREFIXO (ex: apps, allauth)')
+        parser.add_argument('--repeticoes', type=int, default=3,
+                            help='Execuções; vale a mais rápida, menos ruído (padrão: 3)')
+        parser.add_argument('--orcamento-ms', type=float,
+                            help='Falha se o total de import passar deste valor')
+
+    def handle(self, *args, **options):
+        codigo = importtime.CODIGO_BOOT_URLS if options['urls'] else importtime.CODIGO_BOOT
+        try:
+            execucoes = [importtime.medir(codigo) for _ in range(max(1, options['repeticoes']))]
+        except RuntimeError as erro:
+            raise CommandError(str(erro)) from erro
+        imports = min(execucoes, key=importtime.total_ms)
+        total = importtime.total_ms(imports)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Boot ({"setup + URLconf" if options["urls"] else "django.setup()"}): '
+            f'{total:.0f} ms em {len(imports)} módulos (melhor de {len(execucoes)})'
+        ))
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nPor pacote (tempo próprio)'))
+        for pacote, ms in list(importtime.por_pacote(imports).items())[:15]:
+            self.stdout.write(f'  {pacote:<32}{ms:>9.1f} ms{ms / total:>8.1%}')
+
+        modulos = imports
+        if options['filtro']:
+            modulos = [item for item in imports if item.modulo.startswith(options['filtro'])]
+        modulos = sorted(modulos, key=lambda item: -item.acumulado_us)[:options['top']]
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nMódulos (tempo acumulado)'))
+        self.stdout.write(f'  {"módulo":<56}{"acumulado":>12}{"próprio":>10}')
+        for item in modulos:
+            self.stdout.write(
+                f'  {item.modulo:<56}{item.acumulado_us / 1000:>9.1f} ms{item.proprio_us / 1000:>7.1f} ms'
+            )
+
+        orcamento = options['orcamento_ms']
+        if orcamento is not None:
+            if total > orcamento:
+                raise CommandError(f'Boot de {total:.0f} ms acima do orçamento de {orcamento:.0f} ms.')
+            self.stdout.write(self.style.SUCCESS(f'\nDentro do orçamento de {orcamento:.0f} ms.'))
@@ -0,0 +1,168 @@
+"""
+Tempo de render por template
+============================
+
+Renderiza as páginas principais pela pilha completa (em processo,
+django.test.Client, usuário autenticado) em três configurações e mostra,
+por template, o tempo inclusivo (com includes e o base.html herdado) e o
+número de renders. Os blocos {% cache %} aparecem como linhas próprias
+("{% cache layout_menus %}", "{% cache evento_detalhe %}"): é onde os
+fragmentos economizam.
+
+Configurações:
+
+    sem cache   loaders sem cache + fragmentos desligados
+    loader      loader com cache (settings.TEMPLATES)
+    fragmentos  loader com cache + {% cache %} dos menus do base.html e do
+                conteúdo público da página do evento
+
+O primeiro request de cada configuração é descartado (aquece o loader e
+grava os fragmentos).
+
+Uso:
+    python manage.py profile_templates
+    python manage.py profile_templates --paginas evento_detail notificacoes --repeticoes 20
+"""
+
+import copy
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template.base import Template
+from django.templatetags.cache import CacheNode
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from apps.events.models import Evento
+from apps.users.models import Usuario
+
+PAGINAS = ['home', 'evento_detail', 'perfil', 'notificacoes']
+
+
+class Cronometro:
+    """
+    Envolve Template._render (chamado por render, include e extends) e
+    CacheNode.render, acumulando tempo e renders por nome.
+    """
+
+    def __init__(self):
+        self.tempos = defaultdict(float)
+        self.renders = defaultdict(int)
+        self._originais = {}
+
+    def __enter__(self):
+        self._envolver(Template, '_render', lambda template: template.origin.template_name or '<string>')
+        self._envolver(CacheNode, 'render', lambda node: f'{{% cache {node.fragment_name} %}}')
+        return self
+
+    def __exit__(self, *exc):
+        for (classe, metodo), original in self._originais.items():
+            setattr(classe, metodo, original)
+
+    def _envolver(self, classe, metodo, nomear):
+        original = self._originais[classe, metodo] = getattr(classe, metodo)
+
+        def medido(objeto, context):
+            inicio = time.perf_counter()
+            try:
+                return original(objeto, context)
+            finally:
+                nome = nomear(objeto)
+                self.tempos[nome] += (time.perf_counter() - inicio) * 1000
+                self.renders[nome] += 1
+
+        setattr(classe, metodo, medido)
+
+
+def templates_sem_cache():
+    """ settings.TEMPLATES com os loaders de dentro do cached.Loader. """
+    templates = copy.deepcopy(settings.TEMPLATES)
+    for backend in templates:
+        loaders = backend.get('OPTIONS', {}).get('loaders', [])
+        backend['OPTIONS']['loaders'] = [
+            item for loader in loaders
+            for item in (loader[1] if isinstance(loader, tuple) and loader[0].endswith('cached.Loader') else [loader])
+        ]
+    return templates
+
+
+class Command(BaseCommand):
+    help = 'Tempo de render por template com e sem loader em cache e cache de fragmentos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paginas', nargs='+', choices=PAGINAS, default=PAGINAS)
+        parser.add_argument('--repeticoes', type=int, default=10, help='Requests medidos por página (padrão: 10)')
+        parser.add_argument('--top', type=int, default=12, help='Templates listados (padrão: 12)')
+        parser.add_argument('--email', help='Usuário autenticado (padrão: primeiro aluno com cadastro completo)')
+
+    def handle(self, *args, **options):
+        usuario = self._usuario(options['email'])
+        evento = Evento.objects.order_by('-participantes_confirmados', 'pk').first()
+        if evento is None:
+            raise CommandError('Nenhum evento cadastrado. Rode `seed_scale` antes.')
+        urls = {
+            'home': reverse('home'),
+            'evento_detail': reverse('evento_detail', args=[evento.pk]),
+            'perfil': reverse('public_profile', args=[evento.id_criador_id]),
+            'notificacoes': reverse('listar_notificacoes'),
+        }
+
+        configuracoes = {
+            'sem cache': {'TEMPLATES': templates_sem_cache(), 'LAYOUT_CACHE_TIMEOUT': 0, 'EVENTO_CACHE_TIMEOUT': 0},
+            'loader': {'LAYOUT_CACHE_TIMEOUT': 0, 'EVENTO_CACHE_TIMEOUT': 0},
+            'fragmentos': {},
+        }
+
+        for pagina in options['paginas']:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{pagina} ({urls[pagina]})'))
+            resultados = {}
+            for nome, ajustes in configuracoes.items():
+                with override_settings(**ajustes):
+                    resultados[nome] = self._medir(usuario, urls[pagina], options['repeticoes'])
+            self._imprimir(resultados, options['repeticoes'], options['top'])
+
+    def _medir(self, usuario, url, repeticoes):
+        client = Client()
+        client.force_login(usuario)
+        client.get(url)  # aquecimento
+
+        with Cronometro() as cronometro:
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                resposta = client.get(url)
+                if resposta.status_code != 200:
+                    raise CommandError(f'{url} respondeu {resposta.status_code}')
+            total = (time.perf_counter() - inicio) * 1000
+        return total, cronometro
+
+    def _imprimir(self, resultados, repeticoes, top):
+        nomes = list(resultados)
+        self.stdout.write(
+            f'  {"template":<48}' + ''.join(f'{nome + " ms":>16}' for nome in nomes) + f'{"renders":>9}'
+        )
+
+        base = resultados[nomes[0]][1]
+        templates = sorted(base.tempos, key=lambda t: -base.tempos[t])[:top]
+        for template in templates:
+            self.stdout.write(
+                f'  {template[-48:]:<48}'
+                + ''.join(f'{resultados[nome][1].tempos.get(template, 0) / repeticoes:>16.2f}' for nome in nomes)
+                + f'{base.renders[template] // repeticoes:>9}'
+            )
+        self.stdout.write(
+            f'  {"request inteiro":<48}'
+            + ''.join(f'{resultados[nome][0] / repeticoes:>16.2f}' for nome in nomes)
+        )
+
+    def _usuario(self, email):
+        usuarios = Usuario.objects.filter(is_active=True)
+        if email:
+            usuario = usuarios.filter(email=email).first()
+        else:
+            usuario = usuarios.filter(cadastro_completo=True, aluno__isnull=False).order_by('pk').first()
+        if usuario is None:
+            raise CommandError('Usuário não encontrado. Informe --email ou rode `seed_scale` antes.')
+        return usuario
@@ -0,0 +1,551 @@
+"""
+Gerador de massa de dados para testes de carga
+==============================================
+
+Gera usuários (alunos e profissionais), eventos, inscrições, curtidas de
+presença, históricos de assinatura e fotos em volume de produção, para
+medir consultas, índices e views com dados realistas.
+
+- Determinístico: o mesmo --seed (e o mesmo --lote) gera os mesmos dados,
+  com qualquer número de workers (cada bloco tem seu próprio gerador).
+- Rápido: bulk_create em lotes grandes, blocos distribuídos entre
+  processos (--workers). No SQLite roda com um processo só (o banco
+  serializa as escritas de qualquer forma).
+- Distribuição com cauda longa (Zipf): poucos eventos concentram muitas
+  inscrições (--skew-eventos) e poucos usuários fazem muitas inscrições e
+  curtidas (--skew-usuarios). 0 = distribuição uniforme.
+
+Os usuários gerados têm e-mail em @seed.movibes.local, e --limpar apaga
+tudo que foi gerado antes (os dados reais não são tocados).
+
+Uso:
+    python manage.py seed_scale
+    python manage.py seed_scale --usuarios 200000 --eventos 300000 \\
+        --inscricoes 3000000 --curtidas 2000000 --workers 8
+    python manage.py seed_scale --limpar
+"""
+
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.events.models import CategoriaEvento, Evento, FotoEvento, Inscricao, InteracaoPresenca
+from apps.users.models import (
+    Aluno,
+    AssinaturaPremium,
+    FotoUsuario,
+    Profissional,
+    TipoPlano,
+    Usuario,
+)
+
+DOMINIO = 'seed.movibes.local'
+SENHA = 'seed-movibes'
+
+NOMES = [
+    'Ana', 'Bruno', 'Camila', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela',
+    'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Thiago',
+    'Vitória', 'Yuri',
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Rodrigues', 'Almeida',
+    'Nascimento', 'Carvalho', 'Araújo', 'Ribeiro', 'Gomes', 'Barbosa', 'Rocha',
+]
+CIDADES = {
+    'Fortaleza': ['Meireles', 'Aldeota', 'Praia de Iracema', 'Cocó', 'Benfica', 'Messejana'],
+    'Recife': ['Boa Viagem', 'Casa Forte', 'Pina', 'Graças'],
+    'Natal': ['Ponta Negra', 'Tirol', 'Petrópolis'],
+    'Salvador': ['Barra', 'Rio Vermelho', 'Pituba', 'Itapuã'],
+}
+ESPECIALIDADES = ['Personal trainer', 'Educador físico', 'Treinador de corrida', 'Instrutor de yoga',
+                  'Professor de beach tênis', 'Preparador físico']
+
+# Estado de cada processo worker (preenchido por _inicializar)
+_CONTEXTO = {}
+
+
+# ----------------------------------------------------------------------
+# Funções auxiliares (rodam nos workers)
+# ----------------------------------------------------------------------
+
+def _inicializar(contexto, processo_filho=True):
+    """ Initializer dos workers: recebe o contexto e abre conexões próprias. """
+    if processo_filho:
+        import django
+        from django.apps import apps
+
+        if not apps.ready:
+            django.setup()  # método 'spawn': o processo começa do zero
+        connections.close_all()  # método 'fork': não reutilizar o socket do pai
+    _CONTEXTO.clear()
+    _CONTEXTO.update(contexto)
+
+
+def _gerador(fase, bloco):
+    return random.Random(f'{_CONTEXTO["seed"]}:{fase}:{bloco}')
+
+
+def pesos_zipf(n, expoente):
+    """ Pesos acumulados de uma Zipf com n itens (None = uniforme). """
+    if expoente <= 0 or n == 0:
+        return None
+    return list(accumulate(1 / (posicao + 1) ** expoente for posicao in range(n)))
+
+
+def _sortear(rng, itens, pesos, k):
+    """ k itens (com repetição) de `itens`, respeitando os pesos acumulados. """
+    if pesos is None:
+        return [itens[rng.randrange(len(itens))] for _ in range(k)]
+    return [itens[posicao] for posicao in rng.choices(range(len(itens)), cum_weights=pesos, k=k)]
+
+
+def _bloco_usuarios(bloco):
+    inicio, fim = bloco
+    rng = _gerador('usuarios', inicio)
+    agora = timezone.now()
+    usuarios = [
+        Usuario(
+            email=f'seed{i:08d}@{DOMINIO}',
+            password=_CONTEXTO['senha'],
+            first_name=rng.choice(NOMES),
+            last_name=rng.choice(SOBRENOMES),
+            cadastro_completo=True,
+            perfil_escolhido=True,
+            date_joined=agora - timedelta(days=rng.randrange(1, 900)),
+        )
+        for i in range(inicio, fim)
+    ]
+    Usuario.objects.bulk_create(usuarios, batch_size=_CONTEXTO['lote'])
+    return len(usuarios)
+
+
+def _bloco_perfis(bloco):
+    inicio, fim = bloco
+    rng = _gerador('perfis', inicio)
+    pks = _CONTEXTO['usuarios_pk']
+    profissional = _CONTEXTO['eh_profissional']
+
+    alunos, profissionais = [], []
+    for i in range(inicio, fim):
+        if profissional(i):
+            profissionais.append(Profissional(
+                usuario_id=pks[i],
+                especialidade=rng.choice(ESPECIALIDADES),
+                num_conselho_classe=f'CREF {rng.randrange(10000, 99999)}-G/CE',
+            ))
+        else:
+            cidade = rng.choice(list(CIDADES))
+            alunos.append(Aluno(
+                usuario_id=pks[i],
+                cidade=cidade,
+                bairro=rng.choice(CIDADES[cidade]),
+                estado='CE',
+                sexo=rng.choice([valor for valor, _ in Aluno.SEXO_CHOICES]),
+                nivel_pratica=rng.choice([valor for valor, _ in Aluno.NIVEL_PRATICA_CHOICES]),
+                periodos_preferidos=rng.choice([valor for valor, _ in Aluno.PERIODOS_CHOICES]),
+            ))
+    Aluno.objects.bulk_create(alunos, batch_size=_CONTEXTO['lote'])
+    Profissional.objects.bulk_create(profissionais, batch_size=_CONTEXTO['lote'])
+    return len(alunos) + len(profissionais)
+
+
+def _bloco_eventos(bloco):
+    inicio, fim = bloco
+    rng = _gerador('eventos', inicio)
+    agora = timezone.now()
+    criadores = _sortear(rng, _CONTEXTO['profissionais_pk'], _CONTEXTO['pesos_profissionais'], fim - inicio)
+
+    eventos = []
+    for i, criador in zip(range(inicio, fim), criadores, strict=True):
+        categoria_id, categoria_nome = rng.choice(_CONTEXTO['categorias'])
+        cidade = rng.choice(list(CIDADES))
+        eh_pago = rng.random() < 0.3
+        eventos.append(Evento(
+            nome_evento=f'{categoria_nome} {rng.choice(CIDADES[cidade])} seed #{i:08d}',
+            descricao_do_evento='Evento gerado pelo seed_scale.',
+            status=rng.choice(['confirmado', 'confirmado', 'aberto']),
+            eh_pago=eh_pago,
+            preco=Decimal(rng.randrange(15, 120)) if eh_pago else None,
+            vagas_restantes=rng.randrange(0, 40),
+            data_e_hora=agora + timedelta(minutes=rng.randrange(-365 * 24 * 60, 180 * 24 * 60)),
+            localizacao_cidade=cidade,
+            localizacao_bairro_endereco=rng.choice(CIDADES[cidade]),
+            categoria_id=categoria_id,
+            id_criador_id=criador,
+        ))
+    Evento.objects.bulk_create(eventos, batch_size=_CONTEXTO['lote'])
+    return len(eventos)
+
+
+def _bloco_inscricoes(bloco):
+    numero, quantidade = bloco
+    rng = _gerador('inscricoes', numero)
+    alunos = _sortear(rng, _CONTEXTO['alunos_pk'], _CONTEXTO['pesos_alunos'], quantidade)
+    eventos = _sortear(rng, _CONTEXTO['eventos_pk'], _CONTEXTO['pesos_eventos'], quantidade)
+
+    inscricoes = [
+        Inscricao(id_aluno_id=aluno, id_evento_id=evento) for aluno, evento in zip(alunos, eventos, strict=True)
+    ]
+    # Pares repetidos (mesmo aluno no mesmo evento) são descartados pelo banco
+    Inscricao.objects.bulk_create(inscricoes, batch_size=_CONTEXTO['lote'], ignore_conflicts=True)
+    return len(inscricoes)
+
+
+def _bloco_curtidas(bloco):
+    numero, quantidade = bloco
+    rng = _gerador('curtidas', numero)
+    inscricoes = _CONTEXTO['inscricoes']
+    autores = _sortear(rng, _CONTEXTO['alunos_pk'], _CONTEXTO['pesos_alunos'], quantidade)
+    agora = timezone.now()
+
+    curtidas = []
+    for autor in autores:
+        inscricao_pk, dono, evento_pk = inscricoes[rng.randrange(len(inscricoes))]
+        if dono == autor:
+            continue
+        aceita = rng.random() < 0.3
+        curtidas.append(InteracaoPresenca(
+            autor_id=autor,
+            inscricao_alvo_id=inscricao_pk,
+            alvo_usuario_id=dono,
+            evento_id=evento_pk,
+            status_retorno='aceito' if aceita else 'pendente',
+            # Matches espalhados pelos últimos 90 dias
+            retribuida_em=agora - timedelta(seconds=rng.randrange(90 * 86400)) if aceita else None,
+            lida_pelo_alvo=rng.random() < 0.7,
+            lida_pelo_autor=aceita and rng.random() < 0.5,
+        ))
+    InteracaoPresenca.objects.bulk_create(curtidas, batch_size=_CONTEXTO['lote'], ignore_conflicts=True)
+    return len(curtidas)
+
+
+def _bloco_assinaturas(bloco):
+    """ Histórico de assinaturas (períodos seguidos) de cada assinante do bloco. """
+    inicio, fim = bloco
+    rng = _gerador('assinaturas', inicio)
+    agora = timezone.now()
+    pks = _CONTEXTO['usuarios_pk']
+    planos = _CONTEXTO['planos']
+
+    assinaturas = []
+    for i in range(inicio, fim):
+        tipo = 'profissional' if _CONTEXTO['eh_profissional'](i) else 'aluno'
+        if tipo == 'aluno' and rng.random() >= _CONTEXTO['fracao_assinantes']:
+            continue
+        if not planos.get(tipo):
+            continue
+
+        plano_id, valor, meses = rng.choice(planos[tipo])
+        periodos = min(12, 1 + int(rng.expovariate(0.5)))
+        # Último período termina entre 300 dias atrás e 300 dias à frente
+        fim_periodo = agora + timedelta(days=rng.randrange(-300, 300))
+        historico = []
+        for _ in range(periodos):
+            inicio_periodo = fim_periodo - timedelta(days=30 * meses)
+            historico.append((inicio_periodo, fim_periodo))
+            fim_periodo = inicio_periodo
+        historico.reverse()
+
+        for numero, (data_inicio, data_expiracao) in enumerate(historico):
+            ultimo = numero == len(historico) - 1
+            cancelada = ultimo and rng.random() < 0.15
+            if data_expiracao < agora:
+                status = 'cancelada' if cancelada else 'expirada'
+            else:
+                status = 'ativa'
+            assinaturas.append(AssinaturaPremium(
+                usuario_id=pks[i],
+                tipo_plano_id=plano_id,
+                status=status,
+                data_inicio=data_inicio,
+                data_expiracao=data_expiracao,
+                data_cancelamento=data_expiracao - timedelta(days=rng.randrange(1, 20)) if cancelada else None,
+                cancelada_pelo_usuario=cancelada,
+                renovacao_automatica=not cancelada,
+                valor_pago=valor,
+                metodo_pagamento='mock',
+                id_transacao_externa=f'seed-{i}-{numero}',
+            ))
+    AssinaturaPremium.objects.bulk_create(assinaturas, batch_size=_CONTEXTO['lote'])
+    return len(assinaturas)
+
+
+def _bloco_fotos(bloco):
+    numero, fotos_usuarios, fotos_eventos = bloco
+    rng = _gerador('fotos', numero)
+
+    usuarios = _sortear(rng, _CONTEXTO['usuarios_pk'], None, fotos_usuarios)
+    FotoUsuario.objects.bulk_create([
+        FotoUsuario(usuario_id=usuario, imagem=f'user_gallery/seed/{numero}_{n}.jpg', legenda='Treino')
+        for n, usuario in enumerate(usuarios)
+    ], batch_size=_CONTEXTO['lote'])
+
+    eventos = _sortear(rng, _CONTEXTO['eventos_pk'], _CONTEXTO['pesos_eventos'], fotos_eventos)
+    autores = _sortear(rng, _CONTEXTO['alunos_pk'], None, fotos_eventos)
+    FotoEvento.objects.bulk_create([
+        FotoEvento(evento_id=evento, usuario_id=autor, imagem=f'event_gallery/seed/{numero}_{n}.jpg')
+        for n, (evento, autor) in enumerate(zip(eventos, autores, strict=True))
+    ], batch_size=_CONTEXTO['lote'])
+    return fotos_usuarios + fotos_eventos
+
+
+class EhProfissional:
+    """ Um a cada `passo` usuários é profissional (picklável para os workers). """
+
+    def __init__(self, passo):
+        self.passo = passo
+
+    def __call__(self, indice):
+        return indice % self.passo == 0
+
+
+# ----------------------------------------------------------------------
+# Comando
+# ----------------------------------------------------------------------
+
+class Command(BaseCommand):
+    help = 'Gera uma massa de dados determinística e em grande volume para testes de carga.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=20000, help='Usuários (padrão: 20000)')
+        parser.add_argument('--fracao-profissionais', type=float, default=0.05,
+                            help='Fração de profissionais entre os usuários (padrão: 0.05)')
+        parser.add_argument('--eventos', type=int, default=30000, help='Eventos (padrão: 30000)')
+        parser.add_argument('--inscricoes', type=int, default=300000,
+                            help='Inscrições sorteadas; pares repetidos são descartados (padrão: 300000)')
+        parser.add_argument('--curtidas', type=int, default=200000,
+                            help='Curtidas de presença sorteadas (padrão: 200000)')
+        parser.add_argument('--fracao-assinantes', type=float, default=0.2,
+                            help='Fração de alunos com histórico de assinatura (padrão: 0.2)')
+        parser.add_argument('--fotos-usuarios', type=int, default=20000, help='Fotos de galeria de usuários')
+        parser.add_argument('--fotos-eventos', type=int, default=20000, help='Fotos de galeria de eventos')
+        parser.add_argument('--skew-eventos', type=float, default=1.1,
+                            help='Expoente Zipf da popularidade dos eventos (0 = uniforme)')
+        parser.add_argument('--skew-usuarios', type=float, default=0.9,
+                            help='Expoente Zipf da atividade dos usuários (0 = uniforme)')
+        parser.add_argument('--seed', type=int, default=42, help='Semente dos geradores (padrão: 42)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processos em paralelo (padrão: nº de CPUs; 1 no SQLite)')
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Linhas por bloco e por bulk_create (padrão: 5000)')
+        parser.add_argument('--limpar', action='store_true',
+                            help=f'Apaga os dados gerados anteriormente (@{DOMINIO}) e sai')
+
+    def handle(self, *args, **options):
+        self.lote = options['lote']
+        self.workers = max(1, options['workers'])
+        if connection.vendor == 'sqlite' and self.workers > 1:
+            self.stdout.write('SQLite: usando 1 worker (o banco não aceita escritas em paralelo).')
+            self.workers = 1
+
+        if options['limpar']:
+            self.limpar()
+            return
+
+        if Usuario.objects.filter(email__endswith=f'@{DOMINIO}').exists():
+            raise CommandError('Já existem dados gerados. Rode com --limpar antes de gerar de novo.')
+
+        categorias = list(CategoriaEvento.objects.order_by('nome').values_list('pk', 'nome'))
+        if not categorias:
+            raise CommandError('Nenhuma CategoriaEvento cadastrada (rode as migrações).')
+
+        planos = {}
+        for plano in TipoPlano.objects.filter(ativo=True).order_by('tipo_usuario', 'ordem', 'pk'):
+            planos.setdefault(plano.tipo_usuario, []).append(
+                (plano.pk, plano.valor_com_desconto(), plano.meses_duracao())
+            )
+
+        n_usuarios = options['usuarios']
+        fracao = options['fracao_profissionais']
+        passo = max(1, round(1 / fracao)) if fracao > 0 else n_usuarios + 1
+        contexto = {
+            'seed': options['seed'],
+            'lote': self.lote,
+            'senha': make_password(SENHA),
+            'categorias': categorias,
+            'planos': planos,
+            'fracao_assinantes': options['fracao_assinantes'],
+            'eh_profissional': EhProfissional(passo),
+        }
+
+        inicio = time.monotonic()
+
+        # 1. Usuários e perfis
+        self.fase('usuários', _bloco_usuarios, self.intervalos(n_usuarios), contexto)
+        usuarios_pk = self.pks_por_indice(n_usuarios)
+        contexto['usuarios_pk'] = usuarios_pk
+        self.fase('perfis', _bloco_perfis, self.intervalos(n_usuarios), contexto)
+
+        eh_profissional = contexto['eh_profissional']
+        profissionais_pk = [pk for i, pk in enumerate(usuarios_pk) if eh_profissional(i)]
+        alunos_pk = [pk for i, pk in enumerate(usuarios_pk) if not eh_profissional(i)]
+        if not profissionais_pk or not alunos_pk:
+            raise CommandError(
+                'É preciso ao menos um aluno e um profissional (ajuste --usuarios/--fracao-profissionais).'
+            )
+
+        # Os mais ativos são espalhados pela lista (a ordem de "popularidade"
+        # é uma permutação determinística, não a ordem de criação)
+        rng = random.Random(f'{options["seed"]}:permutacoes')
+        rng.shuffle(profissionais_pk)
+        rng.shuffle(alunos_pk)
+        contexto.update({
+            'profissionais_pk': profissionais_pk,
+            'alunos_pk': alunos_pk,
+            'pesos_profissionais': pesos_zipf(len(profissionais_pk), options['skew_usuarios']),
+            'pesos_alunos': pesos_zipf(len(alunos_pk), options['skew_usuarios']),
+        })
+
+        # 2. Eventos
+        self.fase('eventos', _bloco_eventos, self.intervalos(options['eventos']), contexto)
+        eventos_pk = self.eventos_por_indice(options['eventos'])
+        rng.shuffle(eventos_pk)
+        contexto.update({
+            'eventos_pk': eventos_pk,
+            'pesos_eventos': pesos_zipf(len(eventos_pk), options['skew_eventos']),
+        })
+
+        # 3. Inscrições (+ contadores dos eventos)
+        self.fase('inscrições', _bloco_inscricoes, self.blocos(options['inscricoes']), contexto)
+        self.atualizar_contadores_eventos()
+
+        # 4. Curtidas de presença (+ contadores das inscrições)
+        contexto['inscricoes'] = self.inscricoes_ordenadas(usuarios_pk, eventos_pk)
+        if contexto['inscricoes']:
+            self.fase('curtidas', _bloco_curtidas, self.blocos(options['curtidas']), contexto)
+            self.atualizar_contadores_curtidas()
+        del contexto['inscricoes']
+
+        # 5. Assinaturas (+ snapshot nos usuários)
+        self.fase('assinaturas', _bloco_assinaturas, self.intervalos(n_usuarios), contexto)
+        for posicao in range(0, n_usuarios, self.lote):
+            Usuario.objects.sincronizar_snapshots_em_lote(usuarios_pk[posicao:posicao + self.lote])
+
+        # 6. Fotos
+        fotos_usuarios, fotos_eventos = options['fotos_usuarios'], options['fotos_eventos']
+        blocos_fotos = [
+            (numero, max(0, min(self.lote, fotos_usuarios - inicio)), max(0, min(self.lote, fotos_eventos - inicio)))
+            for numero, inicio in enumerate(range(0, max(fotos_usuarios, fotos_eventos), self.lote))
+        ]
+        self.fase('fotos', _bloco_fotos, blocos_fotos, contexto)
+
+        self.stdout.write(self.style.SUCCESS(f'Concluído em {time.monotonic() - inicio:.1f}s.'))
+
+    # ------------------------------------------------------------------
+
+    def intervalos(self, total):
+        """ Blocos [início, fim) de índices. """
+        return [(inicio, min(total, inicio + self.lote)) for inicio in range(0, total, self.lote)]
+
+    def blocos(self, total):
+        """ Blocos (número, quantidade) para fases sorteadas. """
+        return [(numero, min(self.lote, total - inicio))
+                for numero, inicio in enumerate(range(0, total, self.lote))]
+
+    def fase(self, nome, funcao, blocos, contexto):
+        inicio = time.monotonic()
+        if self.workers == 1:
+            _inicializar(contexto, processo_filho=False)
+            total = sum(funcao(bloco) for bloco in blocos)
+        else:
+            # Os filhos abrem conexões próprias; as do pai não podem ser herdadas
+            connections.close_all()
+            metodo = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(metodo),
+                initializer=_inicializar,
+                initargs=(contexto,),
+            ) as executor:
+                total = sum(executor.map(funcao, blocos))
+
+        duracao = time.monotonic() - inicio
+        por_segundo = total / duracao if duracao > 0 else 0
+        self.stdout.write(f'  {nome:<12} {total:>10,} linhas em {duracao:6.1f}s ({por_segundo:,.0f}/s)')
+
+    def pks_por_indice(self, total):
+        """ pk de cada usuário gerado, na ordem do índice (pelo e-mail seedNNNNNNNN@). """
+        pks = [None] * total
+        linhas = Usuario.objects.filter(email__endswith=f'@{DOMINIO}').values_list('email', 'pk')
+        for email, pk in linhas.iterator(chunk_size=self.lote):
+            pks[int(email[4:12])] = pk
+        return pks
+
+    def eventos_por_indice(self, total):
+        pks = [None] * total
+        linhas = Evento.objects.filter(
+            id_criador__email__endswith=f'@{DOMINIO}', nome_evento__contains=' seed #'
+        ).values_list('nome_evento', 'pk')
+        for nome, pk in linhas.iterator(chunk_size=self.lote):
+            pks[int(nome.rsplit('#', 1)[1])] = pk
+        return pks
+
+    def inscricoes_ordenadas(self, usuarios_pk, eventos_pk):
+        """
+        (pk, dono, evento) das inscrições geradas, em ordem determinística (índices
+        de aluno e evento, não a ordem de inserção, que varia entre workers).
+        """
+        indice_usuario = {pk: i for i, pk in enumerate(usuarios_pk)}
+        indice_evento = {pk: i for i, pk in enumerate(eventos_pk)}
+        linhas = Inscricao.objects.filter(
+            id_evento__id_criador__email__endswith=f'@{DOMINIO}'
+        ).values_list('pk', 'id_aluno_id', 'id_evento_id')
+
+        inscricoes = sorted(
+            linhas.iterator(chunk_size=self.lote),
+            key=lambda linha: (indice_usuario[linha[1]], indice_evento[linha[2]])
+        )
+        return inscricoes
+
+    def atualizar_contadores_eventos(self):
+        inscritos = Inscricao.objects.filter(id_evento=OuterRef('pk')).values('id_evento').annotate(
+            total=Count('pk')
+        ).values('total')
+        Evento.objects.filter(id_criador__email__endswith=f'@{DOMINIO}').update(
+            participantes_confirmados=Coalesce(Subquery(inscritos), 0)
+        )
+
+    def atualizar_contadores_curtidas(self):
+        curtidas = InteracaoPresenca.objects.filter(inscricao_alvo=OuterRef('pk')).values('inscricao_alvo').annotate(
+            total=Count('pk')
+        ).values('total')
+        Inscricao.objects.filter(id_evento__id_criador__email__endswith=f'@{DOMINIO}').update(
+            curtidas_count=Coalesce(Subquery(curtidas), 0)
+        )
+
+    def limpar(self):
+        """
+        Apaga os dados gerados, das tabelas "folha" para as principais, em
+        lotes (um único DELETE em cascata seria uma transação enorme).
+        """
+        filtro_usuario = {'email__endswith': f'@{DOMINIO}'}
+        etapas = [
+            ('curtidas', InteracaoPresenca.objects.filter(autor__email__endswith=f'@{DOMINIO}')),
+            ('fotos de eventos', FotoEvento.objects.filter(usuario__email__endswith=f'@{DOMINIO}')),
+            ('fotos de usuários', FotoUsuario.objects.filter(usuario__email__endswith=f'@{DOMINIO}')),
+            ('inscrições', Inscricao.objects.filter(id_aluno__usuario__email__endswith=f'@{DOMINIO}')),
+            ('eventos', Evento.objects.filter(id_criador__email__endswith=f'@{DOMINIO}')),
+            ('assinaturas', AssinaturaPremium.objects.filter(usuario__email__endswith=f'@{DOMINIO}')),
+            ('usuários', Usuario.objects.filter(**filtro_usuario)),
+        ]
+        for nome, queryset in etapas:
+            inicio = time.monotonic()
+            total = 0
+            while True:
+                pks = list(queryset.values_list('pk', flat=True)[:self.lote])
+                if not pks:
+                    break
+                total += queryset.model.objects.filter(pk__in=pks).delete()[1].get(queryset.model._meta.label, 0)
+            self.stdout.write(f'  {nome:<18} {total:>10,} apagados em {time.monotonic() - inicio:6.1f}s')
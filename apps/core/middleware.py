@@ -0,0 +1,248 @@
+"""
+Middlewares do projeto
+======================
+
+Todos funcionam nos dois modos (WSGI e ASGI): sob ASGI, um middleware só
+síncrono obrigaria cada request a trocar de thread na ida e na volta.
+
+EstaticosMiddleware: WhiteNoise com caminho async (ver a classe).
+
+CompressaoMiddleware: Brotli/gzip para HTML e partials HTMX (ver a classe).
+
+
+ServerTimingMiddleware mede, por request amostrado:
+- consultas ao banco (quantidade e tempo), via connection.execute_wrapper;
+- tempo de renderização de templates;
+- acertos e falhas da camada de cache (apps.core.cache);
+- tempo total.
+
+O resultado vai no header `Server-Timing` (aparece na aba Network do
+navegador) e em uma linha JSON no logger 'movibes.performance', com o nome
+da URL para agregar por view.
+
+Configuração (settings.py):
+- SERVER_TIMING_ENABLED: desligado, o middleware se remove da pilha
+  (MiddlewareNotUsed) e não custa nada.
+- SERVER_TIMING_SAMPLE_RATE: fração dos requests medidos (0.0 a 1.0).
+"""
+
+import json
+import logging
+import random
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import compressao
+from .instrumentacao import Medicao, instalar_cronometro_templates, medindo
+
+logger = logging.getLogger('movibes.performance')
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.taxa_amostragem = settings.SERVER_TIMING_SAMPLE_RATE
+        instalar_cronometro_templates()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.amostrar():
+            return self.get_response(request)
+
+        medicao = Medicao()
+        with self.medindo_request(medicao):
+            response = self.get_response(request)
+        return self.finalizar(request, response, medicao)
+
+    async def __acall__(self, request):
+        if not self.amostrar():
+            return await self.get_response(request)
+
+        # O ORM async roda as consultas na thread "sensível" do request
+        # (sync_to_async), que tem conexões próprias: os execute_wrappers
+        # são instalados e removidos lá, não no event loop
+        medicao = Medicao()
+        wrappers = ExitStack()
+        await sync_to_async(self.instalar_wrappers)(wrappers, medicao)
+        try:
+            with medindo(medicao):
+                response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrappers.close)()
+        return self.finalizar(request, response, medicao)
+
+    def amostrar(self):
+        return self.taxa_amostragem >= 1 or random.random() < self.taxa_amostragem
+
+    @classmethod
+    @contextmanager
+    def medindo_request(cls, medicao):
+        with medindo(medicao), ExitStack() as pilha:
+            cls.instalar_wrappers(pilha, medicao)
+            yield
+
+    @staticmethod
+    def instalar_wrappers(pilha, medicao):
+        for conexao in connections.all():
+            pilha.enter_context(conexao.execute_wrapper(medicao))
+
+    def finalizar(self, request, response, medicao):
+        total_ms = medicao.total_ms
+        response['Server-Timing'] = self.header(medicao, total_ms)
+        self.registrar(request, response, medicao, total_ms)
+        return response
+
+    @staticmethod
+    def header(medicao, total_ms):
+        return ', '.join([
+            f'db;dur={medicao.db_ms:.1f};desc="{medicao.db_consultas} consultas"',
+            f'tpl;dur={medicao.template_ms:.1f};desc="templates"',
+            f'cache;desc="acertos={medicao.cache_acertos} falhas={medicao.cache_falhas}"',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+    @staticmethod
+    def registrar(request, response, medicao, total_ms):
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'url_name': match.view_name if match else None,
+            'metodo': request.method,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'db_consultas': medicao.db_consultas,
+            'db_ms': round(medicao.db_ms, 2),
+            'template_ms': round(medicao.template_ms, 2),
+            'cache_acertos': medicao.cache_acertos,
+            'cache_falhas': medicao.cache_falhas,
+        }))
+
+
+class EstaticosMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware que também roda em modo async (ASGI).
+
+    O original é só síncrono: sob ASGI, o Django o envolveria em
+    sync_to_async/async_to_sync e TODO request pagaria duas trocas de
+    thread. Aqui a busca do arquivo é um dicionário em memória (ou disco,
+    com autorefresh em desenvolvimento) e só os estáticos saem do loop.
+    """
+
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class CompressaoMiddleware:
+    """
+    Comprime respostas HTML (páginas e partials HTMX) com Brotli ou gzip,
+    conforme o Accept-Encoding, inclusive em streaming.
+
+    - Só text/html, JSON e texto, sem Content-Encoding (os estáticos já
+      saem pré-comprimidos do WhiteNoise) e a partir de
+      COMPRESSION_MIN_BYTES - abaixo disso o ganho não paga o custo.
+    - BREACH: uma página que usou o token CSRF (o CsrfViewMiddleware
+      então renova o cookie na resposta) carrega um segredo. O token do Django já é
+      mascarado com sal aleatório a cada resposta; além disso essas
+      respostas vão em gzip com preenchimento aleatório no cabeçalho
+      ("Heal The Breach", o mesmo do GZipMiddleware do Django), que muda o
+      tamanho a cada request. O Brotli não tem onde pôr esse
+      preenchimento, então fica para as respostas sem token (a maioria
+      dos partials HTMX).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    TIPOS = ('text/html', 'application/json', 'text/plain')
+    MAX_BYTES_ALEATORIOS = 100
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.tamanho_minimo = settings.COMPRESSION_MIN_BYTES
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.comprimir(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.comprimir(request, await self.get_response(request))
+
+    def comprimir(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if response.get('Content-Type', '').split(';', 1)[0].strip() not in self.TIPOS:
+            return response
+        if not response.streaming and len(response.content) < self.tamanho_minimo:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        aceitas = compressao.codificacoes_aceitas(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        com_segredo = settings.CSRF_COOKIE_NAME in response.cookies
+        if 'br' in aceitas and not com_segredo:
+            compressor = compressao.criar_compressor('br')
+        elif 'gzip' in aceitas:
+            compressor = compressao.criar_compressor(
+                'gzip', self.MAX_BYTES_ALEATORIOS if com_segredo else None,
+            )
+        else:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compressao.acomprimir_sequencia(
+                    response.streaming_content, compressor,
+                )
+            else:
+                response.streaming_content = compressao.comprimir_sequencia(
+                    response.streaming_content, compressor,
+                )
+            # Tamanho final só é conhecido no fim do stream
+            del response.headers['Content-Length']
+        else:
+            comprimido = compressao.comprimir(response.content, compressor)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+
+        # ETag forte deixa de valer para o corpo comprimido (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = compressor.codificacao
+        return response
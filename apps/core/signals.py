@@ -0,0 +1,63 @@
+"""
+Invalidação das tags de cache (apps.core.cache) a partir dos modelos.
+
+Tags usadas no projeto:
+- 'eventos'              -> qualquer listagem de eventos (feed, filtros da
+                            home, categorias)
+- 'evento:<id>'          -> dados de um evento, de seus participantes e da
+                            galeria (página do evento)
+- 'assinaturas'          -> agregados de assinaturas
+- 'usuario:<id>'         -> dados do usuário (assinatura, perfil exibido,
+                            fragmentos do layout do base.html)
+- 'planos'               -> catálogo de planos (TipoPlano)
+
+A invalidação roda após o commit: ninguém recalcula com dados antigos.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.events.models import CategoriaEvento, Evento, FotoEvento, Inscricao
+from apps.users.models import AssinaturaPremium, TipoPlano, Usuario
+
+from . import cache as core_cache
+
+
+def invalidar_apos_commit(*tags):
+    transaction.on_commit(lambda: core_cache.invalidar_tags(*tags))
+
+
+@receiver([post_save, post_delete], sender=Evento)
+def invalidar_evento(sender, instance, **kwargs):
+    invalidar_apos_commit('eventos', f'evento:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=CategoriaEvento)
+def invalidar_categoria(sender, **kwargs):
+    invalidar_apos_commit('eventos')
+
+
+@receiver([post_save, post_delete], sender=Inscricao)
+def invalidar_inscricao(sender, instance, **kwargs):
+    invalidar_apos_commit('eventos', f'evento:{instance.id_evento_id}')
+
+
+@receiver([post_save, post_delete], sender=FotoEvento)
+def invalidar_galeria_evento(sender, instance, **kwargs):
+    invalidar_apos_commit(f'evento:{instance.evento_id}')
+
+
+@receiver([post_save, post_delete], sender=AssinaturaPremium)
+def invalidar_assinatura(sender, instance, **kwargs):
+    invalidar_apos_commit('assinaturas', f'usuario:{instance.usuario_id}')
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+def invalidar_usuario(sender, instance, **kwargs):
+    invalidar_apos_commit(f'usuario:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=TipoPlano)
+def invalidar_planos(sender, **kwargs):
+    invalidar_apos_commit('planos')
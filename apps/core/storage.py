@@ -0,0 +1,39 @@
+"""
+Storage de estáticos do projeto.
+
+CompressedManifestStaticFilesStorage (WhiteNoise) com uma diferença: um
+{% static %} que aponta para um arquivo inexistente não derruba a página
+com erro 500 - o nome fica sem hash e o navegador recebe um 404, como
+acontecia antes do manifest. Os demais arquivos continuam com hash,
+pré-comprimidos e com cache "immutable". O collectstatic continua
+acusando referências quebradas (url() em CSS).
+"""
+
+import logging
+
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+
+class ManifestEstaticosStorage(CompressedManifestStaticFilesStorage):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manifest_strict = False
+        # Nomes já sabidamente inexistentes: sem nova ida ao disco (nem novo
+        # aviso no log) a cada {% static %} - placeholders aparecem por card
+        self._inexistentes = set()
+
+    def stored_name(self, name):
+        # Só a busca do nome em tempo de execução ({% static %}, url())
+        # tolera o arquivo inexistente; no collectstatic (post_process) um
+        # url() quebrado num CSS continua sendo erro
+        if name in self._inexistentes:
+            return name
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            logger.warning('Arquivo estático inexistente: %s', name)
+            self._inexistentes.add(name)
+            return name
@@ -0,0 +1,27 @@
+"""
+Runner de testes do projeto.
+
+O STORAGES de produção usa o manifest do collectstatic (nomes com hash),
+que não existe em uma cópia de desenvolvimento: sem ele, qualquer
+{% static %} com DEBUG=False quebraria os testes. Aqui os testes rodam com
+o storage simples do Django, que resolve os arquivos direto das pastas.
+"""
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class MovibesTestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._storages = override_settings(STORAGES={
+            **settings.STORAGES,
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        })
+        self._storages.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._storages.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,92 @@
+"""
+Orçamento de consultas para testes
+==================================
+
+Garante que uma view não passe de N consultas nem repita a mesma consulta
+(sinal clássico de N+1). Ao falhar, mostra as "impressões digitais" das
+consultas - o SQL com literais trocados por '?' - agrupadas e contadas:
+
+    class HomeTests(OrcamentoConsultasMixin, TestCase):
+        def test_home(self):
+            with self.assertOrcamentoConsultas(8, duplicadas=0):
+                self.client.get('/')
+
+Consultas de sessão e de savepoint são ignoradas na contagem de
+duplicadas (fazem parte da infraestrutura, não da view). Durante esses
+testes as leituras ficam sempre no banco principal, mesmo com réplica
+configurada (ver apps.core.db_router).
+"""
+
+import re
+from collections import Counter
+from contextlib import contextmanager
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+_LITERAIS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),                       # strings
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),                     # números
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),        # listas IN (?, ?, ?)
+    (re.compile(r'\s+'), ' '),
+]
+
+_INFRAESTRUTURA = re.compile(r'SAVEPOINT|django_session', re.IGNORECASE)
+
+
+def impressao_digital(sql):
+    """ SQL normalizado: mesma consulta com parâmetros diferentes -> mesma impressão. """
+    for padrao, troca in _LITERAIS:
+        sql = padrao.sub(troca, sql)
+    return sql.strip()
+
+
+def resumo_consultas(consultas):
+    """ Counter {impressão digital: ocorrências}. """
+    return Counter(impressao_digital(consulta['sql']) for consulta in consultas)
+
+
+def contar_duplicadas(contagem):
+    return sum(
+        n - 1 for impressao, n in contagem.items()
+        if n > 1 and not _INFRAESTRUTURA.search(impressao)
+    )
+
+
+def formatar_relatorio(contagem, limite_sql=300):
+    linhas = []
+    for impressao, n in contagem.most_common():
+        sql = impressao if len(impressao) <= limite_sql else impressao[:limite_sql] + '...'
+        linhas.append(f'  {n:>3}x  {sql}')
+    return '\n'.join(linhas)
+
+
+class OrcamentoConsultasMixin:
+    """ Mixin para TestCase com assertOrcamentoConsultas(). """
+
+    def setUp(self):
+        super().setUp()
+        self.enterContext(mock.patch('apps.core.db_router.replica_configurada', return_value=False))
+
+    @contextmanager
+    def assertOrcamentoConsultas(self, maximo, duplicadas=0, using=DEFAULT_DB_ALIAS, contexto=''):  # noqa: N802 - como assertNumQueries
+        with CaptureQueriesContext(connections[using]) as capturadas:
+            yield capturadas
+
+        contagem = resumo_consultas(capturadas.captured_queries)
+        total = len(capturadas)
+        repetidas = contar_duplicadas(contagem)
+
+        problemas = []
+        if total > maximo:
+            problemas.append(f'{total} consultas (máximo: {maximo})')
+        if repetidas > duplicadas:
+            problemas.append(f'{repetidas} consultas duplicadas (máximo: {duplicadas})')
+
+        if problemas:
+            titulo = f'{contexto}: ' if contexto else ''
+            self.fail(
+                f'{titulo}orçamento de consultas estourado - {", ".join(problemas)}\n'
+                f'{formatar_relatorio(contagem)}'
+            )
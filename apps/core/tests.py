@@ -0,0 +1,191 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, router
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.core import cache as core_cache
+from apps.core import db_router, importtime
+from apps.core.db_router import COOKIE_PRIMARIO, usando_replica
+from apps.core.storage import ManifestEstaticosStorage
+from apps.events.models import CategoriaEvento
+
+# Segundo banco de teste independente, criado pelo settings nos testes
+REPLICA_TESTES = 'replica_testes'
+
+
+class ReplicaRouterTests(TestCase):
+    """
+    Usa dois bancos de teste independentes (principal e réplica, sem
+    replicação entre eles): um registro criado no principal "some" quando
+    a leitura vai para a réplica.
+    """
+
+    databases = {'default', REPLICA_TESTES}
+
+    def setUp(self):
+        alias = mock.patch.object(db_router, 'REPLICA_ALIAS', REPLICA_TESTES)
+        alias.start()
+        self.addCleanup(alias.stop)
+        self.categoria = CategoriaEvento.objects.create(nome='Categoria de teste da réplica')
+
+    def test_replica_no_proprio_principal_nao_conta(self):
+        self.assertTrue(db_router.replica_configurada())
+        with mock.patch.object(db_router, 'REPLICA_ALIAS', db_router.PRIMARIO_ALIAS):
+            self.assertFalse(db_router.replica_configurada())
+            with usando_replica():
+                self.assertTrue(CategoriaEvento.objects.filter(pk=self.categoria.pk).exists())
+
+    def test_leituras_fora_do_bloco_usam_o_principal(self):
+        self.assertTrue(CategoriaEvento.objects.filter(pk=self.categoria.pk).exists())
+
+    def test_leituras_marcadas_usam_a_replica(self):
+        with usando_replica():
+            self.assertFalse(CategoriaEvento.objects.filter(pk=self.categoria.pk).exists())
+
+    def test_escritas_sempre_no_principal(self):
+        with usando_replica():
+            self.assertEqual(router.db_for_write(CategoriaEvento), 'default')
+            CategoriaEvento.objects.create(nome='Outra categoria de teste')
+        self.assertTrue(CategoriaEvento.objects.filter(nome='Outra categoria de teste').exists())
+
+    def test_view_marcada_le_da_replica(self):
+        with CaptureQueriesContext(connections[REPLICA_TESTES]) as replica:
+            response = self.client.get(reverse('home'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(replica), 0)
+
+    def test_post_fixa_o_usuario_no_principal(self):
+        response = self.client.post(reverse('home'))
+        self.assertIn(COOKIE_PRIMARIO, response.cookies)
+
+        with CaptureQueriesContext(connections[REPLICA_TESTES]) as replica:
+            response = self.client.get(reverse('home'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(replica), 0)
+
+
+class BootImportTests(SimpleTestCase):
+    """
+    Tempo de import do boot (django.setup() + URLconf), medido em um
+    processo novo com -X importtime. Orçamento: settings.BOOT_IMPORT_BUDGET_MS.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Melhor de 3: o primeiro boot pode pagar a compilação dos .pyc
+        execucoes = [importtime.medir(importtime.CODIGO_BOOT_URLS) for _ in range(3)]
+        cls.imports = min(execucoes, key=importtime.total_ms)
+
+    def test_boot_dentro_do_orcamento(self):
+        total = importtime.total_ms(self.imports)
+        self.assertLessEqual(
+            total, settings.BOOT_IMPORT_BUDGET_MS,
+            f'Boot importou por {total:.0f} ms (orçamento: {settings.BOOT_IMPORT_BUDGET_MS:.0f} ms). '
+            f'Veja os módulos mais caros com `manage.py profile_imports --urls`.',
+        )
+
+    def test_imports_pesados_adiados(self):
+        # Só são necessários ao processar imagens e assinaturas
+        pacotes = {item.pacote for item in self.imports}
+        for pacote in ('PIL', 'dateutil'):
+            with self.subTest(pacote=pacote):
+                self.assertFalse(pacote in pacotes, f'{pacote} voltou a ser importado no boot.')
+
+
+class CacheTagsTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidar_tag_muda_versao_e_chave(self):
+        versao = core_cache.versao_tags('planos')
+        chave = core_cache.chave('planos_ativos', tags=['planos'])
+        self.assertEqual(core_cache.versao_tags('planos'), versao)
+
+        core_cache.invalidar_tags('planos')
+
+        self.assertNotEqual(core_cache.versao_tags('planos'), versao)
+        self.assertNotEqual(core_cache.chave('planos_ativos', tags=['planos']), chave)
+
+    def test_invalidar_uma_tag_nao_mexe_nas_outras(self):
+        versao_eventos = core_cache.versao_tags('eventos')
+        core_cache.invalidar_tags('planos')
+        self.assertEqual(core_cache.versao_tags('eventos'), versao_eventos)
+
+    def test_valor_recalculado_depois_da_invalidacao(self):
+        valores = iter([1, 2])
+        calcular = lambda: next(valores)  # noqa: E731
+        self.assertEqual(core_cache.obter_ou_calcular('contador', calcular, tags=['planos']), 1)
+        self.assertEqual(core_cache.obter_ou_calcular('contador', calcular, tags=['planos']), 1)
+        core_cache.invalidar_tags('planos')
+        self.assertEqual(core_cache.obter_ou_calcular('contador', calcular, tags=['planos']), 2)
+
+    def test_single_flight_calcula_uma_vez(self):
+        chamadas = []
+        inicio = threading.Barrier(8)
+
+        def calcular():
+            chamadas.append(1)
+            time.sleep(0.2)
+            return 'valor'
+
+        resultados = []
+
+        def pedir():
+            inicio.wait()
+            resultados.append(core_cache.obter_ou_calcular('lento', calcular, tags=['eventos']))
+
+        threads = [threading.Thread(target=pedir) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(chamadas), 1)
+        self.assertEqual(resultados, ['valor'] * 8)
+
+
+class ManifestEstaticosStorageTests(SimpleTestCase):
+    """ Arquivo inexistente: tolerado no {% static %}, erro no collectstatic. """
+
+    def setUp(self):
+        self.origem = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.destino = self.enterContext(tempfile.TemporaryDirectory())
+        (self.origem / 'estilo.css').write_text('body { background: url("fundo.png"); }')
+        self.enterContext(override_settings(
+            STATICFILES_DIRS=[self.origem],
+            STATIC_ROOT=self.destino,
+            STORAGES={
+                **settings.STORAGES,
+                'staticfiles': {'BACKEND': 'apps.core.storage.ManifestEstaticosStorage'},
+            },
+        ))
+
+    def coletar(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_collectstatic_acusa_url_quebrada_no_css(self):
+        with self.assertRaises(ValueError):
+            self.coletar()
+
+    def test_static_inexistente_fica_sem_hash(self):
+        (self.origem / 'fundo.png').write_bytes(b'png')
+        self.coletar()
+
+        storage = ManifestEstaticosStorage(location=self.destino)
+        self.assertRegex(storage.url('estilo.css'), r'estilo\.[0-9a-f]{12}\.css$')
+        with self.assertLogs('apps.core.storage', 'WARNING') as logs:
+            self.assertEqual(storage.url('nao-existe.png'), '/static/nao-existe.png')
+            self.assertEqual(storage.url('nao-existe.png'), '/static/nao-existe.png')
+        self.assertEqual(len(logs.output), 1)
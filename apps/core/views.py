@@ -0,0 +1,62 @@
+"""
+Endpoints de saúde para o orquestrador (load balancer, Kubernetes, etc.)
+
+- /healthz (liveness): o processo está vivo e responde. Não toca em banco
+  nem cache - uma queda do banco não deve fazer o orquestrador reiniciar
+  todos os containers.
+- /readyz (readiness): o processo consegue atender requests de verdade
+  (banco e cache respondem). Falhando, o container sai do balanceamento
+  até se recuperar.
+"""
+
+import logging
+
+from django.core.cache import caches
+from django.db import connections
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+from .db_router import REPLICA_ALIAS, replica_configurada
+
+logger = logging.getLogger(__name__)
+
+
+@never_cache
+@require_GET
+def healthz(request):
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+@require_GET
+def readyz(request):
+    verificacoes = {'banco': _verificar_banco('default'), 'cache': _verificar_cache()}
+    if replica_configurada():
+        verificacoes['replica'] = _verificar_banco(REPLICA_ALIAS)
+
+    pronto = all(verificacoes.values())
+    return JsonResponse(
+        {'status': 'ok' if pronto else 'indisponivel', 'verificacoes': verificacoes},
+        status=200 if pronto else 503,
+    )
+
+
+def _verificar_banco(alias):
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return True
+    except Exception:
+        logger.exception('readyz: banco %s indisponível', alias)
+        return False
+
+
+def _verificar_cache():
+    try:
+        cache = caches['default']
+        cache.set('readyz', 1, timeout=5)
+        return cache.get('readyz') == 1
+    except Exception:
+        logger.exception('readyz: cache indisponível')
+        return False
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 from .models import Evento, Inscricao, CategoriaEvento, FotoEvento, InteracaoPresenca, \
     Pagamento
 
@@ -8,8 +9,12 @@ class CategoriaEventoAdmin(admin.ModelAdmin):
     list_display = ['nome', 'eventos_count']
     search_fields = ['nome']
 
+    def get_queryset(self, request):
+        # Conta os eventos na mesma consulta da listagem (sem N+1)
+        return super().get_queryset(request).annotate(num_eventos=Count('eventos'))
+
     def eventos_count(self, obj):
-        return obj.eventos.count()
+        return obj.num_eventos
 
     eventos_count.short_description = 'Nº de Eventos'
 
@@ -17,6 +22,7 @@ class CategoriaEventoAdmin(admin.ModelAdmin):
 @admin.register(Evento)
 class EventoAdmin(admin.ModelAdmin):
     list_display = ['nome_evento', 'categoria', 'data_e_hora', 'vagas_restantes', 'id_criador']
+    list_select_related = ['categoria', 'id_criador']
     list_filter = ['categoria', 'status', 'data_e_hora']
     search_fields = ['nome_evento', 'descricao_do_evento']
     date_hierarchy = 'data_e_hora'
@@ -28,6 +34,24 @@ class InscricaoAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['id_aluno__usuario__email', 'id_evento__nome_evento']
 
+
+@admin.register(InteracaoPresenca)
+class InteracaoPresencaAdmin(admin.ModelAdmin):
+    list_select_related = ['autor', 'alvo_usuario']
+    # Cópias de inscricao_alvo, preenchidas pelo save()
+    readonly_fields = ['alvo_usuario', 'evento']
+
+    def save_model(self, request, obj, form, change):
+        # Trocou a inscrição: o save() refaz as cópias a partir da nova
+        if 'inscricao_alvo' in form.changed_data:
+            obj.alvo_usuario_id = None
+            obj.evento_id = None
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(Pagamento)
+class PagamentoAdmin(admin.ModelAdmin):
+    list_select_related = ['usuario', 'evento']
+
+
 admin.site.register(FotoEvento)
-admin.site.register(InteracaoPresenca)
-admin.site.register(Pagamento)
@@ -0,0 +1,163 @@
+"""
+Curtidas de presença
+====================
+
+Curtir e descurtir a inscrição de alguém em um evento (InteracaoPresenca),
+mantendo Inscricao.curtidas_count. Cada operação decide o resultado em um
+único comando no banco, sem ler antes de escrever: cliques duplos e
+requests simultâneos não criam linhas repetidas nem desalinham o contador.
+
+- curtir:    INSERT ... ON CONFLICT DO NOTHING RETURNING. A linha só volta
+             para quem de fato inseriu; só esse request soma 1 ao contador.
+- descurtir: DELETE. Só quem apagou a linha subtrai 1.
+- alternar:  descurtir; se não havia curtida, curtir.
+
+O contador muda com update(F()) na mesma transação da curtida. As funções
+devolvem Curtida(curtida, total): o estado de quem clicou e o total de
+curtidas da inscrição, para o botão HTMX.
+
+matches() lista as curtidas retribuídas (status_retorno='aceito') de um
+usuário, como autor ou como alvo, paginadas por cursor em retribuida_em
+(o momento do match, que não muda depois).
+
+Requer PostgreSQL ou SQLite 3.35+ (RETURNING).
+"""
+
+import heapq
+from collections import namedtuple
+from datetime import UTC, datetime
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Inscricao, InteracaoPresenca
+
+Curtida = namedtuple('Curtida', ['curtida', 'total'])
+
+MATCHES_POR_PAGINA = 20
+
+_FORMATO_CURSOR = '%Y%m%d%H%M%S%f'
+
+
+def _inserir(autor, inscricao):
+    """ INSERT que ignora a curtida repetida. True se a linha foi criada agora. """
+    tabela = connection.ops.quote_name(InteracaoPresenca._meta.db_table)
+    agora = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {tabela} '
+            '(autor_id, inscricao_alvo_id, alvo_usuario_id, evento_id, status_retorno, lida_pelo_alvo, '
+            'lida_pelo_autor, created_at, updated_at) '
+            'VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) '
+            'ON CONFLICT (autor_id, inscricao_alvo_id) DO NOTHING RETURNING id',
+            # A pk do Aluno é a do usuário: o dono da inscrição é o alvo
+            [autor.pk, inscricao.pk, inscricao.id_aluno_id, inscricao.id_evento_id, 'pendente', False, False,
+             agora, agora],
+        )
+        return cursor.fetchone() is not None
+
+
+def _apagar(autor, inscricao):
+    """ DELETE da curtida. True se havia uma linha para apagar. """
+    apagadas, _ = InteracaoPresenca.objects.filter(autor=autor, inscricao_alvo=inscricao).delete()
+    return apagadas > 0
+
+
+def _somar(inscricao, delta):
+    Inscricao.objects.filter(pk=inscricao.pk).update(curtidas_count=F('curtidas_count') + delta)
+
+
+def _total(inscricao):
+    return Inscricao.objects.values_list('curtidas_count', flat=True).get(pk=inscricao.pk)
+
+
+def curtir(autor, inscricao):
+    """ Curte a inscrição (idempotente). """
+    with transaction.atomic():
+        if _inserir(autor, inscricao):
+            _somar(inscricao, 1)
+        return Curtida(True, _total(inscricao))
+
+
+def descurtir(autor, inscricao):
+    """ Remove a curtida, se existir (idempotente). """
+    with transaction.atomic():
+        if _apagar(autor, inscricao):
+            _somar(inscricao, -1)
+        return Curtida(False, _total(inscricao))
+
+
+def alternar(autor, inscricao):
+    """ Descurte se já curtiu; senão curte. """
+    with transaction.atomic():
+        if _apagar(autor, inscricao):
+            _somar(inscricao, -1)
+            return Curtida(False, _total(inscricao))
+        # Sem curtida para apagar: o INSERT decide (outro request pode ter
+        # curtido no meio; nesse caso a curtida continua de pé)
+        if _inserir(autor, inscricao):
+            _somar(inscricao, 1)
+        return Curtida(True, _total(inscricao))
+
+
+# ----------------------------------------------------------------------
+# Matches
+# ----------------------------------------------------------------------
+
+def cursor_de(interacao):
+    """ Posição de uma interação na lista de matches: '<retribuida_em em UTC>-<pk>'. """
+    return f'{interacao.retribuida_em.astimezone(UTC).strftime(_FORMATO_CURSOR)}-{interacao.pk}'
+
+
+def _ler_cursor(cursor):
+    """ (retribuida_em, pk) do cursor, ou None se vazio/inválido (volta ao início). """
+    try:
+        momento, pk = cursor.split('-')
+        return datetime.strptime(momento, _FORMATO_CURSOR).replace(tzinfo=UTC), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _posicoes(filtro, depois_de, limite):
+    """ (retribuida_em, pk) dos próximos matches de um lado - só o índice composto. """
+    interacoes = InteracaoPresenca.objects.filter(filtro, status_retorno='aceito')
+    if depois_de:
+        momento, pk = depois_de
+        interacoes = interacoes.filter(Q(retribuida_em__lt=momento) | Q(retribuida_em=momento, pk__lt=pk))
+    return interacoes.order_by('-retribuida_em', '-pk').values_list('retribuida_em', 'pk')[:limite]
+
+
+def matches(usuario, cursor=None, limite=MATCHES_POR_PAGINA):
+    """
+    Uma página de matches do usuário, do mais recente para o mais antigo.
+    Devolve (interacoes, proximo_cursor); proximo_cursor é None na última
+    página. Cada interação ganha `outro`: a outra pessoa do match.
+
+    Um OR entre autor e alvo_usuario não aproveita nenhum dos dois índices
+    para ordenar; em vez disso cada lado lê as suas `limite + 1` primeiras
+    posições pelo próprio índice (autor|alvo_usuario, status_retorno,
+    retribuida_em), as duas listas são intercaladas aqui e só a página é
+    buscada com os relacionamentos. Nenhuma consulta passa por Inscricao
+    ou Aluno: o evento vem da cópia em InteracaoPresenca.evento.
+
+    A ordem usa retribuida_em, e não updated_at: marcar a notificação como
+    lida não move o match de página, e o cursor continua válido.
+    """
+    depois_de = _ler_cursor(cursor)
+    posicoes = list(heapq.merge(
+        _posicoes(Q(autor=usuario), depois_de, limite + 1),
+        _posicoes(Q(alvo_usuario=usuario), depois_de, limite + 1),
+        reverse=True,
+    ))[:limite + 1]
+
+    pks = [pk for _, pk in posicoes[:limite]]
+    por_pk = InteracaoPresenca.objects.select_related(
+        'autor', 'alvo_usuario', 'evento'
+    ).in_bulk(pks)
+    interacoes = [por_pk[pk] for pk in pks if pk in por_pk]
+    for interacao in interacoes:
+        interacao.outro = interacao.alvo_usuario if interacao.autor_id == usuario.pk else interacao.autor
+
+    proximo_cursor = cursor_de(interacoes[-1]) if len(posicoes) > limite and interacoes else None
+    return interacoes, proximo_cursor
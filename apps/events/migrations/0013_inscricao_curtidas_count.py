@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def preencher_contadores(apps, schema_editor):
+    # Um único UPDATE com a contagem de cada inscrição
+    Inscricao = apps.get_model('events', 'Inscricao')
+    InteracaoPresenca = apps.get_model('events', 'InteracaoPresenca')
+
+    curtidas = InteracaoPresenca.objects.filter(inscricao_alvo=OuterRef('pk')).order_by().values(
+        'inscricao_alvo'
+    ).annotate(total=Count('pk')).values('total')
+    Inscricao.objects.update(curtidas_count=Coalesce(Subquery(curtidas), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_evento_eh_pago_pagamento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inscricao',
+            name='curtidas_count',
+            field=models.PositiveIntegerField(default=0, help_text='Curtidas de presença recebidas (mantido por apps.events.curtidas)'),
+        ),
+        migrations.RunPython(preencher_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def preencher_alvo_usuario(apps, schema_editor):
+    # Um único UPDATE: o dono de cada inscrição curtida (a pk do Aluno é a do usuário)
+    Inscricao = apps.get_model('events', 'Inscricao')
+    InteracaoPresenca = apps.get_model('events', 'InteracaoPresenca')
+
+    dono = Inscricao.objects.filter(pk=OuterRef('inscricao_alvo_id')).values('id_aluno_id')
+    InteracaoPresenca.objects.update(alvo_usuario_id=Subquery(dono))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_inscricao_curtidas_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # Campo nulo + preenchimento aqui; NOT NULL e índices na 0015 (no
+    # PostgreSQL, ALTER TABLE depois do UPDATE na mesma transação falha com
+    # "pending trigger events" por causa das FKs adiadas)
+    operations = [
+        migrations.AddField(
+            model_name='interacaopresenca',
+            name='alvo_usuario',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='curtidas_presenca_recebidas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(preencher_alvo_usuario, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0014_interacaopresenca_alvo_usuario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='interacaopresenca',
+            name='alvo_usuario',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='curtidas_presenca_recebidas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='interacaopresenca',
+            index=models.Index(fields=['autor', 'status_retorno', 'updated_at'], name='interacao_autor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interacaopresenca',
+            index=models.Index(fields=['alvo_usuario', 'status_retorno', 'updated_at'], name='interacao_alvo_status_idx'),
+        ),
+    ]
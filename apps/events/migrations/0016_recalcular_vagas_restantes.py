@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def descontar_inscricoes_gratuitas(apps, schema_editor):
+    # Até aqui a inscrição em evento gratuito não descontava a vaga (só a
+    # paga descontava): vagas_restantes ainda é a capacidade cadastrada.
+    # Um único UPDATE desconta as inscrições existentes, sem ficar negativo.
+    Evento = apps.get_model('events', 'Evento')
+    Inscricao = apps.get_model('events', 'Inscricao')
+
+    inscritos = Inscricao.objects.filter(id_evento=OuterRef('pk')).order_by().values('id_evento').annotate(
+        total=Count('pk')
+    ).values('total')
+    Evento.objects.filter(eh_pago=False, vagas_restantes__isnull=False).update(
+        vagas_restantes=Greatest(F('vagas_restantes') - Coalesce(Subquery(inscritos), Value(0)), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0015_interacaopresenca_indices'),
+    ]
+
+    operations = [
+        migrations.RunPython(descontar_inscricoes_gratuitas, migrations.RunPython.noop),
+    ]
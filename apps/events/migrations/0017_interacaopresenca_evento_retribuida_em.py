@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def preencher_evento_e_retribuida_em(apps, schema_editor):
+    # Dois UPDATEs: o evento de cada inscrição curtida e, nas curtidas já
+    # retribuídas, a melhor aproximação do momento do match (updated_at)
+    Inscricao = apps.get_model('events', 'Inscricao')
+    InteracaoPresenca = apps.get_model('events', 'InteracaoPresenca')
+
+    evento = Inscricao.objects.filter(pk=OuterRef('inscricao_alvo_id')).values('id_evento_id')
+    InteracaoPresenca.objects.update(evento_id=Subquery(evento))
+    InteracaoPresenca.objects.filter(status_retorno='aceito').update(retribuida_em=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0016_recalcular_vagas_restantes'),
+    ]
+
+    # Campos nulos + preenchimento aqui; NOT NULL e índices na 0018 (mesmo
+    # motivo da 0014/0015)
+    operations = [
+        migrations.AddField(
+            model_name='interacaopresenca',
+            name='evento',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='curtidas_presenca', to='events.evento'),
+        ),
+        migrations.AddField(
+            model_name='interacaopresenca',
+            name='retribuida_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(preencher_evento_e_retribuida_em, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0017_interacaopresenca_evento_retribuida_em'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='interacaopresenca',
+            name='evento',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='curtidas_presenca', to='events.evento'),
+        ),
+        migrations.RemoveIndex(
+            model_name='interacaopresenca',
+            name='interacao_autor_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='interacaopresenca',
+            name='interacao_alvo_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='interacaopresenca',
+            index=models.Index(fields=['autor', 'status_retorno', 'retribuida_em'], name='interacao_autor_match_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interacaopresenca',
+            index=models.Index(fields=['alvo_usuario', 'status_retorno', 'retribuida_em'], name='interacao_alvo_match_idx'),
+        ),
+    ]
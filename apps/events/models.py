@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.db.models import UniqueConstraint
+from django.utils import timezone
 from apps.users.models import ImageResizingMixin
 
 class CategoriaEvento(models.Model):
@@ -59,6 +60,10 @@ class Inscricao(models.Model):
     id_aluno = models.ForeignKey('users.Aluno', on_delete=models.CASCADE, related_name='inscricoes')
     id_evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='inscricoes')
     testemunho = models.TextField(null=True, blank=True)
+    curtidas_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Curtidas de presença recebidas (mantido por apps.events.curtidas)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -137,6 +142,22 @@ class InteracaoPresenca(models.Model):
         on_delete=models.CASCADE,
         related_name="curtidas_recebidas"
     )
+    # Dono da inscrição curtida (cópia de inscricao_alvo.id_aluno.usuario):
+    # notificações e matches filtram por ele sem join com Inscricao e Aluno.
+    # Sem índice próprio: é o prefixo do índice composto abaixo.
+    alvo_usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="curtidas_presenca_recebidas",
+        db_index=False
+    )
+    # Evento da inscrição curtida (cópia de inscricao_alvo.id_evento): a
+    # lista de matches mostra o evento sem join com Inscricao.
+    evento = models.ForeignKey(
+        Evento,
+        on_delete=models.CASCADE,
+        related_name="curtidas_presenca"
+    )
 
     # --- Campos de Estado ---
     status_retorno = models.CharField(
@@ -153,6 +174,10 @@ class InteracaoPresenca(models.Model):
         help_text="Notificação lida pelo autor (quem recebeu o 'like de volta')"
     )
 
+    # Quando a curtida foi retribuída (o match). Preenchido uma única vez:
+    # ao contrário de updated_at, não muda quando a notificação é lida.
+    retribuida_em = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -167,9 +192,28 @@ class InteracaoPresenca(models.Model):
                 name='unique_curtida_presenca'
             )
         ]
+        # Curtidas e likes de volta de um usuário (notificações) e seus
+        # matches do mais recente para o mais antigo (paginação por cursor
+        # em retribuida_em, que não muda)
+        indexes = [
+            models.Index(fields=['autor', 'status_retorno', 'retribuida_em'],
+                         name='interacao_autor_match_idx'),
+            models.Index(fields=['alvo_usuario', 'status_retorno', 'retribuida_em'],
+                         name='interacao_alvo_match_idx'),
+        ]
 
     def __str__(self):
-        return f"Interação de {self.autor.email} para {self.inscricao_alvo.id_aluno.usuario.email}"
+        return f"Interação de {self.autor.email} para {self.alvo_usuario.email}"
+
+    def save(self, *args, **kwargs):
+        # A pk do Aluno é a do usuário
+        if self.alvo_usuario_id is None:
+            self.alvo_usuario_id = self.inscricao_alvo.id_aluno_id
+        if self.evento_id is None:
+            self.evento_id = self.inscricao_alvo.id_evento_id
+        if self.status_retorno == 'aceito' and self.retribuida_em is None:
+            self.retribuida_em = timezone.now()
+        super().save(*args, **kwargs)
 
 
 class Pagamento(models.Model):
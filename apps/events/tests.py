@@ -1,3 +1,226 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from apps.core.factories import (
+    criar_aluno, criar_curtida, criar_evento, criar_inscricao, criar_profissional, criar_staff,
+)
+from apps.core.testing import OrcamentoConsultasMixin
+from apps.events import curtidas
+from apps.events.models import Inscricao, InteracaoPresenca
+
+
+class OrcamentoConsultasEventosTests(OrcamentoConsultasMixin, TestCase):
+    """
+    Número máximo de consultas por view e por papel. Os dados têm vários
+    eventos e participantes: uma consulta por linha (N+1) estoura o orçamento.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profissional = criar_profissional()
+        cls.aluno = criar_aluno()
+        cls.premium = criar_aluno(premium=True)
+
+        cls.eventos = [criar_evento(criador=cls.profissional, participantes=5) for _ in range(6)]
+        cls.passado = criar_evento(criador=cls.profissional, participantes=5, passado=True)
+        for evento in [*cls.eventos[:3], cls.passado]:
+            criar_inscricao(cls.aluno, evento)
+            criar_inscricao(cls.premium, evento)
+
+        for inscricao in cls.passado.inscricoes.exclude(id_aluno__usuario=cls.aluno)[:3]:
+            criar_curtida(cls.aluno, inscricao)
+
+    def entrar(self, papel):
+        usuario = {'anonimo': None, 'aluno': self.aluno, 'premium': self.premium,
+                   'profissional': self.profissional}[papel]
+        if usuario is not None:
+            self.client.force_login(usuario)
+
+    def medir(self, papel, url, maximo, duplicadas=0):
+        self.entrar(papel)
+        self.client.get(url)  # aquecimento: sessão, snapshot de perfil, catálogo
+
+        with self.assertOrcamentoConsultas(maximo, duplicadas=duplicadas, contexto=f'{papel} {url}'):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_home(self):
+        for papel, maximo in [('anonimo', 4), ('aluno', 10), ('premium', 10), ('profissional', 10)]:
+            with self.subTest(papel=papel):
+                self.medir(papel, reverse('home'), maximo)
+
+    def test_evento_detail_futuro(self):
+        url = reverse('evento_detail', args=[self.eventos[0].pk])
+        for papel, maximo in [('anonimo', 3), ('aluno', 11), ('premium', 12), ('profissional', 10)]:
+            with self.subTest(papel=papel):
+                self.medir(papel, url, maximo)
+
+    def test_evento_detail_passado(self):
+        url = reverse('evento_detail', args=[self.passado.pk])
+        for papel, maximo in [('anonimo', 6), ('aluno', 13), ('premium', 15), ('profissional', 12)]:
+            with self.subTest(papel=papel):
+                self.medir(papel, url, maximo)
+
+    def test_evento_controles(self):
+        for papel, maximo in [('anonimo', 1), ('aluno', 4), ('premium', 7), ('profissional', 4)]:
+            for evento in [self.eventos[0], self.passado]:
+                with self.subTest(papel=papel, evento=evento.pk):
+                    self.medir(papel, reverse('evento_controles', args=[evento.pk]), maximo)
+
+
+class PaginaEventoTests(TestCase):
+    """
+    Página do evento: conteúdo público em cache pela versão do evento,
+    estado de quem vê no fragmento evento_controles.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.criador = criar_profissional()
+        self.evento = criar_evento(criador=self.criador, passado=True)
+        self.inscricao = criar_inscricao(criar_aluno(first_name='Wanda'), self.evento)
+
+    def test_conteudo_publico_renderiza_uma_vez_por_versao(self):
+        url = reverse('evento_detail', args=[self.evento.pk])
+        self.assertContains(self.client.get(url), 'Wanda')
+
+        # Outro visitante: o conteúdo vem do cache, sem consultar participantes
+        self.client.force_login(criar_aluno())
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertContains(response, 'Wanda')
+        self.assertFalse([c for c in consultas if 'FROM "events_inscricao"' in c['sql']])
+        # O fragmento compartilhado não leva perfis nem botões de curtir
+        self.assertNotContains(response, reverse('public_profile', args=[self.inscricao.id_aluno_id]))
+        self.assertNotContains(response, reverse('curtir_presenca', args=[self.inscricao.pk]))
+        self.assertContains(response, f'hx-get="{reverse("evento_controles", args=[self.evento.pk])}"')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_inscricao(criar_aluno(first_name='Valquiria'), self.evento)
+        self.assertContains(self.client.get(url), 'Valquiria')
+
+    def controles(self, usuario):
+        self.client.force_login(usuario)
+        return self.client.get(reverse('evento_controles', args=[self.evento.pk]),
+                               HTTP_HX_REQUEST='true').content.decode()
+
+    def test_controles_por_visitante(self):
+        premium = criar_aluno(premium=True)
+        propria = criar_inscricao(premium, self.evento)
+        criar_curtida(premium, self.inscricao)
+
+        html = self.controles(premium)
+        perfil_wanda = reverse('public_profile', args=[self.inscricao.id_aluno_id])
+        self.assertIn(f'id="lista-participantes-{self.evento.pk}" hx-swap-oob="true"', html)
+        self.assertIn(perfil_wanda, html)
+        # Curtida já enviada marcada; nenhum botão no próprio card
+        self.assertIn(f'id="curtir-{self.inscricao.pk}"\n        class="w-9 h-9 flex items-center justify-center rounded-full bg-pink-500/20', html)
+        self.assertNotIn(reverse('curtir_presenca', args=[propria.pk]), html)
+        self.assertIn('Cancelar Inscrição', html)
+        self.assertNotIn('galeria-gerenciar', html)
+
+        html = self.controles(criar_aluno())
+        self.assertNotIn('lista-participantes', html)
+        self.assertNotIn(perfil_wanda, html)
+        self.assertIn('Inscrever-se', html)
+
+        html = self.controles(self.criador)
+        self.assertIn(f'id="lista-participantes-{self.evento.pk}"', html)
+        self.assertIn(perfil_wanda, html)
+        self.assertNotIn(reverse('curtir_presenca', args=[self.inscricao.pk]), html)
+        self.assertIn(reverse('account_galeria_evento', args=[self.evento.pk]), html)
+
+
+class FragmentosOobTests(TestCase):
+    """ Ações HTMX devolvem o partial principal + contadores out-of-band. """
+
+    def setUp(self):
+        self.aluno = criar_aluno()
+        self.client.force_login(self.aluno)
+
+    def inscrever(self, evento):
+        return self.client.post(reverse('subscribe_event', args=[evento.pk]), HTTP_HX_REQUEST='true')
+
+    def test_inscrever_e_cancelar_atualizam_vagas_e_participantes(self):
+        evento = criar_evento(participantes=2, vagas_restantes=3)
+
+        response = self.inscrever(evento)
+        self.assertContains(response, f'id="subscribe-button-{evento.pk}"')
+        self.assertContains(response, 'Cancelar Inscrição')
+        html = response.content.decode()
+        self.assertIn(f'id="vagas-evento-{evento.pk}-detalhe" hx-swap-oob="true"', html)
+        self.assertIn('2 disponíveis', html)
+        self.assertRegex(html, rf'id="participantes-evento-{evento.pk}" hx-swap-oob="true"\s+class="[^"]*">3<')
+
+        response = self.inscrever(evento)
+        self.assertContains(response, 'Inscrever-se')
+        self.assertContains(response, '3 disponíveis')
+        evento.refresh_from_db()
+        self.assertEqual(evento.vagas_restantes, 3)
+
+    def test_evento_esgotado_nao_inscreve(self):
+        evento = criar_evento(vagas_restantes=0)
+
+        response = self.inscrever(evento)
+        self.assertContains(response, 'Inscrever-se')
+        self.assertContains(response, 'Esgotado')
+        self.assertFalse(Inscricao.objects.filter(id_evento=evento).exists())
+
+
+class CurtidasTests(TestCase):
+    """ Curtir/descurtir em um comando só, com Inscricao.curtidas_count em dia. """
+
+    def setUp(self):
+        self.aluno = criar_aluno()
+        self.inscricao = criar_inscricao(criar_aluno(), criar_evento(passado=True))
+        self.client.force_login(self.aluno)
+
+    def total(self):
+        self.inscricao.refresh_from_db(fields=['curtidas_count'])
+        return self.inscricao.curtidas_count
+
+    def test_alternar_curte_e_descurte(self):
+        self.assertEqual(curtidas.alternar(self.aluno, self.inscricao), (True, 1))
+        self.assertEqual(curtidas.alternar(self.aluno, self.inscricao), (False, 0))
+        self.assertFalse(InteracaoPresenca.objects.exists())
+
+    def test_curtir_e_descurtir_repetidos_nao_mudam_o_contador(self):
+        criar_curtida(criar_aluno(), self.inscricao)
+        self.assertEqual(curtidas.curtir(self.aluno, self.inscricao), (True, 2))
+        self.assertEqual(curtidas.curtir(self.aluno, self.inscricao), (True, 2))
+        self.assertEqual(InteracaoPresenca.objects.filter(autor=self.aluno).count(), 1)
+        self.assertEqual(curtidas.descurtir(self.aluno, self.inscricao), (False, 1))
+        self.assertEqual(curtidas.descurtir(self.aluno, self.inscricao), (False, 1))
+
+    def test_botoes_htmx(self):
+        url = reverse('like_inscricao', args=[self.inscricao.pk])
+        response = self.client.post(url, HTTP_HX_REQUEST='true')
+        self.assertContains(response, 'title="Descurtir"')
+        self.assertEqual(self.total(), 1)
+        self.assertContains(self.client.post(url, HTTP_HX_REQUEST='true'), 'title="Curtir"')
+        self.assertEqual(self.total(), 0)
+
+        url = reverse('curtir_presenca', args=[self.inscricao.pk])
+        for _ in range(2):  # clique duplo
+            with CaptureQueriesContext(connection) as consultas:
+                self.assertContains(self.client.post(url, HTTP_HX_REQUEST='true'), 'Enviado')
+            # O perfil de aluno vem junto com o usuário da sessão
+            self.assertFalse([c for c in consultas if 'FROM "users_aluno"' in c['sql']])
+        self.assertEqual(self.total(), 1)
+
+    def test_admin_refaz_as_copias_ao_trocar_a_inscricao(self):
+        curtida = criar_curtida(self.aluno, self.inscricao)
+        outra = criar_inscricao(criar_aluno(), criar_evento(passado=True))
+        self.client.force_login(criar_staff())
+
+        response = self.client.post(reverse('admin:events_interacaopresenca_change', args=[curtida.pk]), {
+            'autor': self.aluno.pk,
+            'inscricao_alvo': outra.pk,
+            'status_retorno': 'pendente',
+        })
+        self.assertEqual(response.status_code, 302)
+        curtida.refresh_from_db()
+        self.assertEqual((curtida.alvo_usuario_id, curtida.evento_id), (outra.id_aluno_id, outra.id_evento_id))
@@ -1,18 +1,62 @@
 from datetime import datetime, timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.utils import timezone
-from django.db.models import Count, Q
-from django.shortcuts import render, get_object_or_404, redirect
-from .models import Evento, Inscricao, CategoriaEvento, Pagamento, InteracaoPresenca
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
+from . import curtidas
+from .models import Evento, Inscricao, CategoriaEvento, Pagamento
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse, HttpResponseForbidden
 from .forms import EventoCreateForm, FotoEventoForm
 from apps.users.models import Aluno
 from django.contrib import messages
+from apps.core import cache as core_cache
+from apps.core.db_router import use_replica
+from apps.core.htmx import arender_parcial, render_parcial
 
 
+async def _eh_aluno(user):
+    """
+    True se o usuário logado é aluno. O backend de autenticação já traz o
+    perfil com select_related (apps.users.backends): sem consulta extra;
+    só vai ao banco se o usuário foi carregado de outro jeito.
+    """
+    if user.is_anonymous:
+        return False
+    if user._meta.get_field('aluno').is_cached(user):
+        return hasattr(user, 'aluno')
+    return await Aluno.objects.filter(usuario=user).aexists()
+
+
+def _filtros_home():
+    """ Opções dos filtros da home (categorias com contagem, cidades e bairros). """
+    # Buscar categorias com contagem de eventos
+    categorias = CategoriaEvento.objects.annotate(
+        eventos_count=Count('eventos')
+    ).order_by('nome')
+
+    # Buscar cidades e bairros únicos para autocomplete
+    cidades_disponiveis = Evento.objects.values_list(
+        'localizacao_cidade', flat=True
+    ).distinct().order_by('localizacao_cidade')
+
+    bairros_disponiveis = Evento.objects.values_list(
+        'localizacao_bairro_endereco', flat=True
+    ).distinct().order_by('localizacao_bairro_endereco')
+
+    return {
+        'categorias': list(categorias),
+        'cidades_disponiveis': [c for c in cidades_disponiveis if c],
+        'bairros_disponiveis': [b for b in bairros_disponiveis if b],
+    }
+
+
+@use_replica
 def home(request):
     # Buscar todos os eventos
-    eventos = Evento.objects.all().select_related('categoria', 'id_criador')
+    eventos = Evento.objects.all().select_related('categoria', 'id_criador__profissional')
 
     # Filtro de busca por nome
     search = request.GET.get('search', '').strip()
@@ -79,25 +123,15 @@ def home(request):
     # Ordenar por data
     eventos = eventos.order_by('data_e_hora')
 
-    # Buscar categorias com contagem de eventos
-    categorias = CategoriaEvento.objects.annotate(
-        eventos_count=Count('eventos')
-    ).order_by('nome')
-
-    # Buscar cidades e bairros únicos para autocomplete
-    cidades_disponiveis = Evento.objects.values_list(
-        'localizacao_cidade', flat=True
-    ).distinct().order_by('localizacao_cidade')
-
-    bairros_disponiveis = Evento.objects.values_list(
-        'localizacao_bairro_endereco', flat=True
-    ).distinct().order_by('localizacao_bairro_endereco')
+    # Categorias, cidades e bairros dos filtros: iguais para todos os
+    # visitantes, recalculados só quando algum evento muda (tag 'eventos')
+    filtros = core_cache.obter_ou_calcular(
+        'home_filtros', calcular=_filtros_home, tags=['eventos'], timeout=settings.EVENTO_CACHE_TIMEOUT
+    )
 
     context = {
         'eventos': eventos,
-        'categorias': categorias,
-        'cidades_disponiveis': [c for c in cidades_disponiveis if c],
-        'bairros_disponiveis': [b for b in bairros_disponiveis if b],
+        **filtros,
     }
 
     # Se for requisição HTMX, retornar apenas a lista de eventos
@@ -108,13 +142,15 @@ def home(request):
 
 
 @login_required
-def subscribe_to_event(request, event_id):
+async def subscribe_to_event(request, event_id):
     """
     Inscreve um aluno em um evento (apenas eventos GRATUITOS).
-    Chamado via HTMX.
+    Chamado via HTMX. View async: as consultas usam o ORM async e o
+    worker ASGI atende outros requests enquanto espera o banco.
     """
-    evento = get_object_or_404(Evento, pk=event_id)
-    aluno = get_object_or_404(Aluno, usuario=request.user)
+    user = await request.auser()
+    evento = await aget_object_or_404(Evento.objects.select_related('id_criador'), pk=event_id)
+    aluno = await aget_object_or_404(Aluno, usuario=user)
     # --- 6. REGRA DE NEGÓCIO ADICIONADA ---
     # Se o evento for pago, esta view não deve fazer nada.
     if evento.eh_pago:
@@ -122,24 +158,44 @@ def subscribe_to_event(request, event_id):
                        'Este é um evento pago e não pode ser inscrito por aqui.')
         return redirect('evento_detail', evento_id=evento.id)
     # --- FIM DA REGRA ---
-    inscricao_existente = Inscricao.objects.filter(id_aluno=aluno,
-                                                   id_evento=evento).first()
+    inscricao_existente = await Inscricao.objects.filter(id_aluno=aluno,
+                                                         id_evento=evento).afirst()
+    # Vagas mudam com update(F) (sem corrida entre cliques simultâneos);
+    # eventos sem limite (vagas_restantes NULL) não casam com o filtro
+    vagas = Evento.objects.filter(pk=evento.pk, vagas_restantes__isnull=False)
 
     if inscricao_existente:
-        inscricao_existente.delete()
+        apagadas, _ = await Inscricao.objects.filter(pk=inscricao_existente.pk).adelete()
+        if apagadas:
+            await vagas.aupdate(vagas_restantes=F('vagas_restantes') + 1)
         is_subscribed = False
         messages.success(request, 'Inscrição cancelada.')
+    elif evento.vagas_restantes is not None and not await vagas.filter(vagas_restantes__gt=0).aupdate(
+            vagas_restantes=F('vagas_restantes') - 1):
+        is_subscribed = False
+        messages.error(request, 'Vagas esgotadas.')
     else:
-        Inscricao.objects.create(id_aluno=aluno, id_evento=evento)
+        try:
+            await Inscricao.objects.acreate(id_aluno=aluno, id_evento=evento)
+        except IntegrityError:
+            # Clique duplo: o outro request já inscreveu (e reservou a vaga)
+            await vagas.aupdate(vagas_restantes=F('vagas_restantes') + 1)
         is_subscribed = True
         messages.success(request, 'Inscrição realizada com sucesso!')
 
+    # update() não dispara os sinais do Evento (ver apps.core.signals)
+    await sync_to_async(core_cache.invalidar_tags)('eventos', f'evento:{evento.pk}')
+    await evento.arefresh_from_db(fields=['vagas_restantes'])
+
     context = {
         'evento': evento,
         'is_subscribed': is_subscribed,
+        'user': user,
+        'total_participantes': await Inscricao.objects.filter(id_evento=evento).acount(),
     }
-    # Retorna o partial do botão
-    return render(request, 'partials/subscribe_button.html', context)
+    # O botão + vagas e participantes da página (out-of-band)
+    return await arender_parcial('partials/subscribe_button.html', context,
+                                 oob=['partials/contadores_evento_oob.html'])
 
 
 @login_required
@@ -171,39 +227,37 @@ def create_event(request):
 
 
 @login_required
-def modal_premium_view(request):
+async def modal_premium_view(request):
     """
     Retorna o HTML do modal premium para uso com HTMX.
     """
-    return render(request, 'partials/modal_premium.html')
+    return await arender_parcial('partials/modal_premium.html')
 
 
 @login_required
-def processar_curtida_presenca_view(request, inscricao_id):
+async def processar_curtida_presenca_view(request, inscricao_id):
     """
     Chamada via HTMX quando o usuário clica em "Curtir" na lista de participantes.
     Cria a interação de presença.
     """
+    user = await request.auser()
+
     # Apenas Alunos podem curtir (regra de negócio)
-    if not hasattr(request.user, 'aluno'):
+    if not await _eh_aluno(user):
         return HttpResponseForbidden("Apenas alunos podem interagir.")
 
-    inscricao_alvo = get_object_or_404(Inscricao, pk=inscricao_id)
+    inscricao_alvo = await aget_object_or_404(Inscricao, pk=inscricao_id)
 
-    # Impede curtir a si mesmo
-    if inscricao_alvo.id_aluno.usuario == request.user:
+    # Impede curtir a si mesmo (a pk do Aluno é a do usuário)
+    if inscricao_alvo.id_aluno_id == user.pk:
         return HttpResponse("Você não pode curtir a si mesmo.", status=400)
 
-    # Cria a interação (get_or_create evita duplicatas)
-    # O default é status_retorno='pendente' e lida_pelo_alvo=False
-    InteracaoPresenca.objects.get_or_create(
-        autor=request.user,
-        inscricao_alvo=inscricao_alvo
-    )
+    # INSERT ... ON CONFLICT DO NOTHING: clique duplo não duplica a curtida
+    # nem o contador. O default é status_retorno='pendente' e lida_pelo_alvo=False
+    await sync_to_async(curtidas.curtir)(user, inscricao_alvo)
 
     # Retorna o botão atualizado (estado "Curtida enviada")
-    # Vamos criar este pequeno template parcial no próximo passo
-    return render(request, 'partials/botao_curtida_estado.html', {
+    return await arender_parcial('partials/botao_curtida_estado.html', {
         'inscricao': inscricao_alvo,
         'ja_curtiu': True
     })
@@ -266,127 +320,121 @@ def like_inscricao_view(request, inscricao_id):
 
     inscricao = get_object_or_404(Inscricao, pk=inscricao_id)
 
-    # Tenta encontrar uma curtida existente
-    try:
-        curtida_existente = InteracaoPresenca.objects.get(
-            usuario=request.user,
-            inscricao=inscricao
-        )
-        # Se encontrou, o usuário está "descurtindo"
-        curtida_existente.delete()
-        is_liked = False
-    except InteracaoPresenca.DoesNotExist:
-        # Se não encontrou, o usuário está "curtindo"
-        InteracaoPresenca.objects.create(
-            usuario=request.user,
-            inscricao=inscricao
-        )
-        is_liked = True
+    # Impede curtir a si mesmo (a pk do Aluno é a do usuário)
+    if inscricao.id_aluno_id == request.user.pk:
+        return HttpResponse("Você não pode curtir a si mesmo.", status=400)
+
+    # Curte ou descurte em um comando só (ver apps.events.curtidas)
+    estado = curtidas.alternar(request.user, inscricao)
 
     # Prepara o contexto para o partial do botão
     context = {
         'inscricao': inscricao,
-        'is_liked': is_liked # Passa o novo status
+        'is_liked': estado.curtida,  # Passa o novo status
+        'total_curtidas': estado.total,
     }
     # Retorna SÓ o botão atualizado
     return render(request, 'partials/like_button.html', context)
 
 
+@use_replica
 def evento_detail_view(request, evento_id):
     """
     Mostra a página de detalhes do evento.
+
+    A página é a mesma para todos os visitantes: o conteúdo (dados,
+    participantes, galeria) fica em um {% cache %} com a versão da tag
+    'evento:<id>' na chave e só é renderizado de novo quando o evento ou
+    uma inscrição dele muda. O que depende de quem está vendo (inscrição,
+    pagamento, acesso aos participantes, curtidas) vem de
+    evento_controles_view por HTMX.
     """
-    evento = get_object_or_404(Evento, pk=evento_id)
-    is_past = evento.data_e_hora < timezone.now()
-    fotos_galeria = []
-    if is_past:
-        fotos_galeria = evento.galeria.all()
+    evento = get_object_or_404(Evento.objects.select_related('categoria'), pk=evento_id)
+
+    context = {
+        'evento': evento,
+        'is_past': evento.data_e_hora < timezone.now(),
+        'versao_evento': core_cache.versao_tags(f'evento:{evento.pk}'),
+        'evento_cache_timeout': settings.EVENTO_CACHE_TIMEOUT,
+        # Preguiçosos: só consultados quando o fragmento não está em cache
+        'inscricoes': evento.inscricoes.select_related('id_aluno__usuario'),
+        'fotos_galeria': evento.galeria.select_related('usuario'),
+    }
+    return render(request, 'events/evento_detail.html', context)
 
-    inscricoes = evento.inscricoes.all().select_related('id_aluno__usuario')
-    total_participantes = inscricoes.count()
 
-    # Inicializa todas as variáveis como False/vazio
-    curtidas_pelo_usuario_ids = []
+@use_replica
+async def evento_controles_view(request, evento_id):
+    """
+    Fragmento HTMX com o estado de quem está vendo a página do evento:
+    botão de inscrição ou de compra e, out-of-band, a lista de participantes
+    com perfis e curtidas (só para quem pode ver) e o link da galeria do
+    criador.
+    """
+    user = await request.auser()
+    evento = await aget_object_or_404(Evento.objects.select_related('id_criador'), pk=evento_id)
+    is_past = evento.data_e_hora < timezone.now()
+
     is_subscribed = False
     has_paid = False
-    is_premium = False
-    is_aluno = False
+    is_creator = False
     can_view_participants = False
-    participant_preview = None
+    pode_curtir = False
+    participantes = []
+    curtidas_pelo_usuario = set()
 
-    if request.user.is_authenticated:
-        is_aluno = hasattr(request.user, 'aluno')
+    if user.is_authenticated:
+        is_aluno = await _eh_aluno(user)
+        is_creator = evento.id_criador_id == user.pk
+        # Criador sempre pode ver participantes; alunos só se premium
+        can_view_participants = is_creator or (is_aluno and await sync_to_async(user.eh_premium)())
+        pode_curtir = is_aluno and can_view_participants
 
         if is_aluno:
-            # Verifica se é premium
-            try:
-                is_premium = request.user.eh_premium()
-            except:
-                is_premium = False
-
-            # Define permissões para ver participantes
-            can_view_participants = (
-                is_premium or
-                request.user == evento.id_criador
-            )
-
-            if not is_premium and is_past:
-                participant_preview = inscricoes[:3]
-
-        # Criador sempre pode ver participantes
-        if request.user == evento.id_criador:
-            can_view_participants = True
-
-        # Busca curtidas do usuário
-        curtidas_pelo_usuario_ids = InteracaoPresenca.objects.filter(
-            autor=request.user,
-            inscricao_alvo__in=inscricoes
-        ).values_list('inscricao_alvo_id', flat=True)
-
-        # LÓGICA PRINCIPAL DE INSCRIÇÃO
-        if is_aluno:
-            try:
-                if evento.eh_pago:
-                    # EVENTO PAGO: A regra é clara
-                    # 1. Primeiro verifica se existe PAGAMENTO aprovado
-                    has_paid = Pagamento.objects.filter(
-                        usuario=request.user,
-                        evento=evento,
-                        status='aprovado'
-                    ).exists()
-
-                    # 2. Se tem pagamento aprovado, ele está inscrito
-                    # Se NÃO tem pagamento, ele NÃO está inscrito (mesmo que exista Inscricao)
-                    is_subscribed = has_paid
-
-                else:
-                    # EVENTO GRATUITO: Só verifica a inscrição
-                    is_subscribed = Inscricao.objects.filter(
-                        id_aluno=request.user.aluno,
-                        id_evento=evento
-                    ).exists()
-                    # Em evento gratuito, has_paid sempre é False
-                    has_paid = False
-
-            except Aluno.DoesNotExist:
-                is_subscribed = False
-                has_paid = False
+            if evento.eh_pago:
+                # EVENTO PAGO: só está inscrito quem tem pagamento aprovado
+                # (mesmo que exista Inscricao)
+                has_paid = await Pagamento.objects.filter(
+                    usuario=user,
+                    evento=evento,
+                    status='aprovado'
+                ).aexists()
+                is_subscribed = has_paid
+            else:
+                # EVENTO GRATUITO: só verifica a inscrição
+                is_subscribed = await Inscricao.objects.filter(
+                    id_aluno_id=user.pk,
+                    id_evento=evento
+                ).aexists()
+
+        # A lista com perfis e curtidas só sai aqui, para quem pode ver;
+        # a página em cache tem apenas a versão bloqueada
+        if is_past and can_view_participants:
+            participantes = [
+                inscricao async for inscricao in evento.inscricoes.select_related('id_aluno__usuario')
+            ]
+        if is_past and pode_curtir:
+            curtidas_pelo_usuario = {
+                pk async for pk in Inscricao.objects.filter(
+                    id_evento=evento,
+                    curtidas_recebidas__autor=user,
+                ).values_list('pk', flat=True)
+            }
 
     context = {
         'evento': evento,
+        'user': user,
         'is_past': is_past,
-        'fotos_galeria': fotos_galeria,
         'is_subscribed': is_subscribed,
-        'inscricoes': inscricoes,
-        'curtidas_pelo_usuario_ids': curtidas_pelo_usuario_ids,
         'has_paid': has_paid,
-        'total_participantes': total_participantes,
-        'is_premium': is_premium,
-        'is_aluno': is_aluno,
+        'is_creator': is_creator,
         'can_view_participants': can_view_participants,
-        'participant_preview': participant_preview,
+        'pode_curtir': pode_curtir,
+        'participantes': participantes,
+        'curtidas_pelo_usuario': curtidas_pelo_usuario,
     }
-    return render(request, 'events/evento_detail.html', context)
+    return await arender_parcial('partials/evento_controles.html', context,
+                                 oob=['partials/evento_visitante_oob.html'])
 
 
 @login_required
@@ -465,25 +513,34 @@ def processar_pagamento_view(request, evento_id):
 
     # --- AGORA SIM, PROCESSA O PAGAMENTO ---
 
-    # Cria o registro de Pagamento
-    pagamento = Pagamento.objects.create(
-        usuario=request.user,
-        evento=evento,
-        valor_pago=evento.preco,
-        status='aprovado',
-        id_transacao_externa=f"mock_{request.user.id}_{evento.id}_{timezone.now().timestamp()}"
-    )
+    with transaction.atomic():
+        # Cria o registro de Pagamento
+        pagamento = Pagamento.objects.create(
+            usuario=request.user,
+            evento=evento,
+            valor_pago=evento.preco,
+            status='aprovado',
+            id_transacao_externa=f"mock_{request.user.id}_{evento.id}_{timezone.now().timestamp()}"
+        )
 
-    # Garante que existe a Inscrição
-    inscricao, criada = Inscricao.objects.get_or_create(
-        id_aluno=aluno,
-        id_evento=evento
-    )
+        # Garante que existe a Inscrição
+        inscricao, criada = Inscricao.objects.get_or_create(
+            id_aluno=aluno,
+            id_evento=evento
+        )
 
-    # Atualiza vagas se necessário
-    if evento.vagas_restantes and evento.vagas_restantes > 0:
-        evento.vagas_restantes -= 1
-        evento.save()
+        # Ocupa uma vaga (só na inscrição nova; F() evita corrida entre compras)
+        if criada:
+            Evento.objects.filter(pk=evento.pk, vagas_restantes__gt=0).update(
+                vagas_restantes=F('vagas_restantes') - 1)
+
+    if request.headers.get('HX-Request'):
+        evento.refresh_from_db(fields=['vagas_restantes'])
+        return render_parcial(request, 'partials/pagamento_confirmado.html', {
+            'evento': evento,
+            'total_participantes': evento.inscricoes.count(),
+            'link_evento': True,
+        }, oob=['partials/contadores_evento_oob.html'])
 
     # Mensagem de sucesso
     messages.success(request,
@@ -1,14 +1,115 @@
+import csv
+from datetime import timedelta
+
 from django.contrib import admin
+from django.http import HttpResponse
+from django.urls import path
+from django.utils import timezone
 from .models import Usuario, Perfil, Aluno, Profissional, UsuarioPerfil, TipoConta, \
-    StatusSocial, VibeAfterOpcao, Avaliacao, SolicitacaoConexao
+    StatusSocial, VibeAfterOpcao, Avaliacao, SolicitacaoConexao, MetricaAssinaturaDiaria
+from . import metricas
+
+
+@admin.register(Usuario)
+class UsuarioAdmin(admin.ModelAdmin):
+    # premium_ate / plano_ativo_tipo são o snapshot da assinatura:
+    # listar e filtrar por eles não faz JOIN com AssinaturaPremium
+    list_display = ['email', 'first_name', 'last_name', 'plano_ativo_tipo', 'premium_ate']
+    list_filter = ['plano_ativo_tipo', 'cadastro_completo']
+    search_fields = ['email', 'first_name', 'last_name']
+
+
+# Os __str__ abaixo usam os usuários relacionados: list_select_related
+# evita uma consulta por linha na listagem do admin.
+@admin.register(Aluno)
+class AlunoAdmin(admin.ModelAdmin):
+    list_select_related = ['usuario']
+
+
+@admin.register(Profissional)
+class ProfissionalAdmin(admin.ModelAdmin):
+    list_select_related = ['usuario']
+
+
+@admin.register(Avaliacao)
+class AvaliacaoAdmin(admin.ModelAdmin):
+    list_select_related = ['autor__usuario', 'profissional_avaliado__usuario']
+
+
+@admin.register(SolicitacaoConexao)
+class SolicitacaoConexaoAdmin(admin.ModelAdmin):
+    list_select_related = ['solicitante', 'solicitado']
+
 
-admin.site.register(Usuario)
 admin.site.register(Perfil)
 admin.site.register(UsuarioPerfil)
-admin.site.register(Aluno)
-admin.site.register(Profissional)
 admin.site.register(TipoConta)
 admin.site.register(StatusSocial)
 admin.site.register(VibeAfterOpcao)
-admin.site.register(Avaliacao)
-admin.site.register(SolicitacaoConexao)
+
+
+@admin.register(MetricaAssinaturaDiaria)
+class MetricaAssinaturaDiariaAdmin(admin.ModelAdmin):
+    """
+    Dashboard de receita (MRR, churn, ativos por plano, renovação).
+    Lê apenas os rollups - nunca AssinaturaPremium.
+    Os dados são gerados pelo comando `rollup_subscriptions`.
+    """
+    change_list_template = 'admin/users/metricaassinaturadiaria/change_list.html'
+    list_display = ['data', 'tipo_plano', 'assinantes_ativos', 'mrr', 'novas',
+                    'renovacoes', 'cancelamentos', 'expiracoes']
+    list_filter = ['tipo_plano']
+    list_select_related = ['tipo_plano']
+    date_hierarchy = 'data'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        urls = [
+            path('exportar-csv/', self.admin_site.admin_view(self.exportar_csv_view),
+                 name='users_metricaassinaturadiaria_exportar_csv'),
+        ]
+        return urls + super().get_urls()
+
+    def _periodo(self, request):
+        """ Período do dashboard: ?dias=N (padrão: últimos 30 dias). """
+        try:
+            dias = max(int(request.GET.get('dias', 30)), 1)
+        except ValueError:
+            dias = 30
+        ate = timezone.localdate()
+        return ate - timedelta(days=dias - 1), ate, dias
+
+    def changelist_view(self, request, extra_context=None):
+        # 'dias' é parâmetro do dashboard, não um filtro do changelist
+        request.GET = request.GET.copy()
+        desde, ate, dias = self._periodo(request)
+        request.GET.pop('dias', None)
+
+        extra_context = extra_context or {}
+        extra_context['resumo'] = metricas.resumo(desde, ate)
+        extra_context['dias'] = dias
+        return super().changelist_view(request, extra_context=extra_context)
+
+    def exportar_csv_view(self, request):
+        desde, ate, _ = self._periodo(request)
+        linhas = MetricaAssinaturaDiaria.objects.filter(
+            data__gte=desde, data__lte=ate
+        ).select_related('tipo_plano').order_by('data', 'tipo_plano__nome')
+
+        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = (
+            f'attachment; filename="metricas_assinaturas_{desde}_{ate}.csv"'
+        )
+        writer = csv.writer(response)
+        writer.writerow(['data', 'plano', 'tipo_usuario', 'assinantes_ativos', 'mrr',
+                         'novas', 'renovacoes', 'cancelamentos', 'expiracoes'])
+        for m in linhas:
+            writer.writerow([m.data.isoformat(), m.tipo_plano.nome, m.tipo_plano.tipo_usuario,
+                             m.assinantes_ativos, m.mrr, m.novas, m.renovacoes,
+                             m.cancelamentos, m.expiracoes])
+        return response
@@ -0,0 +1,58 @@
+"""
+Backends de autenticação
+========================
+
+Mesmos backends de antes (Django e allauth), mas o usuário da sessão é
+carregado em UMA consulta junto com os perfis: select_related de
+'aluno', 'profissional' e 'aluno__tipo_conta'.
+
+Relações 1-para-1 reversas trazidas por select_related ficam em cache
+mesmo quando não existem (o Django guarda None). Assim `hasattr(user,
+'aluno')` / `hasattr(user, 'profissional')` não consultam o banco no resto
+do request - nem no middleware, nem nas views, nem nos templates.
+
+Sessões abertas antes da troca guardam o caminho antigo do backend
+(_auth_user_backend), que o Django não aceita mais: BACKENDS_RENOMEADOS
+diz o caminho novo de cada um e o BackendRenomeadoMiddleware
+(apps.users.middleware) atualiza a sessão no primeiro request, sem
+deslogar ninguém.
+"""
+
+from allauth.account.auth_backends import AuthenticationBackend as AllauthAuthenticationBackend
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+# Caminho antigo (gravado nas sessões) -> backend que o substitui
+BACKENDS_RENOMEADOS = {
+    'django.contrib.auth.backends.ModelBackend': 'apps.users.backends.PerfilModelBackend',
+    'allauth.account.auth_backends.AuthenticationBackend': 'apps.users.backends.PerfilAuthenticationBackend',
+}
+
+
+class CarregaPerfisMixin:
+    """
+    Sobrescreve get_user() e aget_user() (usados a cada request; o segundo
+    pelo request.auser() das views async) para trazer os perfis juntos.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = get_user_model()._default_manager.com_perfis().get(pk=user_id)
+        except get_user_model().DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        try:
+            user = await get_user_model()._default_manager.com_perfis().aget(pk=user_id)
+        except get_user_model().DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class PerfilModelBackend(CarregaPerfisMixin, ModelBackend):
+    """ Login tradicional (email/senha). """
+
+
+class PerfilAuthenticationBackend(CarregaPerfisMixin, AllauthAuthenticationBackend):
+    """ Login via allauth (inclui OAuth2). """
@@ -0,0 +1,110 @@
+"""
+Catálogo de planos em memória
+=============================
+
+Os planos ativos (TipoPlano) mudam raramente, mas as páginas de escolha
+e checkout de plano os consultavam a cada visita - e economia_mensal()
+ainda fazia um TipoPlano.objects.get() extra por plano.
+
+Aqui o catálogo é montado uma vez por processo, com valor_com_desconto,
+meses_duracao e economia_mensal já calculados, e reaproveitado até a
+versão mudar. A versão é a da tag 'planos' da camada de cache
+(apps.core.cache): salvar ou excluir um TipoPlano invalida a tag (ver
+apps.core.signals) e cada processo reconstrói o seu catálogo na próxima
+leitura. A versão vive no cache compartilhado entre os workers; além
+dela, o catálogo nunca fica mais velho que settings.CATALOGO_PLANOS_TTL
+segundos, caso uma invalidação se perca.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+
+from apps.core import cache as core_cache
+
+from .models import TipoPlano
+
+TAG = 'planos'
+
+_catalogo = {'versao': None, 'construido_em': 0.0, 'planos': (), 'por_id': {}}
+_lock = threading.Lock()
+
+
+def versao_atual():
+    """ Versão vigente do catálogo (a versão da tag 'planos'). """
+    return core_cache.versao_tags(TAG)
+
+
+def invalidar():
+    """ Publica uma nova versão: todos os processos reconstroem o catálogo. """
+    core_cache.invalidar_tags(TAG)
+
+
+def _construir():
+    """ Carrega os planos ativos (1 consulta) e pré-calcula os valores. """
+    planos = list(
+        TipoPlano.objects.filter(ativo=True).order_by('tipo_usuario', 'ordem', 'periodicidade')
+    )
+
+    # Plano mensal de referência de cada tipo de usuário (para a economia)
+    mensais = {}
+    for plano in planos:
+        if plano.periodicidade == 'mensal':
+            mensais.setdefault(plano.tipo_usuario, plano)
+
+    for plano in planos:
+        valor_final = plano.valor_com_desconto()
+        meses = plano.meses_duracao()
+
+        economia = 0
+        mensal = mensais.get(plano.tipo_usuario)
+        if plano.periodicidade != 'mensal' and mensal is not None:
+            economia = mensal.valor_com_desconto() * meses - valor_final
+
+        plano._valores_catalogo = {
+            'valor_com_desconto': valor_final,
+            'meses_duracao': meses,
+            'economia_mensal': economia,
+        }
+
+    return tuple(planos)
+
+
+def _obter_catalogo():
+    global _catalogo
+
+    versao = versao_atual()
+    if _em_dia(_catalogo, versao):
+        return _catalogo
+
+    with _lock:
+        if not _em_dia(_catalogo, versao):
+            planos = _construir()
+            # Troca a referência inteira: leitores nunca veem um catálogo pela metade
+            _catalogo = {
+                'versao': versao,
+                'construido_em': time.monotonic(),
+                'planos': planos,
+                'por_id': {plano.pk: plano for plano in planos},
+            }
+        return _catalogo
+
+
+def _em_dia(catalogo, versao):
+    """ Mesma versão da tag e dentro do prazo de CATALOGO_PLANOS_TTL. """
+    idade = time.monotonic() - catalogo['construido_em']
+    return catalogo['versao'] == versao and idade < settings.CATALOGO_PLANOS_TTL
+
+
+def planos_ativos(tipo_usuario):
+    """
+    Planos ativos de um tipo de usuário ('aluno' ou 'profissional'),
+    na ordem de exibição. Não consulta o banco se o catálogo está em dia.
+    """
+    return [plano for plano in _obter_catalogo()['planos'] if plano.tipo_usuario == tipo_usuario]
+
+
+def obter_plano(plano_id):
+    """ Plano ativo pelo id, ou None se não existir / estiver inativo. """
+    return _obter_catalogo()['por_id'].get(plano_id)
@@ -1,5 +1,10 @@
 from apps.users.models import SolicitacaoConexao
 from apps.events.models import InteracaoPresenca  # Importação do novo modelo
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from apps.core import cache as core_cache
+from apps.core.db_router import replica_para
 
 
 def notificacoes_context(request):
@@ -10,48 +15,81 @@ def notificacoes_context(request):
     2. Pedidos de conexão aceitos (que eu enviei e não vi).
     3. Curtidas de presença recebidas (que não vi).
     4. Likes de volta recebidos (que não vi).
+
+    As contagens são lidas da réplica, quando houver (ver apps.core.db_router).
     """
     if request.user.is_authenticated:
-        # --- LÓGICA DE CONEXÕES (WhatsApp) ---
-
-        # 1. Pedidos de conexão que EU RECEBI e estão pendentes
-        conexoes_pendentes = SolicitacaoConexao.objects.filter(
-            solicitado=request.user,
-            status='pendente'
-        ).count()
-
-        # 2. Pedidos que EU ENVIEI, foram aceitos, e eu NÃO VI AINDA
-        conexoes_aceitas_nao_lidas = SolicitacaoConexao.objects.filter(
-            solicitante=request.user,
-            status='aceita',
-            lida_pelo_solicitante=False
-        ).count()
-
-        # --- LÓGICA DE CURTIDAS (Presença em Eventos) ---
-
-        # 3. Curtidas que RECEBI na minha presença (alguém me curtiu)
-        # Buscamos interações onde a inscrição alvo pertence ao usuário logado
-        curtidas_recebidas_nao_lidas = InteracaoPresenca.objects.filter(
-            inscricao_alvo__id_aluno__usuario=request.user,
-            lida_pelo_alvo=False
-        ).count()
-
-        # 4. "Likes de volta" que RECEBI (eu curti alguém, e a pessoa aceitou/retribuiu)
-        # Buscamos interações onde EU sou o autor e o status agora é 'aceito'
-        likes_back_nao_lidos = InteracaoPresenca.objects.filter(
-            autor=request.user,
-            status_retorno='aceito',
-            lida_pelo_autor=False
-        ).count()
-
-        # --- SOMA TOTAL ---
-        total_notificacoes = (
-            conexoes_pendentes +
-            conexoes_aceitas_nao_lidas +
-            curtidas_recebidas_nao_lidas +
-            likes_back_nao_lidos
-        )
-
-        return {'contagem_notificacoes': total_notificacoes}
+        with replica_para(request):
+            return _contar_notificacoes(request)
 
     return {}
+
+
+def layout_context(request):
+    """
+    Chaves do {% cache %} dos menus do base.html (nome, foto e badges do
+    usuário). A versão do perfil muda quando o Usuario é salvo (tag
+    'usuario:<id>', ver apps.core.signals) e só é lida do cache se algum
+    template usar.
+    """
+    usuario = request.user
+    if usuario.is_authenticated:
+        versao = SimpleLazyObject(lambda: core_cache.versao_tags(f'usuario:{usuario.pk}'))
+    else:
+        versao = ''
+    return {'versao_perfil': versao, 'layout_cache_timeout': settings.LAYOUT_CACHE_TIMEOUT}
+
+
+def _contar_notificacoes(request):
+    total_notificacoes = sum(consulta.count() for consulta in consultas_notificacoes(request.user))
+    return {'contagem_notificacoes': total_notificacoes}
+
+
+async def acontar_notificacoes(usuario):
+    """ Mesma soma de notificacoes_context, para views async (polling do badge). """
+    total = 0
+    for consulta in consultas_notificacoes(usuario):
+        total += await consulta.acount()
+    return total
+
+
+def consultas_notificacoes(usuario):
+    """ As quatro consultas cuja soma é o número do badge de notificações. """
+    # --- LÓGICA DE CONEXÕES (WhatsApp) ---
+
+    # 1. Pedidos de conexão que EU RECEBI e estão pendentes
+    conexoes_pendentes = SolicitacaoConexao.objects.filter(
+        solicitado=usuario,
+        status='pendente'
+    )
+
+    # 2. Pedidos que EU ENVIEI, foram aceitos, e eu NÃO VI AINDA
+    conexoes_aceitas_nao_lidas = SolicitacaoConexao.objects.filter(
+        solicitante=usuario,
+        status='aceita',
+        lida_pelo_solicitante=False
+    )
+
+    # --- LÓGICA DE CURTIDAS (Presença em Eventos) ---
+
+    # 3. Curtidas que RECEBI na minha presença (alguém me curtiu)
+    # Buscamos interações onde o usuário logado é o alvo (dono da inscrição)
+    curtidas_recebidas_nao_lidas = InteracaoPresenca.objects.filter(
+        alvo_usuario=usuario,
+        lida_pelo_alvo=False
+    )
+
+    # 4. "Likes de volta" que RECEBI (eu curti alguém, e a pessoa aceitou/retribuiu)
+    # Buscamos interações onde EU sou o autor e o status agora é 'aceito'
+    likes_back_nao_lidos = InteracaoPresenca.objects.filter(
+        autor=usuario,
+        status_retorno='aceito',
+        lida_pelo_autor=False
+    )
+
+    return [
+        conexoes_pendentes,
+        conexoes_aceitas_nao_lidas,
+        curtidas_recebidas_nao_lidas,
+        likes_back_nao_lidos,
+    ]
@@ -0,0 +1,87 @@
+"""
+Entitlements (direitos de assinatura) do usuário
+================================================
+
+Reúne em um único objeto tudo o que o sistema precisa saber sobre a
+assinatura de um usuário: plano ativo, tipo de usuário do plano, data de
+expiração e os flags Premium/Pro.
+
+O objeto é calculado sob demanda (na primeira pergunta) com no máximo UMA consulta
+usando select_related('tipo_plano') e fica guardado na própria instância
+do usuário. Como o request.user é a mesma instância durante todo o
+request, middleware, decorators e views compartilham o mesmo resultado.
+"""
+
+from django.utils import timezone
+
+
+class Entitlements:
+    """
+    Snapshot (somente leitura) dos direitos de assinatura de um usuário.
+    Use sempre via `usuario.entitlements`, nunca instancie diretamente nas views.
+    """
+
+    def __init__(self, usuario):
+        self._usuario = usuario
+        self._carregado = False
+        self._assinatura = None
+
+    def _carregar(self):
+        """ Busca a assinatura ativa (com o plano) uma única vez. """
+        if self._carregado:
+            return
+
+        agora = timezone.now()
+        self._carregado = True
+
+        # Snapshot desnormalizado (Usuario.premium_ate, o fim da cadeia de
+        # assinaturas ativas, renovações incluídas) diz que não há
+        # assinatura vigente: nem precisa consultar AssinaturaPremium
+        premium_ate = self._usuario.premium_ate
+        if premium_ate is None or premium_ate < agora:
+            return
+
+        self._assinatura = self._usuario.assinaturas_premium.filter(
+            status='ativa',
+            data_inicio__lte=agora,
+            data_expiracao__gte=agora,
+            cancelada_pelo_usuario=False
+        ).select_related('tipo_plano').first()
+
+    @property
+    def assinatura(self):
+        """ A AssinaturaPremium ativa, ou None. """
+        self._carregar()
+        return self._assinatura
+
+    @property
+    def plano(self):
+        """ O TipoPlano da assinatura ativa, ou None. """
+        return self.assinatura.tipo_plano if self.assinatura else None
+
+    @property
+    def tipo_usuario(self):
+        """ 'aluno' ou 'profissional' (tipo do plano ativo), ou None. """
+        return self.plano.tipo_usuario if self.plano else None
+
+    @property
+    def data_expiracao(self):
+        """ Quando a assinatura ativa expira, ou None. """
+        return self.assinatura.data_expiracao if self.assinatura else None
+
+    @property
+    def tem_assinatura_ativa(self):
+        return self.assinatura is not None
+
+    @property
+    def eh_premium(self):
+        """ Aluno com plano Premium ativo. """
+        return hasattr(self._usuario, 'aluno') and self.tipo_usuario == 'aluno'
+
+    @property
+    def eh_profissional_ativo(self):
+        """ Profissional com plano Pro ativo. """
+        return (
+            hasattr(self._usuario, 'profissional') and
+            self.tipo_usuario == 'profissional'
+        )
@@ -0,0 +1,102 @@
+"""
+Benchmark dos modos de sessão
+=============================
+
+Mede requests/segundo e consultas ao banco por request nas páginas
+`home` e `evento_detail`, para cada modo de sessão (ver SESSION_MODE em
+settings.py), com um usuário autenticado.
+
+Os requests passam por toda a pilha de middlewares, dentro do próprio
+processo (django.test.Client) - o número mede o custo do Django + banco,
+sem rede. Rode contra um banco com dados (ex: após `seed_scale`).
+
+Uso:
+    python manage.py benchmark_sessions
+    python manage.py benchmark_sessions --requests 500 --email aluno@exemplo.com
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from apps.events.models import Evento
+from apps.users.models import Usuario
+
+
+class ContadorConsultas:
+    """ execute_wrapper que conta consultas (total e na tabela de sessões). """
+
+    def __init__(self):
+        self.total = 0
+        self.sessao = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        if 'django_session' in sql:
+            self.sessao += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Compara requests/s e consultas por request entre os modos de sessão.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests por página e por modo (padrão: 200)')
+        parser.add_argument('--email',
+                            help='Usuário autenticado (padrão: primeiro aluno com cadastro completo)')
+        parser.add_argument('--modos', nargs='+', default=list(settings.SESSION_ENGINES),
+                            choices=list(settings.SESSION_ENGINES),
+                            help='Modos a comparar (padrão: todos)')
+
+    def handle(self, *args, **options):
+        usuario = self._usuario(options['email'])
+        evento = Evento.objects.order_by('pk').first()
+        if evento is None:
+            raise CommandError('Nenhum evento cadastrado. Rode `seed_scale` antes.')
+
+        paginas = {
+            'home': reverse('home'),
+            'evento_detail': reverse('evento_detail', args=[evento.pk]),
+        }
+
+        self.stdout.write(f'Usuário: {usuario.email} | {options["requests"]} requests por página\n')
+        self.stdout.write(f'{"modo":<16}{"página":<16}{"req/s":>10}{"consultas/req":>16}{"sessão/req":>12}')
+
+        for modo in options['modos']:
+            with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[modo]):
+                client = Client()
+                client.force_login(usuario)
+
+                for nome, url in paginas.items():
+                    client.get(url)  # aquecimento (templates, cache, conexões)
+
+                    contador = ContadorConsultas()
+                    with connection.execute_wrapper(contador):
+                        inicio = time.perf_counter()
+                        for _ in range(options['requests']):
+                            resposta = client.get(url)
+                        duracao = time.perf_counter() - inicio
+
+                    if resposta.status_code != 200:
+                        self.stderr.write(f'  aviso: {nome} respondeu {resposta.status_code} no modo {modo}')
+
+                    n = options['requests']
+                    self.stdout.write(
+                        f'{modo:<16}{nome:<16}{n / duracao:>10.1f}'
+                        f'{contador.total / n:>16.1f}{contador.sessao / n:>12.2f}'
+                    )
+
+    def _usuario(self, email):
+        usuarios = Usuario.objects.filter(is_active=True)
+        if email:
+            usuario = usuarios.filter(email=email).first()
+        else:
+            usuario = usuarios.filter(cadastro_completo=True, aluno__isnull=False).order_by('pk').first()
+        if usuario is None:
+            raise CommandError('Usuário não encontrado. Informe --email ou rode `seed_scale` antes.')
+        return usuario
@@ -0,0 +1,94 @@
+"""
+Benchmark do process_subscriptions
+==================================
+
+Mede a vazão (assinaturas/s) do `process_subscriptions` em escala: para
+cada volume pedido, insere assinaturas vencidas sintéticas (metade com
+renovação automática) para os usuários existentes, roda o processamento
+com cada tamanho de lote e desfaz tudo no fim - o banco volta ao estado
+anterior.
+
+Rode contra o banco que se quer medir (PostgreSQL de produção ou de
+staging), com usuários já cadastrados (ex: após `seed_scale`).
+
+Uso:
+    python manage.py benchmark_subscriptions
+    python manage.py benchmark_subscriptions --linhas 1000000 --chunk-size 1000 5000 10000
+"""
+
+import io
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.users.management.commands.process_subscriptions import Command as ProcessSubscriptions
+from apps.users.models import AssinaturaPremium, TipoPlano, Usuario
+
+LOTE_INSERCAO = 10000
+
+
+class _DesfazerError(Exception):
+    """ Sai do atomic() da medição desfazendo tudo. """
+
+
+class Command(BaseCommand):
+    help = 'Mede assinaturas/s do process_subscriptions com milhares a milhões de assinaturas vencidas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, nargs='+', default=[10000, 100000, 1000000],
+                            help='Assinaturas vencidas por medição (padrão: 10000 100000 1000000)')
+        parser.add_argument('--chunk-size', type=int, nargs='+', default=[1000, 5000],
+                            help='Tamanhos de lote a comparar (padrão: 1000 5000)')
+
+    def handle(self, *args, **options):
+        usuarios = list(Usuario.objects.order_by('pk').values_list('pk', flat=True))
+        plano = TipoPlano.objects.filter(ativo=True).order_by('pk').first()
+        if not usuarios or plano is None:
+            raise CommandError('Sem usuários ou planos ativos. Rode `seed_scale` antes.')
+
+        self.stdout.write(f'{len(usuarios)} usuários | plano: {plano.nome}\n')
+        self.stdout.write(f'{"linhas":>10}{"lote":>8}{"expiradas":>12}{"renovadas":>12}{"segundos":>10}{"assin./s":>12}')
+
+        for linhas in options['linhas']:
+            for chunk_size in options['chunk_size']:
+                expiradas, renovadas, duracao = self._medir(linhas, chunk_size, usuarios, plano)
+                self.stdout.write(
+                    f'{linhas:>10}{chunk_size:>8}{expiradas:>12}{renovadas:>12}'
+                    f'{duracao:>10.2f}{expiradas / duracao if duracao else 0:>12,.0f}'
+                )
+
+    def _medir(self, linhas, chunk_size, usuarios, plano):
+        resultado = None
+        try:
+            with transaction.atomic():
+                self._inserir_vencidas(linhas, usuarios, plano)
+
+                comando = ProcessSubscriptions(stdout=io.StringIO())
+                comando.verbosity = 0
+                inicio = time.perf_counter()
+                expiradas, renovadas = comando.processar(chunk_size)
+                resultado = expiradas, renovadas, time.perf_counter() - inicio
+                raise _DesfazerError
+        except _DesfazerError:
+            pass
+        return resultado
+
+    def _inserir_vencidas(self, linhas, usuarios, plano):
+        """ Assinaturas ativas já vencidas, espalhadas pelos usuários. """
+        agora = timezone.now()
+        for inicio in range(0, linhas, LOTE_INSERCAO):
+            AssinaturaPremium.objects.bulk_create([
+                AssinaturaPremium(
+                    usuario_id=usuarios[numero % len(usuarios)],
+                    tipo_plano=plano,
+                    status='ativa',
+                    data_inicio=agora - timedelta(days=60, seconds=numero),
+                    data_expiracao=agora - timedelta(days=30, seconds=numero),
+                    valor_pago=plano.valor,
+                    renovacao_automatica=numero % 2 == 0,
+                )
+                for numero in range(inicio, min(inicio + LOTE_INSERCAO, linhas))
+            ])
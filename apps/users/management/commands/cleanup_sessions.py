@@ -0,0 +1,57 @@
+"""
+Limpeza de sessões expiradas em lotes
+=====================================
+
+Alternativa ao `clearsessions` do Django, que apaga tudo com um único
+DELETE (transação longa e bloqueios na django_session em tabelas grandes).
+Aqui as sessões expiradas são apagadas em lotes pequenos, cada um em sua
+própria transação, com uma pausa opcional entre eles.
+
+Só faz sentido nos modos de sessão 'db' e 'cached_db' (SESSION_MODE).
+
+Uso:
+    python manage.py cleanup_sessions
+    python manage.py cleanup_sessions --chunk-size 5000 --pause 0.1
+"""
+
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Apaga sessões expiradas da tabela django_session em lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Sessões apagadas por lote (padrão: 1000)')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Pausa em segundos entre lotes (padrão: 0)')
+
+    def handle(self, *args, **options):
+        agora = timezone.now()
+        inicio = time.monotonic()
+        total = 0
+
+        while True:
+            chaves = list(
+                Session.objects.filter(expire_date__lt=agora)
+                .values_list('session_key', flat=True)[:options['chunk_size']]
+            )
+            if not chaves:
+                break
+
+            apagadas, _ = Session.objects.filter(session_key__in=chaves).delete()
+            total += apagadas
+
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  lote: {apagadas} sessões')
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        duracao = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} sessões expiradas apagadas em {duracao:.2f}s.'
+        ))
@@ -0,0 +1,167 @@
+"""
+Processa o ciclo de vida das assinaturas
+========================================
+
+Expira assinaturas vencidas e cria as renovações automáticas.
+
+Percorre o índice (data_expiracao, status) em lotes. Cada lote roda em
+uma transação própria e faz apenas operações em conjunto:
+
+1. bulk_create das renovações (status 'pendente'), ignorando as que já
+   existem - a unicidade de `renovacao_de` garante no máximo uma por assinatura;
+2. UPDATE das assinaturas do lote para 'expirada';
+3. UPDATE do snapshot (premium_ate / plano_ativo_tipo) dos donos das
+   assinaturas do lote.
+
+Como as linhas processadas deixam de ser 'ativa', rodar de novo (ou
+retomar após uma falha) simplesmente continua de onde parou: um lote
+interrompido é desfeito por inteiro e volta a ser lido na próxima vez.
+
+O total de renovações informado é o de linhas de fato inseridas (as que
+já existiam são ignoradas pelo bulk_create e não entram na conta).
+Vazão medida em escala: `python manage.py benchmark_subscriptions`.
+
+Uso:
+    python manage.py process_subscriptions
+    python manage.py process_subscriptions --chunk-size 5000 --dry-run
+    python manage.py process_subscriptions --loop --interval 300   # modo worker
+"""
+
+import time
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.users.models import AssinaturaPremium, TipoPlano, Usuario
+
+
+class Command(BaseCommand):
+    help = 'Expira assinaturas vencidas e cria renovações automáticas em lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Quantidade de assinaturas por lote/transação (padrão: 1000)'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Apenas conta o que seria processado, sem alterar nada'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Modo worker: repete o processamento indefinidamente'
+        )
+        parser.add_argument(
+            '--interval', type=int, default=300,
+            help='Segundos entre execuções no modo --loop (padrão: 300)'
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+
+        while True:
+            self.processar(options['chunk_size'], options['dry_run'])
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def processar(self, chunk_size, dry_run=False):
+        """ Processa o que venceu até agora. Retorna (expiradas, renovações inseridas). """
+        agora = timezone.now()
+        vencidas = AssinaturaPremium.objects.filter(
+            status='ativa',
+            data_expiracao__lt=agora
+        )
+
+        if dry_run:
+            total = vencidas.count()
+            renovaveis = vencidas.filter(
+                renovacao_automatica=True,
+                cancelada_pelo_usuario=False,
+                renovacao__isnull=True
+            ).count()
+            self.stdout.write(
+                f'[dry-run] {total} assinaturas a expirar, {renovaveis} renovações a criar.'
+            )
+            return 0, 0
+
+        # O catálogo de planos é pequeno: carrega uma vez para calcular
+        # expiração e valor das renovações sem consultas por linha
+        planos = {plano.pk: plano for plano in TipoPlano.objects.all()}
+
+        inicio = time.monotonic()
+        total_expiradas = 0
+        total_renovadas = 0
+
+        while True:
+            with transaction.atomic():
+                lote = list(
+                    vencidas.order_by('data_expiracao', 'pk').values(
+                        'pk', 'usuario_id', 'tipo_plano_id', 'data_expiracao',
+                        'renovacao_automatica', 'cancelada_pelo_usuario'
+                    )[:chunk_size]
+                )
+                if not lote:
+                    break
+
+                total_renovadas += self._criar_renovacoes(lote, planos)
+
+                ids = [linha['pk'] for linha in lote]
+                total_expiradas += AssinaturaPremium.objects.filter(
+                    pk__in=ids,
+                    status='ativa'
+                ).update(status='expirada', updated_at=agora)
+
+                # Recalcula o snapshot dos donos do lote em um único UPDATE
+                Usuario.objects.sincronizar_snapshots_em_lote({linha['usuario_id'] for linha in lote})
+
+            if self.verbosity > 1:
+                self.stdout.write(f'  lote: {len(lote)} assinaturas')
+
+        duracao = time.monotonic() - inicio
+        por_segundo = total_expiradas / duracao if duracao > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_expiradas} assinaturas expiradas, {total_renovadas} renovações criadas '
+            f'em {duracao:.2f}s ({por_segundo:,.0f} assinaturas/s).'
+        ))
+        return total_expiradas, total_renovadas
+
+    def _criar_renovacoes(self, lote, planos):
+        """
+        Cria (em um único INSERT) as renovações das assinaturas do lote
+        que pedem renovação automática. Retorna quantas foram inseridas.
+        """
+        renovacoes = []
+        for linha in lote:
+            if not linha['renovacao_automatica'] or linha['cancelada_pelo_usuario']:
+                continue
+
+            plano = planos[linha['tipo_plano_id']]
+            data_inicio = linha['data_expiracao']
+            renovacoes.append(AssinaturaPremium(
+                usuario_id=linha['usuario_id'],
+                tipo_plano_id=plano.pk,
+                status='pendente',  # Será 'ativa' após confirmação de pagamento
+                data_inicio=data_inicio,
+                data_expiracao=data_inicio + relativedelta(months=plano.meses_duracao()),
+                valor_pago=plano.valor_com_desconto(),
+                renovacao_automatica=True,
+                renovacao_de_id=linha['pk'],
+                observacoes=f"Renovação automática da assinatura #{linha['pk']}"
+            ))
+
+        if not renovacoes:
+            return 0
+
+        # ignore_conflicts não informa o que foi inserido: conta as renovações
+        # do lote antes e depois (pelo índice único de renovacao_de)
+        renovacoes_do_lote = AssinaturaPremium.objects.filter(
+            renovacao_de_id__in=[renovacao.renovacao_de_id for renovacao in renovacoes]
+        )
+        antes = renovacoes_do_lote.count()
+        # bulk_create não chama save(): campos calculados já foram preenchidos acima
+        AssinaturaPremium.objects.bulk_create(renovacoes, ignore_conflicts=True)
+        return renovacoes_do_lote.count() - antes
@@ -0,0 +1,87 @@
+"""
+Rollup diário das métricas de assinatura
+========================================
+
+Preenche MetricaAssinaturaDiaria (MRR, ativos, novas, renovações,
+cancelamentos e expirações por plano e por dia).
+
+Sem argumentos o comando é incremental: recalcula a partir do último dia
+já gravado (que pode ter ficado parcial) até hoje. Para o histórico, use
+--desde/--ate; o período é dividido em blocos de dias processados em
+paralelo, cada bloco gravado em sua própria transação.
+
+Uso:
+    python manage.py rollup_subscriptions
+    python manage.py rollup_subscriptions --desde 2025-01-01 --workers 4 --dias-por-bloco 30
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from apps.users import metricas
+
+
+def _processar_bloco(desde, ate):
+    """ Executado em uma thread: cada thread usa (e fecha) a sua conexão. """
+    try:
+        return desde, ate, metricas.gravar_periodo(desde, ate)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Calcula os rollups diários de assinaturas (incremental ou backfill em paralelo).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=date.fromisoformat,
+                            help='Primeiro dia (AAAA-MM-DD). Padrão: último dia já calculado')
+        parser.add_argument('--ate', type=date.fromisoformat,
+                            help='Último dia (AAAA-MM-DD). Padrão: hoje')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Blocos processados em paralelo (padrão: 1)')
+        parser.add_argument('--dias-por-bloco', type=int, default=31,
+                            help='Tamanho de cada bloco de dias (padrão: 31)')
+
+    def handle(self, *args, **options):
+        if options['dias_por_bloco'] < 1:
+            raise CommandError('--dias-por-bloco deve ser pelo menos 1.')
+
+        hoje = timezone.localdate()
+        ate = options['ate'] or hoje
+        desde = (
+            options['desde'] or
+            metricas.ultima_data_calculada() or
+            metricas.primeira_data_com_assinatura()
+        )
+
+        if desde is None:
+            self.stdout.write('Nenhuma assinatura encontrada. Nada a calcular.')
+            return
+        if desde > ate:
+            raise CommandError('--desde deve ser anterior ou igual a --ate.')
+
+        blocos = []
+        inicio = desde
+        while inicio <= ate:
+            fim = min(inicio + timedelta(days=options['dias_por_bloco'] - 1), ate)
+            blocos.append((inicio, fim))
+            inicio = fim + timedelta(days=1)
+
+        self.stdout.write(f'Calculando {desde} a {ate} em {len(blocos)} bloco(s)...')
+
+        if options['workers'] <= 1:
+            for inicio, fim in blocos:
+                dias = metricas.gravar_periodo(inicio, fim)
+                self.stdout.write(f'  {inicio} a {fim}: {dias} dia(s)')
+        else:
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                futuros = [executor.submit(_processar_bloco, inicio, fim) for inicio, fim in blocos]
+                for futuro in as_completed(futuros):
+                    inicio, fim, dias = futuro.result()
+                    self.stdout.write(f'  {inicio} a {fim}: {dias} dia(s)')
+
+        self.stdout.write(self.style.SUCCESS('Rollups atualizados.'))
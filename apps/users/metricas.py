@@ -0,0 +1,158 @@
+"""
+Métricas de receita das assinaturas
+===================================
+
+Cálculo dos rollups diários (MetricaAssinaturaDiaria) a partir de
+AssinaturaPremium e leitura agregada desses rollups para o dashboard.
+
+Regras usadas em todo o cálculo:
+- Assinaturas 'pendente' (pagamento não confirmado) não contam.
+- Uma assinatura está ativa no fim do dia D se começou antes do fim de D,
+  expira depois dele e não foi cancelada até lá.
+- MRR = valor pago / meses do plano, somado sobre os ativos.
+- Renovação = assinatura com `renovacao_de` preenchido.
+"""
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from .models import AssinaturaPremium, MetricaAssinaturaDiaria, TipoPlano
+
+
+def _limites_do_dia(dia):
+    """ Início e fim do dia no fuso do projeto (TIME_ZONE). """
+    inicio = timezone.make_aware(datetime.combine(dia, time.min))
+    return inicio, inicio + timedelta(days=1)
+
+
+def calcular_dia(dia, planos):
+    """
+    Calcula as métricas de um dia para todos os planos.
+    Uma única consulta agregada, restrita às assinaturas que tocam o dia.
+    Retorna instâncias não salvas de MetricaAssinaturaDiaria.
+    """
+    inicio, fim = _limites_do_dia(dia)
+
+    ativa_no_fim = (
+        Q(data_inicio__lt=fim) &
+        Q(data_expiracao__gte=fim) &
+        (Q(data_cancelamento__isnull=True) | Q(data_cancelamento__gte=fim))
+    )
+    comecou_no_dia = Q(data_inicio__gte=inicio, data_inicio__lt=fim)
+
+    linhas = AssinaturaPremium.objects.filter(
+        data_inicio__lt=fim,
+        data_expiracao__gte=inicio
+    ).exclude(
+        status='pendente'
+    ).values('tipo_plano_id').annotate(
+        assinantes_ativos=Count('pk', filter=ativa_no_fim),
+        receita_ativos=Sum('valor_pago', filter=ativa_no_fim),
+        novas=Count('pk', filter=comecou_no_dia & Q(renovacao_de__isnull=True)),
+        renovacoes=Count('pk', filter=comecou_no_dia & Q(renovacao_de__isnull=False)),
+        cancelamentos=Count('pk', filter=Q(data_cancelamento__gte=inicio, data_cancelamento__lt=fim)),
+        expiracoes=Count('pk', filter=Q(data_expiracao__gte=inicio, data_expiracao__lt=fim)),
+    )
+
+    metricas = []
+    for linha in linhas:
+        plano = planos[linha['tipo_plano_id']]
+        receita = linha['receita_ativos'] or Decimal('0')
+        metricas.append(MetricaAssinaturaDiaria(
+            data=dia,
+            tipo_plano_id=plano.pk,
+            assinantes_ativos=linha['assinantes_ativos'],
+            mrr=(receita / plano.meses_duracao()).quantize(Decimal('0.01')),
+            novas=linha['novas'],
+            renovacoes=linha['renovacoes'],
+            cancelamentos=linha['cancelamentos'],
+            expiracoes=linha['expiracoes'],
+        ))
+    return metricas
+
+
+def gravar_periodo(desde, ate):
+    """
+    (Re)calcula e grava os rollups de `desde` até `ate` (inclusive).
+    Substitui as linhas do período em uma transação: pode ser repetido.
+    Retorna quantos dias foram processados.
+    """
+    planos = {plano.pk: plano for plano in TipoPlano.objects.all()}
+
+    metricas = []
+    dia = desde
+    while dia <= ate:
+        metricas.extend(calcular_dia(dia, planos))
+        dia += timedelta(days=1)
+
+    with transaction.atomic():
+        MetricaAssinaturaDiaria.objects.filter(data__gte=desde, data__lte=ate).delete()
+        MetricaAssinaturaDiaria.objects.bulk_create(metricas, batch_size=1000)
+
+    return (ate - desde).days + 1
+
+
+def ultima_data_calculada():
+    """ Último dia com rollup gravado, ou None. """
+    return MetricaAssinaturaDiaria.objects.aggregate(ultima=Max('data'))['ultima']
+
+
+def primeira_data_com_assinatura():
+    """ Dia da assinatura mais antiga (início do backfill), ou None. """
+    primeira = AssinaturaPremium.objects.exclude(status='pendente').order_by('data_inicio').first()
+    if primeira is None:
+        return None
+    return timezone.localtime(primeira.data_inicio).date()
+
+
+def resumo(desde, ate):
+    """
+    Indicadores do período lidos somente dos rollups:
+    MRR e ativos por plano no último dia, churn e taxa de renovação.
+    """
+    metricas = MetricaAssinaturaDiaria.objects.filter(data__gte=desde, data__lte=ate)
+
+    ultimo_dia = metricas.aggregate(ultima=Max('data'))['ultima']
+    por_plano = list(
+        metricas.filter(data=ultimo_dia).select_related('tipo_plano').order_by(
+            'tipo_plano__tipo_usuario', 'tipo_plano__ordem'
+        )
+    ) if ultimo_dia else []
+
+    # Ativos no início do período = fotografia do dia anterior
+    ativos_inicio = MetricaAssinaturaDiaria.objects.filter(
+        data=desde - timedelta(days=1)
+    ).aggregate(total=Sum('assinantes_ativos'))['total'] or 0
+
+    movimentos = metricas.aggregate(
+        novas=Sum('novas'),
+        renovacoes=Sum('renovacoes'),
+        cancelamentos=Sum('cancelamentos'),
+        expiracoes=Sum('expiracoes'),
+    )
+    movimentos = {chave: valor or 0 for chave, valor in movimentos.items()}
+
+    # Churn: quem expirou sem renovar, sobre a base do início do período
+    perdidos = max(movimentos['expiracoes'] - movimentos['renovacoes'], 0)
+    churn = (perdidos / ativos_inicio * 100) if ativos_inicio else None
+    taxa_renovacao = (
+        movimentos['renovacoes'] / movimentos['expiracoes'] * 100
+        if movimentos['expiracoes'] else None
+    )
+
+    return {
+        'desde': desde,
+        'ate': ate,
+        'ultimo_dia': ultimo_dia,
+        'por_plano': por_plano,
+        'mrr_total': sum((m.mrr for m in por_plano), Decimal('0')),
+        'ativos_total': sum(m.assinantes_ativos for m in por_plano),
+        'ativos_inicio': ativos_inicio,
+        'churn': churn,
+        'taxa_renovacao': taxa_renovacao,
+        **movimentos,
+    }
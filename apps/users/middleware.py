@@ -1,14 +1,121 @@
 """
-Middleware de Completude de Cadastro - VERSÃO CORRIGIDA
-========================================================
+Middleware de Completude de Cadastro
+====================================
 
-CORREÇÃO: Permite que profissionais acessem as páginas de escolher/comprar
-plano mesmo sem ter assinatura ativa ainda.
+Garante que usuários autenticados completem o cadastro e que profissionais
+tenham assinatura ativa, permitindo que acessem as páginas de
+escolher/comprar plano mesmo sem assinatura.
+
+Desempenho:
+- As regras de caminho (URLs isentas e páginas de plano) viram UMA regex
+  compilada na inicialização, montada a partir dos nomes das URLs.
+- O papel do usuário (aluno/profissional) fica em um snapshot assinado na
+  sessão, validado contra campos que já vêm na linha do usuário.
+- A assinatura é conferida pelo snapshot desnormalizado (Usuario.premium_ate).
+Resultado: requests que não redirecionam não fazem nenhuma consulta extra.
+
+Funciona em WSGI e ASGI; no modo async, anônimos, staff e URLs isentas
+passam sem sair do event loop.
+
+Um nome de URL que não existe (rota renomeada ou removida) é registrado no
+log e a regra correspondente é ignorada; o resto da política continua
+valendo.
 """
 
-from django.shortcuts import redirect
-from django.urls import reverse
+import logging
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.core import signing
+from django.shortcuts import redirect
+from django.urls import NoReverseMatch, reverse
+
+from .backends import BACKENDS_RENOMEADOS
+
+logger = logging.getLogger(__name__)
+
+# Prefixos fixos que não devem ser interceptados
+PREFIXOS_ISENTOS = [
+    '/accounts/',  # Todas as URLs do allauth
+    '/admin/',
+    '/static/',
+    '/media/',
+]
+
+# URLs (por nome) que precisam ser acessíveis durante o cadastro
+URLS_ISENTAS = [
+    'account_complete_profile',
+    'account_complete_profile_profissional',
+    'escolher_plano',
+    'escolher_plano_obrigatorio',
+    'account_logout',
+]
+
+# Páginas de plano liberadas para profissionais ainda sem assinatura
+URLS_DE_PLANO = [
+    'escolher_plano',
+    'escolher_plano_obrigatorio',
+    'checkout_assinatura',
+    'processar_assinatura',
+    'process_premium_payment',
+    'mock_premium_checkout',
+    'modal_premium',
+]
+
+CHAVE_SESSAO_SNAPSHOT = '_perfil_snapshot'
+SALT_SNAPSHOT = 'apps.users.middleware.perfil_snapshot'
+
+# Valor usado para "reverter" URLs com parâmetros até o primeiro parâmetro
+_SENTINELA = 987654321
+
+
+def prefixo_da_url(nome):
+    """
+    Caminho de uma URL nomeada até o primeiro parâmetro.
+    Ex: 'checkout_assinatura' -> '/assinatura/checkout/'
+    """
+    try:
+        return reverse(nome)
+    except NoReverseMatch:
+        caminho = reverse(nome, args=[_SENTINELA])
+        return caminho[:caminho.index(str(_SENTINELA))]
+
+
+def resolver_urls(nomes, resolver=reverse):
+    """
+    Caminhos das URLs nomeadas, na mesma ordem. Um nome que não existe é
+    registrado no log e fica de fora (a regra dele é ignorada).
+    """
+    caminhos = []
+    for nome in nomes:
+        try:
+            caminhos.append(resolver(nome))
+        except NoReverseMatch:
+            logger.error("ProfileCompletionMiddleware: a URL '%s' não existe; regra ignorada.", nome)
+    return caminhos
+
+
+def resolver_url(nome):
+    """ Caminho de uma URL nomeada, ou None (registrado no log) se não existir. """
+    caminhos = resolver_urls([nome])
+    return caminhos[0] if caminhos else None
+
+
+def compilar_politica(isentos, de_plano):
+    """
+    Compila os prefixos em uma única regex com dois grupos nomeados.
+    Os mais longos vêm primeiro para que o prefixo mais específico vença.
+    """
+    def alternativas(prefixos):
+        unicos = sorted(set(prefixos), key=len, reverse=True)
+        return '|'.join(re.escape(prefixo) for prefixo in unicos) or r'(?!)'
+
+    return re.compile(
+        rf'(?P<isento>{alternativas(isentos)})|(?P<plano>{alternativas(de_plano)})'
+    )
 
 
 class ProfileCompletionMiddleware:
@@ -16,94 +123,177 @@ class ProfileCompletionMiddleware:
     Middleware que garante que usuários autenticados completem o cadastro.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
-        # URLs que não devem ser interceptadas
-        self.exempt_urls = [
-            '/accounts/',  # Todas as URLs do allauth
-            '/admin/',
-            '/static/',
-            '/media/',
-        ]
+        isentos = list(PREFIXOS_ISENTOS)
+        for prefixo in (settings.STATIC_URL, settings.MEDIA_URL):
+            if prefixo:
+                isentos.append('/' + prefixo.lstrip('/'))
 
-        # URLs específicas que precisam ser acessíveis
-        try:
-            self.exempt_urls.extend([
-                reverse('account_complete_profile'),
-                reverse('account_complete_profile_profissional'),
-                reverse('escolher_plano'),
-                reverse('escolher_plano_obrigatorio'),
-                reverse('account_logout'),
-            ])
-        except:
-            pass
+        # URLs específicas: resolvidas uma única vez, aqui. Destinos que não
+        # existem ficam None e o redirecionamento correspondente é pulado
+        isentos.extend(resolver_urls(URLS_ISENTAS))
+        de_plano = resolver_urls(URLS_DE_PLANO, resolver=prefixo_da_url)
+        self.url_complete_profile = resolver_url('account_complete_profile')
+        self.url_complete_profile_profissional = resolver_url('account_complete_profile_profissional')
+        self.url_escolher_plano_obrigatorio = resolver_url('escolher_plano_obrigatorio')
+
+        self.politica = compilar_politica(isentos, de_plano)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        user = request.user
+
+        async def auser():
+            return user
+        # Mesmo motivo do __acall__, no sentido inverso: views async servidas
+        # pelo WSGI reaproveitam o usuário já carregado em request.auser()
+        request.auser = auser
+
+        if self.precisa_verificar(user, request.path):
+            redirecionamento = self.verificar(request)
+            if redirecionamento is not None:
+                return redirecionamento
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        user = await request.auser()
+        if self.precisa_verificar(user, request.path):
+            # request.user e request.auser() têm caches separados: sem isto o
+            # usuário seria buscado de novo no banco dentro de verificar()
+            request.user = user
+            # Sessão e ORM síncronos: a verificação roda em uma thread
+            redirecionamento = await sync_to_async(self.verificar)(request)
+            if redirecionamento is not None:
+                return redirecionamento
+        return await self.get_response(request)
+
+    def precisa_verificar(self, user, path):
         # Se não está autenticado, deixa passar
-        if not request.user.is_authenticated:
-            return self.get_response(request)
+        if not user.is_authenticated:
+            return False
 
         # Se é staff/superuser, deixa passar
-        if request.user.is_staff or request.user.is_superuser:
-            return self.get_response(request)
+        if user.is_staff or user.is_superuser:
+            return False
+
+        # Verifica se está nas URLs de exceção (regex compilada)
+        match = self.politica.match(path)
+        return not (match and match.lastgroup == 'isento')
 
-        # Pega o caminho atual
+    def verificar(self, request):
+        """ Redirecionamento para a etapa pendente do cadastro, ou None. """
         path = request.path
+        match = self.politica.match(path)
 
-        # Verifica se está nas URLs de exceção
-        if any(path.startswith(exempt_url) for exempt_url in self.exempt_urls):
-            return self.get_response(request)
+        papel = self.papel_do_usuario(request)
 
         # ===== VERIFICAÇÃO 1: Cadastro completo? =====
 
         if not request.user.cadastro_completo:
             # Redireciona para a página de completar cadastro apropriada
-            if hasattr(request.user, 'aluno'):
-                if path != reverse('account_complete_profile'):
+            if papel == 'aluno' and self.url_complete_profile:
+                if path != self.url_complete_profile:
                     messages.info(
                         request,
                         'Complete seu perfil de aluno para começar a usar a plataforma.'
                     )
-                    return redirect('account_complete_profile')
+                    return redirect(self.url_complete_profile)
 
-            elif hasattr(request.user, 'profissional'):
-                if path != reverse('account_complete_profile_profissional'):
+            elif papel == 'profissional' and self.url_complete_profile_profissional:
+                if path != self.url_complete_profile_profissional:
                     messages.info(
                         request,
                         'Complete seu perfil profissional para começar a divulgar seus serviços.'
                     )
-                    return redirect('account_complete_profile_profissional')
+                    return redirect(self.url_complete_profile_profissional)
 
         # ===== VERIFICAÇÃO 2: Profissional com assinatura? =====
 
-        if hasattr(request.user, 'profissional'):
-            if not request.user.tem_assinatura_ativa():
-                # URLs relacionadas a planos que devem ser PERMITIDAS
-                plano_related_paths = [
-                    '/assinatura/escolher-plano',
-                    '/assinatura/checkout',
-                    '/assinatura/processar',
-                    '/premium/',
-                ]
-
-                # Verifica se está em alguma página relacionada a planos
-                is_plano_page = any(path.startswith(plano_path) for plano_path in plano_related_paths)
-
-                # Se NÃO está em página de plano, redireciona
-                if not is_plano_page:
-                    try:
-                        escolher_plano_path = reverse('escolher_plano_obrigatorio')
-                        if path != escolher_plano_path:
-                            messages.warning(
-                                request,
-                                'Profissionais precisam ter uma assinatura ativa. '
-                                'Escolha seu plano para começar a usar a plataforma!'
-                            )
-                            return redirect('escolher_plano_obrigatorio')
-                    except:
-                        # Se a URL não existir, apenas deixa passar
-                        pass
+        if papel == 'profissional' and not request.user.assinatura_snapshot_ativa():
+            # Se NÃO está em página de plano, redireciona
+            is_plano_page = match is not None and match.lastgroup == 'plano'
+            if not is_plano_page and self.url_escolher_plano_obrigatorio:
+                if path != self.url_escolher_plano_obrigatorio:
+                    messages.warning(
+                        request,
+                        'Profissionais precisam ter uma assinatura ativa. '
+                        'Escolha seu plano para começar a usar a plataforma!'
+                    )
+                    return redirect(self.url_escolher_plano_obrigatorio)
 
         # Tudo OK - pode acessar
+        return None
+
+    def papel_do_usuario(self, request):
+        """
+        'aluno', 'profissional' ou None, lido do snapshot assinado na sessão.
+
+        O snapshot guarda também o pk, perfil_escolhido e cadastro_completo do
+        usuário: se algum deles mudou (ex: acabou de escolher o perfil), o
+        papel é recalculado - nos demais requests não há consulta alguma.
+        """
+        user = request.user
+        impressao = [user.pk, user.perfil_escolhido, user.cadastro_completo]
+
+        assinado = request.session.get(CHAVE_SESSAO_SNAPSHOT)
+        if assinado:
+            try:
+                snapshot = signing.loads(assinado, salt=SALT_SNAPSHOT)
+                if snapshot.get('impressao') == impressao:
+                    return snapshot.get('papel')
+            except signing.BadSignature:
+                pass
+
+        if hasattr(user, 'aluno'):
+            papel = 'aluno'
+        elif hasattr(user, 'profissional'):
+            papel = 'profissional'
+        else:
+            papel = None
+
+        request.session[CHAVE_SESSAO_SNAPSHOT] = signing.dumps(
+            {'impressao': impressao, 'papel': papel},
+            salt=SALT_SNAPSHOT
+        )
+        return papel
+
+
+class BackendRenomeadoMiddleware:
+    """
+    Troca, na sessão, o caminho antigo do backend de autenticação pelo de
+    apps.users.backends (ver BACKENDS_RENOMEADOS). Deve vir antes do
+    AuthenticationMiddleware. Pode sair quando as sessões anteriores à troca
+    tiverem expirado (SESSION_COOKIE_AGE).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        novo = BACKENDS_RENOMEADOS.get(request.session.get(BACKEND_SESSION_KEY))
+        if novo:
+            request.session[BACKEND_SESSION_KEY] = novo
         return self.get_response(request)
+
+    async def __acall__(self, request):
+        novo = BACKENDS_RENOMEADOS.get(await request.session.aget(BACKEND_SESSION_KEY))
+        if novo:
+            await request.session.aset(BACKEND_SESSION_KEY, novo)
+        return await self.get_response(request)
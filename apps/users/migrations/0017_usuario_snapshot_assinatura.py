@@ -0,0 +1,70 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:11
+
+from itertools import groupby
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def calcular_snapshot(assinaturas, agora):
+    """
+    Cópia de UsuarioManager._calcular_snapshot (o modelo histórico não tem
+    os métodos do manager): fim da cadeia contínua de assinaturas que cobre
+    `agora`, estendida pelas renovações pagas que começam quando a anterior
+    expira. `assinaturas`: (data_inicio, data_expiracao, tipo_usuario) de
+    um usuário, em ordem de data_inicio.
+    """
+    premium_ate = plano_ativo_tipo = None
+    for data_inicio, data_expiracao, tipo_usuario in assinaturas:
+        if data_inicio <= agora:
+            if premium_ate is None or data_expiracao > premium_ate:
+                premium_ate, plano_ativo_tipo = data_expiracao, tipo_usuario
+        elif premium_ate is not None and data_inicio <= premium_ate:
+            premium_ate = max(premium_ate, data_expiracao)
+        else:
+            break
+    return premium_ate, plano_ativo_tipo
+
+
+def popular_snapshot(apps, schema_editor):
+    # Preenche o snapshot como o primeiro sincronizar_snapshot_assinatura faria
+    Usuario = apps.get_model('users', 'Usuario')
+    AssinaturaPremium = apps.get_model('users', 'AssinaturaPremium')
+
+    agora = timezone.now()
+    vigentes = AssinaturaPremium.objects.filter(
+        status='ativa',
+        data_expiracao__gte=agora,
+        cancelada_pelo_usuario=False
+    ).order_by('usuario_id', 'data_inicio').values_list(
+        'usuario_id', 'data_inicio', 'data_expiracao', 'tipo_plano__tipo_usuario'
+    )
+
+    for usuario_id, linhas in groupby(vigentes.iterator(), key=lambda linha: linha[0]):
+        premium_ate, plano_ativo_tipo = calcular_snapshot((linha[1:] for linha in linhas), agora)
+        if premium_ate is not None:
+            Usuario.objects.filter(pk=usuario_id).update(
+                premium_ate=premium_ate,
+                plano_ativo_tipo=plano_ativo_tipo
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0016_usuario_metodo_registro_usuario_perfil_escolhido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='plano_ativo_tipo',
+            field=models.CharField(blank=True, choices=[('aluno', 'Aluno Premium'), ('profissional', 'Profissional Pro')], help_text='Tipo de usuário do plano ativo (snapshot)', max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='premium_ate',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Expiração da assinatura ativa (snapshot). Vazio = sem assinatura', null=True),
+        ),
+        migrations.RunPython(popular_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0017_usuario_snapshot_assinatura'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assinaturapremium',
+            name='renovacao_de',
+            field=models.OneToOneField(blank=True, help_text='Assinatura que originou esta renovação (no máximo uma renovação por assinatura)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='renovacao', to='users.assinaturapremium'),
+        ),
+    ]
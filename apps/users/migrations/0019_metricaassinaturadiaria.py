@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0018_assinaturapremium_renovacao_de'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricaAssinaturaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('assinantes_ativos', models.IntegerField(default=0)),
+                ('mrr', models.DecimalField(decimal_places=2, default=0, help_text='Receita mensal recorrente (valor pago / meses do plano) dos ativos', max_digits=12)),
+                ('novas', models.IntegerField(default=0)),
+                ('renovacoes', models.IntegerField(default=0)),
+                ('cancelamentos', models.IntegerField(default=0)),
+                ('expiracoes', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tipo_plano', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='metricas_diarias', to='users.tipoplano')),
+            ],
+            options={
+                'verbose_name': 'Métrica Diária de Assinaturas',
+                'verbose_name_plural': 'Métricas Diárias de Assinaturas',
+                'ordering': ['-data', 'tipo_plano'],
+                'constraints': [models.UniqueConstraint(fields=('data', 'tipo_plano'), name='unique_metrica_assinatura_dia_plano')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0019_metricaassinaturadiaria'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='assinaturapremium',
+            name='users_assin_usuario_bdedc8_idx',
+        ),
+        migrations.AddIndex(
+            model_name='assinaturapremium',
+            index=models.Index(fields=['usuario', 'status', 'data_expiracao'], name='users_assin_usuario_033940_idx'),
+        ),
+    ]
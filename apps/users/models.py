@@ -1,13 +1,18 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 import io
+from collections import defaultdict
 from io import BytesIO
 from django.core.files.base import ContentFile
-from PIL import Image
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
-from dateutil.relativedelta import relativedelta
+
+# Pillow e dateutil são importados dentro dos métodos que os usam: este
+# módulo carrega no boot de todo worker e comando, e a maioria nunca
+# processa uma imagem (ver `manage.py profile_imports`).
+
+from .entitlements import Entitlements
 
 
 class ImageResizingMixin:
@@ -21,6 +26,8 @@ class ImageResizingMixin:
 
     def resize_image(self, image_field):
         """ Redimensiona e otimiza a imagem. """
+        from PIL import Image
+
         try:
             # Abre a imagem em memória
             img = Image.open(image_field)
@@ -107,6 +114,116 @@ class UsuarioManager(BaseUserManager):
         # first_name e last_name virão de 'REQUIRED_FIELDS' e estarão em extra_fields
         return self.create_user(email, password, **extra_fields)
 
+    def com_perfis(self):
+        """
+        Usuários já com os perfis carregados (uma consulta, com JOINs).
+        Depois disso hasattr(user, 'aluno'/'profissional') não consulta o banco.
+        """
+        return self.get_queryset().select_related('aluno', 'profissional', 'aluno__tipo_conta')
+
+    def com_assinatura_ativa(self, tipo_usuario=None):
+        """
+        Usuários com assinatura ativa AGORA, usando apenas o snapshot
+        (premium_ate / plano_ativo_tipo) - sem JOIN com AssinaturaPremium.
+        tipo_usuario: 'aluno' (Premium) ou 'profissional' (Pro), opcional.
+        """
+        queryset = self.get_queryset().filter(premium_ate__gte=timezone.now())
+        if tipo_usuario:
+            queryset = queryset.filter(plano_ativo_tipo=tipo_usuario)
+        return queryset
+
+    @staticmethod
+    def _assinaturas_vigentes(agora):
+        """ Assinaturas ativas que ainda não terminaram (inclui as que começam no futuro). """
+        return AssinaturaPremium.objects.filter(
+            status='ativa',
+            data_expiracao__gte=agora,
+            cancelada_pelo_usuario=False
+        ).order_by('usuario_id', 'data_inicio')
+
+    @staticmethod
+    def _calcular_snapshot(assinaturas, agora):
+        """
+        (premium_ate, plano_ativo_tipo) a partir das linhas
+        (data_inicio, data_expiracao, tipo_usuario) de um usuário, em ordem
+        de data_inicio.
+
+        premium_ate é o fim da cadeia contínua de assinaturas que cobre
+        `agora`: uma renovação paga que começa quando a atual expira
+        (renovar() usa data_inicio=data_expiracao) estende o snapshot, senão
+        ele venceria antes da hora e o atalho de Entitlements negaria o
+        acesso durante a renovação.
+        """
+        premium_ate = plano_ativo_tipo = None
+        for data_inicio, data_expiracao, tipo_usuario in assinaturas:
+            if data_inicio <= agora:
+                # Vigente agora: o plano é o da que vai mais longe
+                if premium_ate is None or data_expiracao > premium_ate:
+                    premium_ate, plano_ativo_tipo = data_expiracao, tipo_usuario
+            elif premium_ate is not None and data_inicio <= premium_ate:
+                # Começa antes (ou no instante) em que a cadeia termina
+                premium_ate = max(premium_ate, data_expiracao)
+            else:
+                break
+        return premium_ate, plano_ativo_tipo
+
+    def sincronizar_snapshot_assinatura(self, usuario_id):
+        """
+        Recalcula premium_ate / plano_ativo_tipo a partir das assinaturas.
+        Deve rodar dentro da mesma transação que alterou a assinatura:
+        a linha do usuário é travada antes do cálculo para serializar
+        alterações concorrentes.
+        """
+        with transaction.atomic(using=self.db):
+            # Trava a linha do usuário (no-op em bancos sem SELECT FOR UPDATE)
+            list(self.get_queryset().select_for_update().filter(pk=usuario_id).values_list('pk'))
+
+            agora = timezone.now()
+            assinaturas = self._assinaturas_vigentes(agora).filter(usuario_id=usuario_id).values_list(
+                'data_inicio', 'data_expiracao', 'tipo_plano__tipo_usuario'
+            )
+            premium_ate, plano_ativo_tipo = self._calcular_snapshot(assinaturas, agora)
+
+            self.get_queryset().filter(pk=usuario_id).update(
+                premium_ate=premium_ate,
+                plano_ativo_tipo=plano_ativo_tipo
+            )
+
+        return premium_ate, plano_ativo_tipo
+
+    def sincronizar_snapshots_em_lote(self, usuarios_ids):
+        """
+        Recalcula o snapshot de vários usuários em um único UPDATE, com
+        subconsultas correlacionadas pela assinatura vigente de cada um.
+        Só os usuários com assinatura ativa começando no futuro (renovação
+        paga, que pode estender a cadeia) são recalculados um a um depois.
+        Para rotinas em lote (expiração, carga de dados), sem travas por linha.
+        """
+        agora = timezone.now()
+        assinaturas = self._assinaturas_vigentes(agora)
+        vigente = assinaturas.filter(
+            usuario_id=models.OuterRef('pk'),
+            data_inicio__lte=agora
+        ).order_by('-data_expiracao')
+        atualizados = self.get_queryset().filter(pk__in=usuarios_ids).update(
+            premium_ate=models.Subquery(vigente.values('data_expiracao')[:1]),
+            plano_ativo_tipo=models.Subquery(vigente.values('tipo_plano__tipo_usuario')[:1])
+        )
+
+        com_futuras = assinaturas.filter(usuario_id__in=usuarios_ids, data_inicio__gt=agora).values('usuario_id')
+        por_usuario = defaultdict(list)
+        for usuario_id, *assinatura in assinaturas.filter(usuario_id__in=com_futuras).values_list(
+            'usuario_id', 'data_inicio', 'data_expiracao', 'tipo_plano__tipo_usuario'
+        ):
+            por_usuario[usuario_id].append(assinatura)
+        for usuario_id, linhas in por_usuario.items():
+            premium_ate, plano_ativo_tipo = self._calcular_snapshot(linhas, agora)
+            self.get_queryset().filter(pk=usuario_id).update(
+                premium_ate=premium_ate,
+                plano_ativo_tipo=plano_ativo_tipo
+            )
+        return atualizados
+
 
 # --- Modelo de Usuário Customizado ---
 class Usuario(AbstractUser):
@@ -137,6 +254,24 @@ class Usuario(AbstractUser):
         default='email',
         help_text="Método usado no primeiro cadastro"
     )
+
+    # --- Snapshot da assinatura ativa (desnormalizado) ---
+    # Mantido por AssinaturaPremium.save()/delete(). Permite saber se o
+    # usuário é Premium/Pro com uma simples comparação de coluna, sem JOIN.
+    premium_ate = models.DateTimeField(
+        null=True, blank=True,
+        db_index=True,
+        help_text="Expiração da assinatura ativa (snapshot). Vazio = sem assinatura"
+    )
+    plano_ativo_tipo = models.CharField(
+        max_length=20,
+        choices=[
+            ('aluno', 'Aluno Premium'),
+            ('profissional', 'Profissional Pro'),
+        ],
+        null=True, blank=True,
+        help_text="Tipo de usuário do plano ativo (snapshot)"
+    )
     # Campo que define qual é o "username" (para o django-admin)
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']  # Campos pedidos no 'createsuperuser'
@@ -156,43 +291,50 @@ class Usuario(AbstractUser):
     def __str__(self):
         return self.email
 
+    @property
+    def entitlements(self):
+        """
+        Direitos de assinatura do usuário (plano ativo, expiração, flags Premium/Pro).
+        Calculado uma única vez por instância - ou seja, uma vez por request.
+        """
+        if not hasattr(self, '_entitlements'):
+            self._entitlements = Entitlements(self)
+        return self._entitlements
+
+    def assinatura_snapshot_ativa(self):
+        """
+        Versão sem consulta de tem_assinatura_ativa(), baseada no snapshot.
+        Útil ao exibir muitos usuários (listas de participantes, admin).
+        """
+        return self.premium_ate is not None and self.premium_ate >= timezone.now()
+
+    def invalidar_entitlements(self):
+        """
+        Descarta o cache de entitlements desta instância.
+        Chamado quando uma assinatura do usuário é criada ou alterada.
+        """
+        self.__dict__.pop('_entitlements', None)
+
     def tem_assinatura_ativa(self):
         """
         Verifica se o usuário tem qualquer assinatura ativa.
         Funciona tanto para Alunos Premium quanto Profissionais Pro.
         """
-        return self.assinaturas_premium.filter(
-            status='ativa',
-            data_inicio__lte=timezone.now(),
-            data_expiracao__gte=timezone.now(),
-            cancelada_pelo_usuario=False
-        ).exists()
+        return self.entitlements.tem_assinatura_ativa
 
 
     def obter_assinatura_ativa(self):
         """
         Retorna a assinatura ativa do usuário, se houver.
         """
-        return self.assinaturas_premium.filter(
-            status='ativa',
-            data_inicio__lte=timezone.now(),
-            data_expiracao__gte=timezone.now(),
-            cancelada_pelo_usuario=False
-        ).first()
+        return self.entitlements.assinatura
 
 
     def eh_premium(self):
         """
         Verifica se o usuário é um Aluno Premium ativo.
         """
-        if not hasattr(self, 'aluno'):
-            return False
-
-        assinatura = self.obter_assinatura_ativa()
-        if not assinatura:
-            return False
-
-        return assinatura.tipo_plano.tipo_usuario == 'aluno'
+        return self.entitlements.eh_premium
 
 
     def eh_profissional_ativo(self):
@@ -200,14 +342,7 @@ class Usuario(AbstractUser):
         Verifica se o usuário é um Profissional com assinatura Pro ativa.
         IMPORTANTE: Profissionais SÓ podem acessar o sistema se tiverem assinatura ativa.
         """
-        if not hasattr(self, 'profissional'):
-            return False
-
-        assinatura = self.obter_assinatura_ativa()
-        if not assinatura:
-            return False
-
-        return assinatura.tipo_plano.tipo_usuario == 'profissional'
+        return self.entitlements.eh_profissional_ativo
 
 
     def precisa_assinatura(self):
@@ -264,6 +399,8 @@ class FotoUsuario(ImageResizingMixin, models.Model):
     def save(self, *args, **kwargs):
         # Se for uma imagem nova, redimensiona
         if self.pk is None and self.imagem:
+            from PIL import Image
+
             # Abrir a imagem em memória
             img = Image.open(self.imagem)
 
@@ -630,10 +767,21 @@ class TipoPlano(models.Model):
     def __str__(self):
         return self.nome
 
+    @property
+    def _precalculado(self):
+        """
+        Valores calculados pelo catálogo de planos (apps.users.catalog).
+        Vazio para instâncias carregadas diretamente do banco.
+        """
+        return self.__dict__.get('_valores_catalogo', {})
+
     def valor_com_desconto(self):
         """
         Calcula o valor final aplicando o desconto, se houver.
         """
+        if 'valor_com_desconto' in self._precalculado:
+            return self._precalculado['valor_com_desconto']
+
         if self.desconto_percentual > 0:
             desconto = self.valor * (self.desconto_percentual / 100)
             return self.valor - desconto
@@ -644,6 +792,9 @@ class TipoPlano(models.Model):
         Para planos não mensais, calcula quanto o usuário economiza por mês
         comparado com o plano mensal equivalente.
         """
+        if 'economia_mensal' in self._precalculado:
+            return self._precalculado['economia_mensal']
+
         if self.periodicidade == 'mensal':
             return 0
 
@@ -677,6 +828,9 @@ class TipoPlano(models.Model):
         """
         Retorna quantos meses este plano dura.
         """
+        if 'meses_duracao' in self._precalculado:
+            return self._precalculado['meses_duracao']
+
         meses_map = {
             'mensal': 1,
             'trimestral': 3,
@@ -766,6 +920,14 @@ class AssinaturaPremium(models.Model):
         default=False,
         help_text="Se True, o usuário não quer renovar"
     )
+    renovacao_de = models.OneToOneField(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='renovacao',
+        help_text="Assinatura que originou esta renovação (no máximo uma renovação por assinatura)"
+    )
 
     # Observações
     observacoes = models.TextField(
@@ -782,7 +944,10 @@ class AssinaturaPremium(models.Model):
         verbose_name_plural = "Assinaturas Premium"
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['usuario', 'status']),
+            # data_expiracao no fim: a assinatura vigente de um usuário é lida
+            # só entre as que ainda não venceram, mesmo com um acúmulo de
+            # vencidas ainda 'ativa' à espera do process_subscriptions
+            models.Index(fields=['usuario', 'status', 'data_expiracao']),
             models.Index(fields=['data_expiracao', 'status']),
         ]
 
@@ -799,6 +964,8 @@ class AssinaturaPremium(models.Model):
 
         if not self.data_expiracao:
             # Calcula a data de expiração baseada no tipo de plano
+            from dateutil.relativedelta import relativedelta
+
             meses = self.tipo_plano.meses_duracao()
             self.data_expiracao = self.data_inicio + relativedelta(months=meses)
 
@@ -806,7 +973,30 @@ class AssinaturaPremium(models.Model):
         if not self.valor_pago:
             self.valor_pago = self.tipo_plano.valor_com_desconto()
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._sincronizar_snapshot_usuario()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            self._sincronizar_snapshot_usuario()
+        return resultado
+
+    def _sincronizar_snapshot_usuario(self):
+        """
+        Atualiza o snapshot (premium_ate / plano_ativo_tipo) do dono desta
+        assinatura e, se o usuário já está carregado (ex: request.user),
+        reflete os novos valores na instância e descarta os entitlements.
+        """
+        premium_ate, plano_ativo_tipo = Usuario.objects.sincronizar_snapshot_assinatura(
+            self.usuario_id
+        )
+
+        if self._meta.get_field('usuario').is_cached(self):
+            self.usuario.premium_ate = premium_ate
+            self.usuario.plano_ativo_tipo = plano_ativo_tipo
+            self.usuario.invalidar_entitlements()
 
     def esta_ativa(self):
         """
@@ -847,6 +1037,11 @@ class AssinaturaPremium(models.Model):
         if not self.pode_renovar():
             return None
 
+        # Já renovada antes (ex: pelo process_subscriptions): não duplica
+        renovacao_existente = AssinaturaPremium.objects.filter(renovacao_de=self).first()
+        if renovacao_existente:
+            return renovacao_existente
+
         # Cria nova assinatura começando quando esta expira
         nova_assinatura = AssinaturaPremium.objects.create(
             usuario=self.usuario,
@@ -854,6 +1049,7 @@ class AssinaturaPremium(models.Model):
             status='pendente',  # Será 'ativa' após confirmação de pagamento
             data_inicio=self.data_expiracao,
             renovacao_automatica=self.renovacao_automatica,
+            renovacao_de=self,
             observacoes=f"Renovação automática da assinatura #{self.id}"
         )
 
@@ -868,3 +1064,48 @@ class AssinaturaPremium(models.Model):
         self.renovacao_automatica = False
         self.data_cancelamento = timezone.now()
         self.save()
+
+
+class MetricaAssinaturaDiaria(models.Model):
+    """
+    Rollup diário das assinaturas, por plano.
+    Preenchido pelo comando `rollup_subscriptions`; o dashboard do admin e a
+    exportação CSV leem apenas esta tabela (nunca AssinaturaPremium).
+    """
+    data = models.DateField()
+    tipo_plano = models.ForeignKey(
+        TipoPlano,
+        on_delete=models.PROTECT,
+        related_name='metricas_diarias'
+    )
+
+    # Fotografia ao final do dia
+    assinantes_ativos = models.IntegerField(default=0)
+    mrr = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text="Receita mensal recorrente (valor pago / meses do plano) dos ativos"
+    )
+
+    # Movimentos ocorridos no dia
+    novas = models.IntegerField(default=0)
+    renovacoes = models.IntegerField(default=0)
+    cancelamentos = models.IntegerField(default=0)
+    expiracoes = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Métrica Diária de Assinaturas"
+        verbose_name_plural = "Métricas Diárias de Assinaturas"
+        ordering = ['-data', 'tipo_plano']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['data', 'tipo_plano'],
+                name='unique_metrica_assinatura_dia_plano'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.data:%d/%m/%Y} - {self.tipo_plano.nome}"
@@ -1,3 +1,575 @@
-from django.test import TestCase
+import csv
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.factories import (
+    criar_aluno, criar_assinatura, criar_avaliacao, criar_curtida, criar_evento, criar_inscricao,
+    criar_profissional, criar_solicitacao, criar_staff, obter_plano,
+)
+from apps.core.testing import OrcamentoConsultasMixin
+from apps.events import curtidas
+from apps.events.models import InteracaoPresenca
+
+from . import catalog, metricas, middleware
+from .models import AssinaturaPremium, MetricaAssinaturaDiaria, TipoPlano, Usuario
+
+
+class OrcamentoConsultasUsuariosTests(OrcamentoConsultasMixin, TestCase):
+    """
+    Número máximo de consultas por view e por papel (notificações, perfil
+    público e listagens do admin).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profissional = criar_profissional()
+        cls.aluno = criar_aluno()
+        cls.premium = criar_aluno(premium=True)
+        cls.staff = criar_staff()
+
+        evento = criar_evento(criador=cls.profissional, participantes=5, passado=True)
+        criar_inscricao(cls.aluno, evento)
+        for inscricao in evento.inscricoes.exclude(id_aluno__usuario=cls.aluno)[:3]:
+            criar_curtida(cls.aluno, inscricao, status_retorno='aceito')
+            criar_curtida(inscricao.id_aluno.usuario, cls.aluno.aluno.inscricoes.get())
+
+        for _ in range(3):
+            outro = criar_aluno()
+            criar_solicitacao(outro, cls.aluno)
+            criar_solicitacao(cls.aluno, outro, status='aceita')
+            criar_avaliacao(outro, cls.profissional)
+
+    def medir(self, usuario, url, maximo, duplicadas=0):
+        if usuario is not None:
+            self.client.force_login(usuario)
+        self.client.get(url)  # aquecimento: sessão, snapshot de perfil, notificações lidas
+
+        with self.assertOrcamentoConsultas(maximo, duplicadas=duplicadas, contexto=url):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_listar_notificacoes(self):
+        for usuario in [self.aluno, self.premium, self.profissional]:
+            with self.subTest(usuario=usuario.email):
+                self.medir(usuario, reverse('listar_notificacoes'), 13)
+
+    def test_perfil_publico_profissional(self):
+        url = reverse('public_profile', args=[self.profissional.pk])
+        # Duplicada esperada: o usuário logado e o do perfil vêm da mesma tabela
+        for usuario, maximo, duplicadas in [(None, 4, 0), (self.aluno, 11, 1), (self.premium, 11, 1)]:
+            with self.subTest(usuario=usuario and usuario.email):
+                self.medir(usuario, url, maximo, duplicadas)
+
+    def test_perfil_publico_aluno(self):
+        url = reverse('public_profile', args=[self.premium.pk])
+        for usuario, maximo, duplicadas in [(None, 5, 1), (self.aluno, 11, 2), (self.profissional, 11, 2)]:
+            with self.subTest(usuario=usuario and usuario.email):
+                self.medir(usuario, url, maximo, duplicadas)
+
+    def test_listagens_do_admin(self):
+        modelos = [
+            'users/usuario', 'users/aluno', 'users/profissional', 'users/avaliacao',
+            'users/solicitacaoconexao', 'users/metricaassinaturadiaria',
+            'events/evento', 'events/inscricao', 'events/interacaopresenca',
+            'events/categoriaevento', 'events/pagamento',
+        ]
+        for modelo in modelos:
+            with self.subTest(modelo=modelo):
+                # A duplicada é o COUNT(*) do paginador + o do total sem filtros
+                self.medir(self.staff, f'/admin/{modelo}/', 15, duplicadas=1)
+
+
+class CacheLayoutTests(TestCase):
+    """ Menus do base.html em {% cache %}: por usuário e versão do perfil. """
+
+    def setUp(self):
+        cache.clear()
+        self.aluno = criar_aluno(first_name='Zuleica')
+        self.client.force_login(self.aluno)
+
+    def test_nome_novo_aparece_apos_salvar_o_perfil(self):
+        url = reverse('listar_notificacoes')
+        self.assertContains(self.client.get(url), 'Zuleica')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.aluno.first_name = 'Yolanda'
+            self.aluno.save()
+
+        response = self.client.get(url)
+        self.assertContains(response, 'Yolanda')
+        self.assertNotContains(response, 'Zuleica')
+
+    def test_fragmento_nao_vaza_entre_usuarios(self):
+        url = reverse('listar_notificacoes')
+        self.client.get(url)
+
+        self.client.force_login(criar_aluno(first_name='Xenia'))
+        response = self.client.get(url)
+        self.assertContains(response, 'Xenia')
+        self.assertNotContains(response, 'Zuleica')
+
+
+class SnapshotAssinaturaTests(TestCase):
+    """ Usuario.premium_ate / plano_ativo_tipo e o atalho de Entitlements. """
+
+    def setUp(self):
+        self.aluno = criar_aluno()
+
+    def recarregar(self):
+        return Usuario.objects.com_perfis().get(pk=self.aluno.pk)
+
+    def test_salvar_e_excluir_sincronizam_o_snapshot(self):
+        assinatura = criar_assinatura(self.aluno, dias=10)
+        usuario = self.recarregar()
+        self.assertEqual(usuario.premium_ate, assinatura.data_expiracao)
+        self.assertEqual(usuario.plano_ativo_tipo, 'aluno')
+
+        assinatura.delete()
+        usuario = self.recarregar()
+        self.assertIsNone(usuario.premium_ate)
+        self.assertIsNone(usuario.plano_ativo_tipo)
+
+    def test_cancelada_ou_vencida_nao_conta(self):
+        criar_assinatura(self.aluno, cancelada_pelo_usuario=True)
+        criar_assinatura(self.aluno, data_inicio=timezone.now() - timedelta(days=40), dias=-10)
+        self.assertIsNone(self.recarregar().premium_ate)
+
+    def test_renovacao_paga_estende_ate_o_fim_da_cadeia(self):
+        atual = criar_assinatura(self.aluno, renovacao_automatica=True, dias=1)
+        renovacao = atual.renovar()
+        # Pendente (ainda não paga) não estende
+        self.assertEqual(self.recarregar().premium_ate, atual.data_expiracao)
+
+        renovacao.status = 'ativa'
+        renovacao.save()
+        self.assertEqual(self.recarregar().premium_ate, renovacao.data_expiracao)
+
+        # Depois que a primeira vence, o atalho não nega a renovação vigente
+        depois = atual.data_expiracao + timedelta(hours=1)
+        with mock.patch('django.utils.timezone.now', return_value=depois):
+            self.assertTrue(self.recarregar().entitlements.eh_premium)
+
+    def test_lote_igual_ao_individual(self):
+        outro = criar_aluno()
+        atual = criar_assinatura(self.aluno, dias=1)
+        criar_assinatura(self.aluno, data_inicio=atual.data_expiracao, dias=60)
+        criar_assinatura(outro, tipo_usuario='profissional', dias=5)
+        esperado = {
+            usuario.pk: Usuario.objects.sincronizar_snapshot_assinatura(usuario.pk)
+            for usuario in [self.aluno, outro, criar_aluno()]
+        }
+        Usuario.objects.update(premium_ate=None, plano_ativo_tipo=None)
+
+        Usuario.objects.sincronizar_snapshots_em_lote(esperado)
+        obtido = {
+            pk: (premium_ate, tipo)
+            for pk, premium_ate, tipo in Usuario.objects.filter(pk__in=esperado).values_list(
+                'pk', 'premium_ate', 'plano_ativo_tipo'
+            )
+        }
+        self.assertEqual(obtido, esperado)
+
+    def test_migracao_igual_ao_individual(self):
+        migracao = import_module('apps.users.migrations.0017_usuario_snapshot_assinatura')
+        atual = criar_assinatura(self.aluno, dias=1)
+        criar_assinatura(self.aluno, data_inicio=atual.data_expiracao, dias=60)
+        esperado = Usuario.objects.sincronizar_snapshot_assinatura(self.aluno.pk)
+        Usuario.objects.update(premium_ate=None, plano_ativo_tipo=None)
+
+        migracao.popular_snapshot(django_apps, None)
+        self.assertEqual(
+            Usuario.objects.values_list('premium_ate', 'plano_ativo_tipo').get(pk=self.aluno.pk), esperado
+        )
+
+    def test_entitlements_sem_snapshot_nao_consulta(self):
+        usuario = self.recarregar()
+        with self.assertNumQueries(0):
+            self.assertFalse(usuario.entitlements.eh_premium)
+            self.assertIsNone(usuario.entitlements.plano)
+
+        criar_assinatura(self.aluno)
+        usuario = self.recarregar()
+        with self.assertNumQueries(1):
+            self.assertTrue(usuario.entitlements.eh_premium)
+            self.assertEqual(usuario.entitlements.tipo_usuario, 'aluno')
+            self.assertIsNotNone(usuario.entitlements.data_expiracao)
+
+
+class ProcessSubscriptionsTests(TestCase):
+    """ Expiração e renovação em lotes: contagem real, reexecução e retomada. """
+
+    def setUp(self):
+        inicio = timezone.now() - timedelta(days=40)
+        self.vencidas = [
+            criar_assinatura(criar_aluno(), data_inicio=inicio, dias=-13 + numero, renovacao_automatica=renovar)
+            for numero, renovar in enumerate([True, True, False, True])
+        ]
+        # Já renovada antes do comando: o bulk_create a ignora
+        self.vencidas[0].renovar()
+
+    def processar(self, **opcoes):
+        saida = StringIO()
+        call_command('process_subscriptions', stdout=saida, **opcoes)
+        return saida.getvalue()
+
+    def conferir_processadas(self):
+        self.assertFalse(AssinaturaPremium.objects.filter(pk__in=[a.pk for a in self.vencidas], status='ativa'))
+        renovadas = AssinaturaPremium.objects.filter(renovacao_de__in=self.vencidas)
+        self.assertCountEqual(
+            renovadas.values_list('renovacao_de_id', flat=True),
+            [a.pk for a in self.vencidas if a.renovacao_automatica]
+        )
+        self.assertFalse(Usuario.objects.filter(premium_ate__isnull=False))
+
+    def test_conta_so_as_renovacoes_inseridas(self):
+        self.assertIn('4 assinaturas expiradas, 2 renovações criadas', self.processar())
+        self.conferir_processadas()
+
+    def test_rodar_de_novo_nao_muda_nada(self):
+        self.processar()
+        self.assertIn('0 assinaturas expiradas, 0 renovações criadas', self.processar())
+        self.conferir_processadas()
+
+    def test_lote_interrompido_retoma_de_onde_parou(self):
+        sincronizar = Usuario.objects.sincronizar_snapshots_em_lote
+        chamadas = []
+
+        def falhar_no_segundo_lote(usuarios_ids):
+            chamadas.append(usuarios_ids)
+            if len(chamadas) == 2:
+                raise RuntimeError('queda no meio do lote')
+            return sincronizar(usuarios_ids)
+
+        with mock.patch.object(Usuario.objects, 'sincronizar_snapshots_em_lote', falhar_no_segundo_lote):
+            with self.assertRaises(RuntimeError):
+                self.processar(chunk_size=1)
+
+        # O primeiro lote ficou; o segundo foi desfeito inteiro (sem renovação órfã)
+        ativas = AssinaturaPremium.objects.filter(pk__in=[a.pk for a in self.vencidas], status='ativa')
+        self.assertEqual(ativas.count(), 3)
+        self.assertFalse(AssinaturaPremium.objects.filter(renovacao_de__in=ativas))
+
+        self.assertIn('3 assinaturas expiradas, 2 renovações criadas', self.processar(chunk_size=1))
+        self.conferir_processadas()
+
+
+class PoliticaCadastroTests(SimpleTestCase):
+    """ Regex compilada do ProfileCompletionMiddleware. """
+
+    def setUp(self):
+        self.middleware = middleware.ProfileCompletionMiddleware(lambda request: None)
+
+    def grupo(self, caminho):
+        match = self.middleware.politica.match(caminho)
+        return match.lastgroup if match else None
+
+    def test_grupos_dos_caminhos(self):
+        self.assertEqual(self.grupo('/accounts/login/'), 'isento')
+        self.assertEqual(self.grupo('/static/css/app.css'), 'isento')
+        self.assertEqual(self.grupo(reverse('escolher_plano_obrigatorio')), 'isento')
+        self.assertEqual(self.grupo('/premium/modal/'), 'plano')
+        self.assertEqual(self.grupo(reverse('checkout_assinatura', args=[3])), 'plano')
+        self.assertIsNone(self.grupo('/'))
+        self.assertIsNone(self.grupo(reverse('meus_matches')))
+
+    def test_prefixo_mais_longo_vence_e_isento_tem_prioridade(self):
+        politica = middleware.compilar_politica(['/a/', '/a/b/'], ['/c/'])
+        self.assertEqual(politica.match('/a/b/x').group(), '/a/b/')
+        self.assertEqual(politica.match('/c/x').lastgroup, 'plano')
+        self.assertEqual(middleware.compilar_politica(['/a/'], ['/a/b/']).match('/a/b/x').lastgroup, 'isento')
+        self.assertIsNone(middleware.compilar_politica([], []).match('/'))
+
+    def test_url_inexistente_e_ignorada_com_log(self):
+        urls = [*middleware.URLS_DE_PLANO, 'rota_que_nao_existe']
+        with mock.patch.object(middleware, 'URLS_DE_PLANO', urls):
+            with self.assertLogs('apps.users.middleware', 'ERROR') as logs:
+                self.middleware = middleware.ProfileCompletionMiddleware(lambda request: None)
+        self.assertIn('rota_que_nao_existe', logs.output[0])
+        self.assertEqual(self.grupo('/premium/modal/'), 'plano')
+
+
+class MiddlewareCadastroTests(TestCase):
+    def test_profissional_sem_assinatura_abre_o_modal_premium(self):
+        self.client.force_login(criar_profissional(com_assinatura=False))
+        self.assertEqual(self.client.get('/premium/modal/').status_code, 200)
+        self.assertRedirects(
+            self.client.get(reverse('meus_matches')), reverse('escolher_plano_obrigatorio'),
+            fetch_redirect_response=False
+        )
+
+    def test_sessao_com_backend_antigo_continua_logada(self):
+        self.client.force_login(criar_aluno(), backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get(reverse('meus_matches')).status_code, 200)
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'apps.users.backends.PerfilModelBackend')
+
+    def test_destino_inexistente_nao_redireciona(self):
+        request = RequestFactory().get('/')
+        request.user = criar_aluno(cadastro_completo=False)
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        instancia = middleware.ProfileCompletionMiddleware(lambda request: None)
+        self.assertEqual(instancia.verificar(request).url, reverse('account_complete_profile'))
+
+        instancia.url_complete_profile = None
+        self.assertIsNone(instancia.verificar(request))
+
+
+class EntitlementsTests(TestCase):
+    """ Flags Premium/Pro e o cache de entitlements por instância. """
+
+    def test_aluno_premium_e_profissional_ativo(self):
+        premium = criar_aluno(premium=True)
+        profissional = criar_profissional()
+        self.assertTrue(premium.eh_premium())
+        self.assertFalse(premium.eh_profissional_ativo())
+        self.assertTrue(profissional.eh_profissional_ativo())
+        self.assertFalse(profissional.eh_premium())
+        self.assertEqual(profissional.obter_assinatura_ativa().tipo_plano.tipo_usuario, 'profissional')
+
+    def test_plano_de_outro_tipo_nao_da_premium(self):
+        aluno = criar_aluno()
+        criar_assinatura(aluno, tipo_usuario='profissional')
+        self.assertTrue(aluno.tem_assinatura_ativa())
+        self.assertFalse(aluno.eh_premium())
+        self.assertFalse(aluno.eh_profissional_ativo())
+
+    def test_calculado_uma_vez_e_invalidado_pela_assinatura(self):
+        aluno = criar_aluno()
+        self.assertFalse(aluno.eh_premium())
+        self.assertFalse(aluno.assinatura_snapshot_ativa())
+
+        # A assinatura recebe a mesma instância: o save() sincroniza e invalida
+        assinatura = criar_assinatura(aluno)
+        self.assertTrue(aluno.assinatura_snapshot_ativa())
+        with self.assertNumQueries(1):
+            self.assertTrue(aluno.eh_premium())
+            self.assertEqual(aluno.entitlements.data_expiracao, assinatura.data_expiracao)
+            self.assertTrue(aluno.tem_assinatura_ativa())
+
+        assinatura.cancelar()
+        self.assertFalse(aluno.eh_premium())
+
+
+class MetricasAssinaturasTests(TestCase):
+    """ Rollups diários (apps.users.metricas), dashboard e CSV do admin. """
+
+    def setUp(self):
+        self.dia = timezone.localdate() - timedelta(days=5)
+        inicio, _ = metricas._limites_do_dia(self.dia)
+        meio_dia = inicio + timedelta(hours=12)
+        self.mensal = obter_plano('aluno')
+        self.anual = obter_plano('aluno', 'anual')
+
+        def assinar(plano, **campos):
+            campos.setdefault('data_inicio', meio_dia)
+            campos.setdefault('data_expiracao', meio_dia + timedelta(days=30))
+            return criar_assinatura(criar_aluno(), tipo_plano=plano, **campos)
+
+        # Mensal: uma nova, uma que expira no dia e é renovada, uma cancelada no dia
+        assinar(self.mensal, valor_pago=Decimal('30.00'))
+        antiga = assinar(self.mensal, data_inicio=meio_dia - timedelta(days=30), data_expiracao=meio_dia,
+                         status='expirada')
+        assinar(self.mensal, valor_pago=Decimal('30.00'), renovacao_de=antiga)
+        assinar(self.mensal, data_inicio=meio_dia - timedelta(days=3), cancelada_pelo_usuario=True,
+                data_cancelamento=meio_dia)
+        # Anual ativa desde antes; e uma pendente (não conta)
+        assinar(self.anual, data_inicio=meio_dia - timedelta(days=40), data_expiracao=meio_dia + timedelta(days=300),
+                valor_pago=Decimal('120.00'))
+        assinar(self.anual, status='pendente')
+
+    def test_calcular_dia(self):
+        planos = {plano.pk: plano for plano in TipoPlano.objects.all()}
+        por_plano = {m.tipo_plano_id: m for m in metricas.calcular_dia(self.dia, planos)}
+
+        mensal = por_plano[self.mensal.pk]
+        self.assertEqual(
+            (mensal.assinantes_ativos, mensal.mrr, mensal.novas, mensal.renovacoes,
+             mensal.cancelamentos, mensal.expiracoes),
+            (2, Decimal('60.00'), 1, 1, 1, 1)
+        )
+        anual = por_plano[self.anual.pk]
+        self.assertEqual((anual.assinantes_ativos, anual.mrr, anual.novas), (1, Decimal('10.00'), 0))
+
+    def test_gravar_periodo_pode_ser_repetido(self):
+        self.assertEqual(metricas.gravar_periodo(self.dia - timedelta(days=1), self.dia), 2)
+        primeira = list(MetricaAssinaturaDiaria.objects.values_list('data', 'tipo_plano', 'assinantes_ativos', 'mrr'))
+        metricas.gravar_periodo(self.dia - timedelta(days=1), self.dia)
+        self.assertCountEqual(
+            MetricaAssinaturaDiaria.objects.values_list('data', 'tipo_plano', 'assinantes_ativos', 'mrr'), primeira
+        )
+        self.assertEqual(metricas.ultima_data_calculada(), self.dia)
+        self.assertEqual(metricas.primeira_data_com_assinatura(), self.dia - timedelta(days=40))
+
+    def test_comando_em_blocos(self):
+        saida = StringIO()
+        desde = self.dia - timedelta(days=4)
+        call_command('rollup_subscriptions', desde=desde, ate=self.dia, dias_por_bloco=2, stdout=saida)
+        self.assertIn('em 3 bloco(s)', saida.getvalue())
+        self.assertEqual(MetricaAssinaturaDiaria.objects.filter(data=self.dia).count(), 2)
+
+        for dias_por_bloco in (0, -1):
+            with self.subTest(dias_por_bloco=dias_por_bloco), self.assertRaises(CommandError):
+                call_command('rollup_subscriptions', desde=desde, ate=self.dia, dias_por_bloco=dias_por_bloco)
+
+    def test_resumo_churn_e_renovacao(self):
+        def rollup(dia, plano, **campos):
+            MetricaAssinaturaDiaria.objects.create(data=dia, tipo_plano=plano, **campos)
+
+        rollup(self.dia - timedelta(days=1), self.mensal, assinantes_ativos=10)
+        rollup(self.dia, self.mensal, assinantes_ativos=8, mrr=Decimal('80'), expiracoes=4, renovacoes=3)
+        rollup(self.dia, self.anual, assinantes_ativos=2, mrr=Decimal('20'), novas=1)
+
+        resumo = metricas.resumo(self.dia, self.dia)
+        self.assertEqual(resumo['ultimo_dia'], self.dia)
+        self.assertEqual((resumo['mrr_total'], resumo['ativos_total'], resumo['ativos_inicio']), (100, 10, 10))
+        self.assertEqual(resumo['churn'], 10)
+        self.assertEqual(resumo['taxa_renovacao'], 75)
+
+        vazio = metricas.resumo(self.dia - timedelta(days=30), self.dia - timedelta(days=30))
+        self.assertEqual((vazio['por_plano'], vazio['churn'], vazio['taxa_renovacao']), ([], None, None))
+
+    def test_dashboard_e_csv_do_admin(self):
+        metricas.gravar_periodo(self.dia - timedelta(days=10), self.dia)
+        self.client.force_login(criar_staff())
+
+        response = self.client.get(reverse('admin:users_metricaassinaturadiaria_changelist'), {'dias': 7})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['dias'], 7)
+        self.assertEqual(response.context['resumo']['ultimo_dia'], self.dia)
+
+        response = self.client.get(reverse('admin:users_metricaassinaturadiaria_exportar_csv'), {'dias': 7})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        linhas = list(csv.reader(response.content.decode().splitlines()))
+        self.assertEqual(linhas[0][:3], ['data', 'plano', 'tipo_usuario'])
+        datas = {linha[0] for linha in linhas[1:]}
+        self.assertEqual(min(datas), (timezone.localdate() - timedelta(days=6)).isoformat())
+        self.assertEqual(max(datas), self.dia.isoformat())
+
+
+class CatalogoPlanosTests(TestCase):
+    """ Catálogo em memória: reconstruído pela tag 'planos' ou pelo prazo. """
+
+    def setUp(self):
+        cache.clear()
+        self.mensal = obter_plano('aluno')
+        self.anual = obter_plano('aluno', 'anual')
+
+    def test_catalogo_em_dia_nao_consulta_o_banco(self):
+        catalog.planos_ativos('aluno')
+        with self.assertNumQueries(0):
+            self.assertEqual(catalog.planos_ativos('aluno'), [self.mensal, self.anual])
+            self.assertEqual(catalog.obter_plano(self.anual.pk), self.anual)
+            self.assertEqual({p.tipo_usuario for p in catalog.planos_ativos('profissional')}, {'profissional'})
+
+    def test_salvar_plano_invalida_o_catalogo(self):
+        self.assertEqual(catalog.obter_plano(self.mensal.pk).valor, self.mensal.valor)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mensal.valor = 9
+            self.mensal.save()
+            self.anual.ativo = False
+            self.anual.save()
+
+        self.assertEqual(catalog.obter_plano(self.mensal.pk).valor, 9)
+        self.assertIsNone(catalog.obter_plano(self.anual.pk))
+        self.assertEqual(catalog.planos_ativos('aluno'), [self.mensal])
+
+    def test_prazo_reconstroi_sem_invalidacao(self):
+        catalog.planos_ativos('aluno')
+        # Mudança que não passou pela tag (ex: invalidação perdida)
+        TipoPlano.objects.filter(pk=self.mensal.pk).update(valor=7)
+
+        self.assertNotEqual(catalog.obter_plano(self.mensal.pk).valor, 7)
+        with override_settings(CATALOGO_PLANOS_TTL=0):
+            self.assertEqual(catalog.obter_plano(self.mensal.pk).valor, 7)
+
+
+class MatchesTests(TestCase):
+    """ Matches (curtidas retribuídas) como autor e como alvo, por cursor. """
+
+    def setUp(self):
+        self.aluno = criar_aluno(first_name='Ursula')
+        evento = criar_evento(passado=True)
+        minha_inscricao = criar_inscricao(self.aluno, evento)
+
+        # Três matches: dois em que curti, um em que me curtiram; e uma curtida sem retorno
+        self.nomes = ['Tereza', 'Sonia', 'Rita']
+        for nome, eu_curti in zip(self.nomes, [True, False, True], strict=True):
+            outro = criar_aluno(first_name=nome)
+            if eu_curti:
+                criar_curtida(self.aluno, criar_inscricao(outro, evento), status_retorno='aceito')
+            else:
+                criar_curtida(outro, minha_inscricao, status_retorno='aceito')
+        criar_curtida(criar_aluno(first_name='Quiteria'), minha_inscricao)
+
+    def test_paginas_seguem_do_mais_recente(self):
+        interacoes, cursor = curtidas.matches(self.aluno, limite=2)
+        self.assertEqual([i.outro.first_name for i in interacoes], ['Rita', 'Sonia'])
+
+        with CaptureQueriesContext(connection) as consultas:
+            interacoes, cursor = curtidas.matches(self.aluno, cursor, limite=2)
+        self.assertEqual([i.outro.first_name for i in interacoes], ['Tereza'])
+        self.assertIsNone(cursor)
+        # Posições pelos índices de autor e alvo_usuario, sem join; depois a página por pk
+        self.assertEqual(len(consultas), 3)
+        self.assertFalse([c for c in consultas if 'events_inscricao' in c['sql']])
+
+    def paginas(self, limite):
+        nomes, cursor = [], None
+        while True:
+            interacoes, cursor = curtidas.matches(self.aluno, cursor, limite=limite)
+            nomes.append([i.outro.first_name for i in interacoes])
+            if cursor is None:
+                return nomes
+
+    def test_ler_notificacao_nao_move_o_match(self):
+        interacoes, cursor = curtidas.matches(self.aluno, limite=2)
+
+        # Marcar como lida atualiza updated_at; a posição (retribuida_em) fica
+        for interacao in InteracaoPresenca.objects.filter(status_retorno='aceito'):
+            interacao.lida_pelo_autor = True
+            interacao.save()
+
+        interacoes, cursor = curtidas.matches(self.aluno, cursor, limite=2)
+        self.assertEqual([i.outro.first_name for i in interacoes], ['Tereza'])
+        self.assertIsNone(cursor)
+
+    def test_match_novo_nao_desloca_as_proximas_paginas(self):
+        _, cursor = curtidas.matches(self.aluno, limite=2)
+        criar_curtida(self.aluno, criar_inscricao(criar_aluno(first_name='Paula'), criar_evento()),
+                      status_retorno='aceito')
+
+        interacoes, _ = curtidas.matches(self.aluno, cursor, limite=2)
+        self.assertEqual([i.outro.first_name for i in interacoes], ['Tereza'])
+        self.assertEqual(self.paginas(limite=2), [['Paula', 'Rita'], ['Sonia', 'Tereza']])
+
+    def test_empates_no_momento_do_match_desempatam_pela_pk(self):
+        InteracaoPresenca.objects.filter(status_retorno='aceito').update(retribuida_em=timezone.now())
+        self.assertEqual(self.paginas(limite=1), [['Rita'], ['Sonia'], ['Tereza']])
+
+    def test_view_e_proxima_pagina_htmx(self):
+        self.client.force_login(self.aluno)
+        response = self.client.get(reverse('meus_matches'))
+        for nome in self.nomes:
+            self.assertContains(response, nome)
+        self.assertNotContains(response, 'Quiteria')
+        self.assertNotContains(response, 'hx-trigger="revealed"')
+
+        response = self.client.get(reverse('meus_matches'), {'cursor': 'invalido'}, HTTP_HX_REQUEST='true')
+        self.assertContains(response, 'Rita')
+        self.assertNotContains(response, '<html')
@@ -5,12 +5,18 @@ from .models import Aluno, Profissional, Perfil, Usuario, Avaliacao, Solicitacao
     TipoConta
 from django.db import models
 from django.db.models import Q
+from apps.events import curtidas
 from apps.events.models import InteracaoPresenca
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
+from django.http import Http404
 from .models import AssinaturaPremium, TipoPlano
+from . import catalog
+from apps.core.db_router import replica_para, use_replica
+from apps.core.htmx import arender_parcial, render_parcial
+from .context_processors import acontar_notificacoes
 
 
 # Em apps/users/views.py
@@ -222,12 +228,13 @@ def gerenciar_galeria(request):
     })
 
 
+@use_replica
 def public_profile_view(request, usuario_id):
     """
     Mostra a página de perfil público (somente leitura)
     de qualquer usuário (Aluno ou Profissional).
     """
-    usuario = get_object_or_404(Usuario, pk=usuario_id)
+    usuario = get_object_or_404(Usuario.objects.com_perfis(), pk=usuario_id)
     profile_type = None
     fotos_galeria = None
 
@@ -251,7 +258,7 @@ def public_profile_view(request, usuario_id):
         profissional = usuario.profissional  # 'profissional' é definido AQUI
 
         # Busca todas as avaliações
-        lista_avaliacoes = profissional.avaliacoes.all().order_by('-created_at')
+        lista_avaliacoes = profissional.avaliacoes.select_related('autor__usuario').order_by('-created_at')
         total_avaliacoes = lista_avaliacoes.count()
 
         # Calcula a média de notas
@@ -337,17 +344,24 @@ def solicitar_conexao_view(request, usuario_id):
 
         # Regras de Negócio
         if solicitado == solicitante:
-            messages.error(request, 'Você não pode solicitar seu próprio WhatsApp.')
+            nivel, mensagem = messages.ERROR, 'Você não pode solicitar seu próprio WhatsApp.'
         elif not hasattr(solicitado, 'aluno'):
-            messages.error(request, 'Você só pode solicitar conexões de Alunos.')
+            nivel, mensagem = messages.ERROR, 'Você só pode solicitar conexões de Alunos.'
         elif SolicitacaoConexao.objects.filter(solicitante=solicitante,
                                                solicitado=solicitado).exists():
-            messages.warning(request,
-                             'Você já enviou uma solicitação para este usuário.')
+            nivel, mensagem = messages.WARNING, 'Você já enviou uma solicitação para este usuário.'
         else:
             SolicitacaoConexao.objects.create(solicitante=solicitante,
                                               solicitado=solicitado, status='pendente')
-            messages.success(request, 'Solicitação de conexão enviada!')
+            nivel, mensagem = messages.SUCCESS, 'Solicitação de conexão enviada!'
+
+        # HTMX: troca só o botão pelo resultado, sem recarregar o perfil
+        if request.headers.get('HX-Request'):
+            return render_parcial(request, 'partials/conexao_solicitada.html', {
+                'mensagem': mensagem,
+                'sucesso': nivel == messages.SUCCESS,
+            })
+        messages.add_message(request, nivel, mensagem)
 
     # Redireciona de volta para o perfil que o usuário estava vendo
     return redirect('public_profile', usuario_id=usuario_id)
@@ -395,7 +409,7 @@ def listar_notificacoes_view(request):
 
     # 4. Histórico de Curtidas que RECEBI
     curtidas_recebidas_historico = InteracaoPresenca.objects.filter(
-        inscricao_alvo__id_aluno__usuario=usuario
+        alvo_usuario=usuario
     ).select_related('autor', 'inscricao_alvo__id_evento').order_by('-updated_at')
 
     # 4.1. Descobre quais são NOVAS e marca como lidas
@@ -411,7 +425,7 @@ def listar_notificacoes_view(request):
     likes_back_historico = InteracaoPresenca.objects.filter(
         autor=usuario,
         status_retorno='aceito'
-    ).select_related('inscricao_alvo__id_aluno__usuario').order_by('-updated_at')
+    ).select_related('alvo_usuario').order_by('-updated_at')
 
     # 5.1. Descobre quais são NOVOS e marca como lidos
     ids_novos_likes_back = list(
@@ -437,6 +451,40 @@ def listar_notificacoes_view(request):
     }
     return render(request, 'account/notificacoes.html', context)
 
+@login_required
+async def contagem_notificacoes_view(request):
+    """
+    Polling do badge de notificações (HTMX, a cada 30s no base.html).
+    Devolve os três badges do layout como swaps out-of-band. View async:
+    milhares de abas abertas fazendo polling não prendem workers.
+    """
+    user = await request.auser()
+    with replica_para(request):
+        contagem = await acontar_notificacoes(user)
+    return await arender_parcial('partials/badges_notificacoes_oob.html', {
+        'contagem_notificacoes': contagem,
+    })
+
+
+@login_required
+@use_replica
+def meus_matches_view(request):
+    """
+    Lista os matches do usuário (curtidas de presença retribuídas, dadas
+    ou recebidas), do mais recente para o mais antigo. Paginada por cursor:
+    o fim da lista busca a próxima página via HTMX (ver
+    apps.events.curtidas.matches).
+    """
+    interacoes, proximo_cursor = curtidas.matches(request.user, request.GET.get('cursor'))
+    context = {
+        'matches': interacoes,
+        'proximo_cursor': proximo_cursor,
+    }
+    if request.headers.get('HX-Request'):
+        return render(request, 'partials/matches_lista.html', context)
+    return render(request, 'account/matches.html', context)
+
+
 @login_required
 def responder_solicitacao_view(request, solicitacao_id, acao):
     """
@@ -451,16 +499,27 @@ def responder_solicitacao_view(request, solicitacao_id, acao):
     )
 
     if solicitacao.status == 'pendente' and request.method == 'POST':
+        mensagem = None
         if acao == 'aceitar':
             solicitacao.status = 'aceita'
-            messages.success(request,
-                             f'Você aceitou a conexão de {solicitacao.solicitante.first_name}.')
+            mensagem = f'Você aceitou a conexão de {solicitacao.solicitante.first_name}.'
         elif acao == 'recusar':
             solicitacao.status = 'recusada'
-            messages.success(request,
-                             f'Você recusou a conexão de {solicitacao.solicitante.first_name}.')
+            mensagem = f'Você recusou a conexão de {solicitacao.solicitante.first_name}.'
         solicitacao.save()
 
+        # HTMX: troca o pedido pela resposta e atualiza, out-of-band, o
+        # contador de "Novos Pedidos" e os badges do menu
+        if request.headers.get('HX-Request'):
+            return render_parcial(request, 'partials/pedido_respondido.html', {
+                'sol': solicitacao,
+                'mensagem': mensagem,
+                'contagem_pedidos_pendentes': SolicitacaoConexao.objects.filter(
+                    solicitado=request.user, status='pendente').count(),
+            }, oob=['partials/contagem_pedidos_pendentes.html', 'partials/badges_notificacoes_oob.html'])
+        if mensagem:
+            messages.success(request, mensagem)
+
     return redirect('listar_notificacoes')
 
 
@@ -475,7 +534,7 @@ def processar_like_back_view(request, interacao_id):
         interacao = get_object_or_404(
             InteracaoPresenca,
             pk=interacao_id,
-            inscricao_alvo__id_aluno__usuario=request.user
+            alvo_usuario=request.user
         )
         # Atualiza o status para aceito
         interacao.status_retorno = 'aceito'
@@ -483,6 +542,11 @@ def processar_like_back_view(request, interacao_id):
         # Isso fará o sininho dele tocar
         interacao.lida_pelo_autor = False
         interacao.save()
+
+        # HTMX: troca o botão por "Enviada" e atualiza os badges do menu
+        if request.headers.get('HX-Request'):
+            return render_parcial(request, 'partials/like_back_enviado.html', {'interacao': interacao},
+                                  oob=['partials/badges_notificacoes_oob.html'])
         messages.success(request,
                          f"Você curtiu {interacao.autor.first_name} de volta! ⚡")
     return redirect('listar_notificacoes')
@@ -561,13 +625,10 @@ def escolher_plano_view(request):
         messages.info(request, 'Você já tem assinatura ativa!')
         return redirect('profile')
 
-    # Busca planos
-    planos = TipoPlano.objects.filter(
-        tipo_usuario=tipo_usuario,
-        ativo=True
-    ).order_by('ordem', 'periodicidade')
+    # Busca planos (catálogo em memória, sem consulta ao banco)
+    planos = catalog.planos_ativos(tipo_usuario)
 
-    if not planos.exists():
+    if not planos:
         messages.error(request, 'Nenhum plano disponível.')
         return redirect('profile')
 
@@ -588,7 +649,9 @@ def checkout_assinatura_view(request, plano_id):
     Mostra a tela de checkout para um plano específico.
     Similar ao checkout de eventos, mas para assinatura do sistema.
     """
-    plano = get_object_or_404(TipoPlano, pk=plano_id, ativo=True)
+    plano = catalog.obter_plano(plano_id)
+    if plano is None:
+        raise Http404('Plano não encontrado.')
 
     # Verifica se o plano é compatível com o tipo de usuário
     if hasattr(request.user, 'aluno') and plano.tipo_usuario != 'aluno':
@@ -764,13 +827,10 @@ def escolher_plano_obrigatorio_view(request):
         messages.info(request, 'Você já tem uma assinatura ativa!')
         return redirect('profile')
 
-    # Busca os planos disponíveis para profissionais
-    planos = TipoPlano.objects.filter(
-        tipo_usuario='profissional',
-        ativo=True
-    ).order_by('ordem', 'periodicidade')
+    # Busca os planos disponíveis para profissionais (catálogo em memória)
+    planos = catalog.planos_ativos('profissional')
 
-    if not planos.exists():
+    if not planos:
         messages.error(request,
                        'Nenhum plano disponível no momento. Entre em contato com o suporte.')
         return redirect('profile')
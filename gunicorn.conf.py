@@ -0,0 +1,166 @@
+"""
+Configuração do Gunicorn para produção
+======================================
+
+Lida automaticamente pelo gunicorn quando está no diretório de trabalho
+(startup.sh passa `-c gunicorn.conf.py` explicitamente). Todo valor pode
+ser sobrescrito por variável de ambiente GUNICORN_*.
+
+Dimensionamento
+    Workers = min(CPU * 2 + 1, memória disponível / memória por worker).
+    CPU e memória vêm dos limites do cgroup quando existem (container),
+    senão da máquina.
+    O worker padrão é o uvicorn (app ASGI): as views async (HTMX) não
+    ocupam uma thread enquanto esperam, e as síncronas rodam cada uma em
+    sua thread. GUNICORN_WORKER_CLASS=gthread volta ao WSGI, onde cada
+    worker atende GUNICORN_THREADS requests ao mesmo tempo (as views async
+    passam a rodar em um event loop por request).
+
+preload_app
+    O Django é importado uma vez no master e os workers herdam a memória
+    por copy-on-write. gc.freeze() antes do fork evita que o coletor de
+    lixo dos workers "suje" essas páginas. Nenhuma conexão (banco, cache)
+    pode atravessar o fork: pre_fork fecha tudo que o master tiver aberto.
+
+Reciclagem
+    Cada worker é reiniciado após max_requests (+ jitter aleatório, para
+    que não reiniciem todos juntos), contendo vazamentos de memória.
+
+Encerramento
+    No SIGTERM os workers param de aceitar conexões e têm graceful_timeout
+    segundos para terminar os requests em andamento.
+"""
+
+import gc
+import multiprocessing
+import os
+
+
+def _inteiro(nome, padrao):
+    return int(os.environ.get(nome, padrao))
+
+
+def _cpus():
+    """ CPUs disponíveis: cota do cgroup v2 (cpu.max), senão afinidade do processo. """
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as arquivo:
+            cota, periodo = arquivo.read().split()
+        if cota != 'max':
+            return max(1, int(int(cota) / int(periodo)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+def _memoria_mb():
+    """ Memória disponível: limite do cgroup v2 (memory.max), senão MemTotal. """
+    try:
+        with open('/sys/fs/cgroup/memory.max') as arquivo:
+            limite = arquivo.read().strip()
+        if limite != 'max':
+            return int(limite) // (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/proc/meminfo') as arquivo:
+            for linha in arquivo:
+                if linha.startswith('MemTotal:'):
+                    return int(linha.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _workers():
+    if 'GUNICORN_WORKERS' in os.environ:
+        return _inteiro('GUNICORN_WORKERS', 1)
+    por_cpu = _cpus() * 2 + 1
+    memoria = _memoria_mb()
+    if memoria is None:
+        return por_cpu
+    # Reserva uma fatia para o master e o sistema
+    por_memoria = (memoria - _inteiro('GUNICORN_RESERVED_MB', 256)) // _inteiro('GUNICORN_WORKER_MB', 150)
+    return max(1, min(por_cpu, por_memoria))
+
+
+# --- Servidor ---------------------------------------------------------------
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+# uvicorn (ASGI, padrão: o projeto tem views async) | gthread | sync
+_classe = os.environ.get('GUNICORN_WORKER_CLASS', 'uvicorn')
+if _classe == 'uvicorn':
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    wsgi_app = 'movibes_project.asgi:application'
+else:
+    worker_class = _classe
+    wsgi_app = 'movibes_project.wsgi:application'
+
+workers = _workers()
+threads = _inteiro('GUNICORN_THREADS', 4) if worker_class == 'gthread' else 1
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# --- Reciclagem e tempos ----------------------------------------------------
+
+max_requests = _inteiro('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _inteiro('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+
+timeout = _inteiro('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _inteiro('GUNICORN_GRACEFUL_TIMEOUT', 30)
+# Atrás de um load balancer: manter a conexão viva um pouco mais que o padrão (2s)
+keepalive = _inteiro('GUNICORN_KEEPALIVE', 5)
+
+# Heartbeat dos workers em memória (em containers, /tmp pode ser overlay lento)
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# --- Logs -------------------------------------------------------------------
+
+# GUNICORN_ACCESSLOG vazio desliga o log de acesso (testes de carga)
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
+
+# Proxy reverso na frente (X-Forwarded-*)
+forwarded_allow_ips = os.environ.get('GUNICORN_FORWARDED_ALLOW_IPS', '*')
+
+
+# --- Hooks ------------------------------------------------------------------
+
+def _fechar_conexoes():
+    """ Fecha conexões de banco (e o pool, se houver) e de cache do processo atual. """
+    from django.core.cache import caches
+    from django.db import connections
+
+    for conexao in connections.all(initialized_only=True):
+        conexao.close()
+        if hasattr(conexao, 'close_pool'):
+            conexao.close_pool()
+    caches.close_all()
+
+
+def when_ready(server):
+    server.log.info(
+        'movibes: %s workers %s x %s threads | preload=%s | max_requests=%s (+%s)',
+        workers, worker_class, threads, preload_app, max_requests, max_requests_jitter,
+    )
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        # Nada de sockets compartilhados entre master e workers
+        _fechar_conexoes()
+        # Objetos já importados vão para a geração permanente: o GC dos
+        # workers não os percorre (nem escreve neles), preservando o CoW
+        gc.freeze()
+
+
+def worker_exit(server, worker):
+    # Saída limpa (reciclagem ou SIGTERM): devolve as conexões ao banco
+    try:
+        _fechar_conexoes()
+    except Exception:
+        # O worker está saindo de qualquer jeito: só registra
+        server.log.exception('Erro ao fechar conexões do worker %s', worker.pid)
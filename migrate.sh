@@ -0,0 +1,12 @@
+#!/bin/bash
+# Comando único de migração (one-shot), rodado uma vez por deploy ANTES de
+# subir os containers da aplicação - e não em cada réplica ao iniciar:
+#   docker run --rm --env-file .env <imagem> /app/migrate.sh
+set -e
+
+# CORREÇÃO: Fazer fake da migração do sites antes
+echo "🔧 Corrigindo ordem das migrações..."
+python manage.py migrate sites --fake-initial 2>/dev/null || echo "ℹ️  Sites já migrado"
+
+echo "🚀 Aplicando migrações..."
+python manage.py migrate --no-input
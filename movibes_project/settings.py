@@ -1,5 +1,8 @@
 import os
+import sys
 from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 import dj_database_url
 
@@ -11,6 +14,9 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'uma-chave-secreta-padrao-caso-nao-ache-no-
 
 DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
 
+# `manage.py test` ou pytest: um único processo, banco de teste descartável
+EXECUTANDO_TESTES = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
 # ALLOWED_HOSTS = ['movibes.linexa.com.br', '127.0.0.1', '192.168.56.1', '192.168.0.163']
 ALLOWED_HOSTS = ['*']
 
@@ -36,6 +42,7 @@ INSTALLED_APPS = [
     'allauth.socialaccount.providers.google',  # Provider do Google
 
     # Apps do projeto
+    'apps.core.apps.CoreConfig',
     'apps.users.apps.UsersConfig',
     'apps.events.apps.EventsConfig',
 
@@ -54,11 +61,12 @@ INSTALLED_APPS = [
 SITE_ID = 1
 
 # Backends de autenticação: permite login tanto tradicional (email/senha) quanto OAuth2
+# Ambos carregam o usuário da sessão já com aluno/profissional (select_related)
 AUTHENTICATION_BACKENDS = [
     # Backend padrão do Django (username/password)
-    'django.contrib.auth.backends.ModelBackend',
+    'apps.users.backends.PerfilModelBackend',
     # Backend do allauth para OAuth2 (Google, Facebook, etc.)
-    'allauth.account.auth_backends.AuthenticationBackend',
+    'apps.users.backends.PerfilAuthenticationBackend',
 ]
 
 # --- CONFIGURAÇÕES GERAIS DE CONTA ---
@@ -160,9 +168,17 @@ SOCIALACCOUNT_ADAPTER = 'apps.users.adapter.MySocialAccountAdapter'
 # MIDDLEWARE
 # ============================================================
 MIDDLEWARE = [
+    # Primeiro da pilha: mede o request inteiro (ver INSTRUMENTAÇÃO)
+    'apps.core.middleware.ServerTimingMiddleware',
+    # Antes de todos que escrevem no corpo: comprime a resposta final
+    'apps.core.middleware.CompressaoMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise com caminho async: sob ASGI não força troca de thread
+    'apps.core.middleware.EstaticosMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    # Sessões com o caminho antigo do backend de login (ver apps.users.backends)
+    'apps.users.middleware.BackendRenomeadoMiddleware',
+    'apps.core.db_router.ReplicaStickinessMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -173,6 +189,52 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware',
     'apps.users.middleware.ProfileCompletionMiddleware',  # Nosso middleware
 ]
+# ============================================================
+# INSTRUMENTAÇÃO
+# ============================================================
+# Header Server-Timing + log JSON por request no logger 'movibes.performance'
+# (consultas, tempo de banco, templates, cache). Desligado não custa nada.
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'False').lower() == 'true'
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_SAMPLE_RATE', 1.0))
+
+# Compressão de HTML/partials (apps.core.middleware.CompressaoMiddleware)
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', 1024))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 5))
+
+# Cache dos fragmentos do layout (menus do base.html) em segundos, por
+# usuário + versão do perfil + contagem de notificações. 0 desliga.
+LAYOUT_CACHE_TIMEOUT = int(os.getenv('LAYOUT_CACHE_TIMEOUT', 600))
+
+# Cache do conteúdo público da página do evento (evento_detail) em segundos,
+# por versão da tag 'evento:<id>'. O prazo limita o atraso de mudanças que
+# não passam pela tag (foto ou nome de um participante). 0 desliga.
+EVENTO_CACHE_TIMEOUT = int(os.getenv('EVENTO_CACHE_TIMEOUT', 600))
+
+# Idade máxima (segundos) do catálogo de planos em memória de cada processo
+# (apps.users.catalog). A tag 'planos' já avisa das mudanças; o prazo é a
+# rede de segurança se uma invalidação se perder (cache reiniciado ou
+# esvaziado). 0 reconstrói a cada leitura.
+CATALOGO_PLANOS_TTL = int(os.getenv('CATALOGO_PLANOS_TTL', 60))
+
+# Orçamento de tempo de import no boot (django.setup() + URLconf), em ms.
+# Verificado por apps.core.tests.BootImportTests e `manage.py profile_imports`.
+BOOT_IMPORT_BUDGET_MS = float(os.getenv('BOOT_IMPORT_BUDGET_MS', 1500))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'movibes.performance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 # ============================================================
 # TEMPLATES
 # ============================================================
@@ -182,8 +244,17 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates', BASE_DIR / 'theme' / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Loader com cache sempre ligado (também com DEBUG=True; o
+            # autoreload do runserver limpa o cache quando um template muda):
+            # cada template é lido e compilado uma vez por processo.
+            # `manage.py profile_templates` compara com e sem.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -191,6 +262,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'apps.users.context_processors.notificacoes_context',
+                'apps.users.context_processors.layout_context',
             ],
         },
     },
@@ -201,13 +273,133 @@ WSGI_APPLICATION = 'movibes_project.wsgi.application'
 # ============================================================
 # DATABASE
 # ============================================================
+# Modos de conexão (variáveis de ambiente):
+# DB_POOL=true        -> pool nativo do psycopg 3 (Django 5.1+), compartilhado
+#                        pelas threads de cada worker. Exige CONN_MAX_AGE=0.
+# DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE / DB_POOL_TIMEOUT -> tamanho do pool e
+#                        espera máxima (s) por uma conexão livre
+# DB_CONN_MAX_AGE     -> sem pool: conexões persistentes por thread (padrão:
+#                        600s no WSGI; 0 no ASGI, onde cada request roda o
+#                        código síncrono em uma thread nova e a conexão da
+#                        thread não seria reaproveitada - use DB_POOL)
+# Em ambos os casos a conexão é testada antes de ser reaproveitada
+# (CONN_HEALTH_CHECKS / check do pool): quedas de conexões ociosas não viram
+# erro no request seguinte.
+DB_POOL = os.getenv('DB_POOL', 'False').lower() == 'true'
+# Servido pelo worker uvicorn (ASGI), o padrão do gunicorn.conf.py
+SERVIDOR_ASGI = os.getenv('GUNICORN_WORKER_CLASS', 'uvicorn') == 'uvicorn'
+
 DATABASES = {
     'default': dj_database_url.config(
         default=os.getenv('DATABASE_URL'),
-        conn_max_age=600
+        conn_max_age=0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 0 if SERVIDOR_ASGI else 600)),
+        conn_health_checks=True,
     )
 }
 
+if DB_POOL and DATABASES['default'].get('ENGINE') == 'django.db.backends.postgresql':
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        # Testa a conexão ao retirá-la do pool
+        'check': ConnectionPool.check_connection,
+    }
+
+# Réplica de leitura (opcional): views marcadas com @use_replica leem dela.
+# Depois de um POST o usuário fica REPLICA_STICKY_SECONDS no principal
+# (ver apps.core.db_router).
+if os.getenv('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = dj_database_url.parse(
+        os.environ['DATABASE_REPLICA_URL'],
+        conn_max_age=DATABASES['default']['CONN_MAX_AGE'],
+        conn_health_checks=True,
+        # Nos testes a réplica espelha o banco de teste principal; o
+        # ReplicaRouter lê de um espelho pelo próprio principal
+        test_options={'MIRROR': 'default'},
+    )
+    if 'pool' in DATABASES['default'].get('OPTIONS', {}):
+        DATABASES['replica'].setdefault('OPTIONS', {})['pool'] = dict(
+            DATABASES['default']['OPTIONS']['pool']
+        )
+
+# Nos testes, um segundo banco independente (sem os dados do principal) para
+# os testes do ReplicaRouter (apps.core.tests). Nada é roteado para ele fora
+# desses testes.
+if EXECUTANDO_TESTES:
+    DATABASES['replica_testes'] = {**DATABASES['default'], 'TEST': {'MIGRATE': False}}
+    if DATABASES['default'].get('ENGINE') != 'django.db.backends.sqlite3':
+        DATABASES['replica_testes']['TEST']['NAME'] = f"test_{DATABASES['default']['NAME']}_replica"
+
+DATABASE_ROUTERS = ['apps.core.db_router.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+
+# ============================================================
+# CACHE
+# ============================================================
+# Backend escolhido pela variável de ambiente CACHE_BACKEND:
+# 'locmem' -> memória do próprio processo (cada worker tem o seu); só em
+#             DEBUG e nos testes
+# 'file'   -> arquivos em CACHE_LOCATION (compartilhado entre workers da
+#             mesma máquina; padrão fora de DEBUG)
+# 'redis'  -> servidor Redis ou compatível (Valkey, KeyDB...) em CACHE_LOCATION
+#             (compartilhado entre máquinas)
+# Todo cache do projeto passa por apps.core.cache (tags + single-flight). As
+# versões das tags ficam no próprio cache: com locmem e vários workers, uma
+# invalidação só chegaria ao worker que atendeu a escrita.
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CACHE_BACKENDS_COMPARTILHADOS = {'file', 'redis'}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem' if DEBUG or EXECUTANDO_TESTES else 'file')
+if CACHE_BACKEND not in CACHE_BACKENDS_COMPARTILHADOS and not (DEBUG or EXECUTANDO_TESTES):
+    raise ImproperlyConfigured(
+        f"CACHE_BACKEND='{CACHE_BACKEND}' não é compartilhado entre workers: as invalidações do "
+        "cache não chegariam aos outros processos. Use 'file' ou 'redis' fora de DEBUG."
+    )
+CACHE_LOCATIONS_PADRAO = {
+    'locmem': 'movibes',
+    'file': str(BASE_DIR / '.cache'),
+    'redis': 'redis://127.0.0.1:6379/1',
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_LOCATIONS_PADRAO[CACHE_BACKEND]),
+        'KEY_PREFIX': 'movibes',
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+    }
+}
+
+# ============================================================
+# SESSÕES
+# ============================================================
+# Modo de armazenamento das sessões (variável de ambiente SESSION_MODE):
+# 'db'             -> tabela django_session (SELECT/UPDATE a cada request)
+# 'cached_db'      -> lê do cache e só vai ao banco em cache miss; grava nos dois
+# 'cache'          -> apenas cache (sessões somem se o cache for limpo)
+# 'signed_cookies' -> sessão assinada no próprio cookie, sem banco nem cache
+# 'cached_db' e 'cache' exigem CACHE_BACKEND compartilhado ('file' ou 'redis'):
+# com locmem cada worker veria só as sessões que ele mesmo gravou.
+# Compare os modos com: python manage.py benchmark_sessions
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_MODE = os.getenv('SESSION_MODE', 'db')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+if SESSION_MODE in {'cached_db', 'cache'} and CACHE_BACKEND not in CACHE_BACKENDS_COMPARTILHADOS:
+    raise ImproperlyConfigured(
+        f"SESSION_MODE='{SESSION_MODE}' guarda sessões no cache e exige CACHE_BACKEND compartilhado "
+        f"('file' ou 'redis'), não '{CACHE_BACKEND}'."
+    )
+
 # ============================================================
 # PASSWORD VALIDATION
 # ============================================================
@@ -243,6 +435,22 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# O collectstatic roda no build da imagem (Dockerfile), não no start do
+# container. O storage do WhiteNoise grava cada arquivo com o hash do
+# conteúdo no nome (styles.3f2a9c1b.css) e versões pré-comprimidas .br e
+# .gz. Em produção o WhiteNoise serve esses arquivos com
+# "Cache-Control: max-age=315360000, public, immutable" e escolhe a versão
+# Brotli/gzip pelo Accept-Encoding, sem comprimir nada por request.
+# Com DEBUG=True os templates usam os nomes sem hash (sem collectstatic).
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'apps.core.storage.ManifestEstaticosStorage',
+    },
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
@@ -250,6 +458,8 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # OTHER SETTINGS
 # ============================================================
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+# Testes usam storage de estáticos sem manifest (não exigem collectstatic)
+TEST_RUNNER = 'apps.core.test_runner.MovibesTestRunner'
 AUTH_USER_MODEL = 'users.Usuario'
 TAILWIND_APP_NAME = 'theme'
 
@@ -1,13 +1,15 @@
 from django.contrib import admin
 from django.urls import path, include
+from apps.core.views import healthz, readyz
 from apps.events.views import home, subscribe_to_event, create_event, \
-    gerenciar_galeria_evento, evento_detail_view, like_inscricao_view, \
-    processar_curtida_presenca_view, mock_checkout_view, processar_pagamento_view
+    gerenciar_galeria_evento, evento_detail_view, evento_controles_view, like_inscricao_view, \
+    processar_curtida_presenca_view, mock_checkout_view, processar_pagamento_view, \
+    modal_premium_view
 from apps.users.views import complete_aluno_profile, complete_profissional_profile, \
      profile_view, gerenciar_galeria, public_profile_view, \
     adicionar_avaliacao_view, solicitar_conexao_view, listar_notificacoes_view, \
-    responder_solicitacao_view, processar_like_back_view, \
-    process_premium_payment_view, escolher_plano_view, checkout_assinatura_view, \
+    responder_solicitacao_view, processar_like_back_view, contagem_notificacoes_view, \
+    meus_matches_view, process_premium_payment_view, escolher_plano_view, checkout_assinatura_view, \
     processar_assinatura_view, cancelar_assinatura_view, historico_assinaturas_view, \
     mock_premium_checkout_view, escolher_plano_obrigatorio_view
 
@@ -15,6 +17,10 @@ urlpatterns = [
     # Página inicial
     path('', home, name='home'),
 
+    # Saúde do processo (liveness) e prontidão para tráfego (readiness)
+    path('healthz', healthz, name='healthz'),
+    path('readyz', readyz, name='readyz'),
+
     # Admin do Django
     path('admin/', admin.site.urls),
 
@@ -35,6 +41,7 @@ urlpatterns = [
     path('evento/<int:evento_id>/galeria/', gerenciar_galeria_evento,
          name='account_galeria_evento'),
     path('evento/<int:evento_id>/', evento_detail_view, name='evento_detail'),
+    path('evento/<int:evento_id>/controles/', evento_controles_view, name='evento_controles'),
     path('evento/<int:evento_id>/comprar/', mock_checkout_view, name='mock_checkout'),
     path('evento/<int:evento_id>/processar-pagamento/', processar_pagamento_view,
          name='processar_pagamento'),
@@ -48,6 +55,7 @@ urlpatterns = [
     path('solicitar-conexao/<int:usuario_id>/', solicitar_conexao_view,
          name='solicitar_conexao'),
     path('notificacoes/', listar_notificacoes_view, name='listar_notificacoes'),
+    path('notificacoes/contagem/', contagem_notificacoes_view, name='contagem_notificacoes'),
     path('notificacoes/responder/<int:solicitacao_id>/<str:acao>/',
          responder_solicitacao_view, name='responder_solicitacao'),
 
@@ -58,11 +66,13 @@ urlpatterns = [
          name='curtir_presenca'),
     path('interacao/<int:interacao_id>/like-back/', processar_like_back_view,
          name='like_back'),
+    path('matches/', meus_matches_view, name='meus_matches'),
 
     # Rotas de sistema de premium/assinaturas
     path('premium/process-payment/', process_premium_payment_view,
          name='process_premium_payment'),
     path('premium/checkout/', mock_premium_checkout_view, name='mock_premium_checkout'),
+    path('premium/modal/', modal_premium_view, name='modal_premium'),
     path('assinatura/escolher-plano/', escolher_plano_view, name='escolher_plano'),
     path('assinatura/escolher-plano-obrigatorio/', escolher_plano_obrigatorio_view,
          name='escolher_plano_obrigatorio'),
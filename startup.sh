@@ -1,18 +1,7 @@
 #!/bin/bash
-echo "🚀 Iniciando container Movibes..."
-
-# 1. Coletar todos os arquivos estáticos
-echo "🚀 Coletando arquivos estáticos..."
-python manage.py collectstatic --no-input --clear
-
-# 2. CORREÇÃO: Fazer fake da migração do sites antes
-echo "🔧 Corrigindo ordem das migrações..."
-python manage.py migrate sites --fake-initial 2>/dev/null || echo "ℹ️  Sites já migrado"
-
-# 3. Aplicar todas as migrações
-echo "🚀 Aplicando migrações..."
-python manage.py migrate --no-input
-
-# 4. Iniciar o servidor Gunicorn
+# Start do container: só o Gunicorn.
+# - Estáticos já foram coletados no build da imagem (Dockerfile).
+# - Migrações rodam separadamente, uma única vez por deploy: ./migrate.sh
+# - Workers, threads, preload e reciclagem: gunicorn.conf.py (GUNICORN_*)
 echo "🚀 Iniciando Gunicorn..."
-gunicorn movibes_project.wsgi:application --bind 0.0.0.0:8000
\ No newline at end of file
+exec gunicorn -c gunicorn.conf.py